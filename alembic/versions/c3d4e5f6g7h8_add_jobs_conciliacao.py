@@ -0,0 +1,51 @@
+"""add jobs conciliacao
+
+Revision ID: c3d4e5f6g7h8
+Revises: b2c3d4e5f6g7
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3d4e5f6g7h8'
+down_revision: Union[str, Sequence[str], None] = 'b2c3d4e5f6g7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - Add jobs_conciliacao table."""
+
+    # Tabela de jobs assíncronos de conciliação
+    op.create_table(
+        'jobs_conciliacao',
+        sa.Column('id', sa.String(length=32), nullable=False),
+        sa.Column('tipo', sa.String(length=20), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='PENDENTE'),
+        sa.Column('progresso', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('etapa', sa.String(length=100), nullable=True),
+        sa.Column('mensagem_erro', sa.Text(), nullable=True),
+        sa.Column('caminho_resultado', sa.String(length=300), nullable=True),
+        sa.Column('usuario_id', sa.Integer(), nullable=True),
+        sa.Column('iniciado_em', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('concluido_em', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('NOW()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('NOW()'), nullable=False),
+        sa.ForeignKeyConstraint(['usuario_id'], ['concilia.usuario.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+        schema='concilia'
+    )
+    op.create_index('ix_jobs_conciliacao_status', 'jobs_conciliacao', ['status'], unique=False, schema='concilia')
+    op.create_index('ix_jobs_conciliacao_usuario_id', 'jobs_conciliacao', ['usuario_id'], unique=False, schema='concilia')
+
+
+def downgrade() -> None:
+    """Downgrade schema - Remove jobs_conciliacao table."""
+
+    op.drop_index('ix_jobs_conciliacao_usuario_id', table_name='jobs_conciliacao', schema='concilia')
+    op.drop_index('ix_jobs_conciliacao_status', table_name='jobs_conciliacao', schema='concilia')
+    op.drop_table('jobs_conciliacao', schema='concilia')
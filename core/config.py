@@ -48,6 +48,39 @@ class Settings(BaseSettings):
     LOGIN_MAX_ATTEMPTS: int = 5
     LOGIN_LOCKOUT_MINUTES: int = 15
 
+    # Análise de diferenças (subset-sum dos lançamentos que explicam a diferença)
+    SUBSET_SUM_MAX_NODES: int = 20_000_000  # orçamento de operações por código
+    SUBSET_SUM_TIME_LIMIT_MS: int = 250  # tempo máximo de busca por código
+    SUBSET_SUM_DP_MAX_TARGET_CENTS: int = 1_000_000  # alvo máximo para programação dinâmica
+    SUBSET_SUM_MITM_MAX_ITEMS: int = 40  # itens máximos para meet-in-the-middle
+
+    # Análise detalhada em paralelo (códigos particionados por hash em um pool de processos)
+    # Cada worker de conciliação (RECONCILIATION_WORKERS) tem o seu próprio pool de análise:
+    # no total são RECONCILIATION_WORKERS × (1 + ANALYSIS_PARALLEL_WORKERS) processos.
+    ANALYSIS_PARALLEL_WORKERS: int = 0  # processos do pool; 0 = núcleos ÷ RECONCILIATION_WORKERS (mín. 1), 1 desativa
+    ANALYSIS_PARALLEL_MIN_ROWS: int = 50_000  # linhas somadas das bases a partir das quais paraleliza
+
+    # Conciliação contábil em modo resumo (detalhamento por código sob demanda)
+    ANALYSIS_RUN_TTL_MINUTES: int = 60  # tempo que o contexto de uma execução fica disponível (em disco, no STORAGE_DIR)
+    ANALYSIS_RUN_MAX_ENTRIES: int = 32  # execuções mantidas em memória por processo da API (as demais são lidas do disco)
+
+    # Execução das conciliações (contábil/bancária) em pool de processos dedicado
+    RECONCILIATION_WORKERS: int = 2  # processos do pool
+    RECONCILIATION_QUEUE_DEPTH: int = 4  # conciliações aguardando além das em execução
+    RECONCILIATION_RETRY_AFTER_SECONDS: int = 30  # Retry-After do 503 quando saturado
+    RECONCILIATION_JOB_STALE_MINUTES: int = 120  # job sem atualização por mais tempo é dado como interrompido
+
+    # Cache dos resultados de conciliação (hash do conteúdo das bases)
+    RESULT_CACHE_MAX_MB: int = 256  # limite da camada em memória (por processo)
+    RESULT_CACHE_DIR: str = ""  # diretório da camada em disco; vazio desativa
+    RESULT_CACHE_DISK_MAX_MB: int = 2048  # limite da camada em disco
+    RECONCILIATION_BASE_CACHE_ENTRIES: int = 4  # bases normalizadas guardadas por tipo (re-execução incremental; em disco com RESULT_CACHE_DIR); 0 desativa
+
+    # Planilhas enviadas direto para a conciliação (multipart), guardadas para a efetivação
+    RECONCILIATION_UPLOAD_MAX_MB: int = 200  # tamanho máximo de cada planilha
+    RECONCILIATION_UPLOAD_TTL_HOURS: int = 48  # uploads mais antigos são removidos
+    RECONCILIATION_LEDGER_BATCH_ROWS: int = 100_000  # linhas por lote na leitura do razão geral enviado como planilha
+
     # CORS
     ALLOWED_ORIGINS: list[str] = ["http://localhost:3000", "http://127.0.0.1:3000"]
 
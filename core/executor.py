@@ -0,0 +1,119 @@
+# core/executor.py
+"""
+Executor das conciliações (contábil e bancária) fora do event loop.
+
+As conciliações são CPU-bound e síncronas; executadas dentro de um endpoint
+``async`` elas travam o event loop e todas as demais requisições do worker.
+O executor as envia para um pool de processos dedicado e limita quantas podem
+estar em execução ou aguardando: acima de ``RECONCILIATION_WORKERS`` +
+``RECONCILIATION_QUEUE_DEPTH`` a submissão é recusada com
+``ExecutorSaturadoError`` (o router responde 503 com Retry-After).
+"""
+import asyncio
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorSaturadoError(Exception):
+    """Executor com todas as vagas (execução + fila) ocupadas."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Servidor ocupado processando outras conciliações")
+        self.retry_after = retry_after
+
+
+class ExecutorConciliacao:
+    """Pool de processos com fila limitada para as conciliações."""
+
+    def __init__(self, max_workers: int, profundidade_fila: int, retry_after: int):
+        self.max_workers = max(1, max_workers)
+        self.profundidade_fila = max(0, profundidade_fila)
+        self.retry_after = retry_after
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._ocupadas = 0  # em execução + aguardando
+        self._lock = threading.Lock()
+
+    def _reservar_vaga(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._ocupadas >= self.max_workers + self.profundidade_fila:
+                logger.warning(
+                    "[EXECUTOR] Saturado: %s conciliações em execução/fila", self._ocupadas
+                )
+                raise ExecutorSaturadoError(self.retry_after)
+            self._ocupadas += 1
+            if self._pool is None:
+                # spawn: o processo da API tem threads; fork herdaria locks em estado inválido
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def _liberar_vaga(self) -> None:
+        with self._lock:
+            self._ocupadas -= 1
+
+    def _descartar_pool(self, pool: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def submeter(self, funcao: Callable[..., Any], *args: Any) -> "asyncio.Future[Any]":
+        """
+        Submete ``funcao(*args)`` ao pool e retorna o future sem aguardá-lo.
+
+        A vaga é reservada na submissão e liberada quando o future termina.
+
+        Raises:
+            ExecutorSaturadoError: Se não houver vaga em execução nem na fila
+        """
+        pool = self._reservar_vaga()
+        try:
+            futuro = asyncio.get_running_loop().run_in_executor(pool, funcao, *args)
+        except BaseException:
+            self._liberar_vaga()
+            raise
+        futuro.add_done_callback(lambda f: self._finalizar(pool, f))
+        return futuro
+
+    def _finalizar(self, pool: ProcessPoolExecutor, futuro: "asyncio.Future[Any]") -> None:
+        self._liberar_vaga()
+        if not futuro.cancelled() and isinstance(futuro.exception(), BrokenProcessPool):
+            # Um worker morreu (ex.: falta de memória); o próximo uso recria o pool
+            logger.error("[EXECUTOR] Pool de processos quebrado; será recriado")
+            self._descartar_pool(pool)
+
+    async def executar(self, funcao: Callable[..., Any], *args: Any) -> Any:
+        """
+        Executa ``funcao(*args)`` em um processo do pool sem bloquear o event loop.
+
+        ``funcao`` e os argumentos precisam ser serializáveis (pickle); a função
+        deve ser de nível de módulo.
+
+        Raises:
+            ExecutorSaturadoError: Se não houver vaga em execução nem na fila
+        """
+        return await self.submeter(funcao, *args)
+
+    def encerrar(self) -> None:
+        """Encerra o pool (shutdown da aplicação)."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+executor_conciliacao = ExecutorConciliacao(
+    max_workers=settings.RECONCILIATION_WORKERS,
+    profundidade_fila=settings.RECONCILIATION_QUEUE_DEPTH,
+    retry_after=settings.RECONCILIATION_RETRY_AFTER_SECONDS,
+)
@@ -0,0 +1,42 @@
+# core/serializacao.py
+"""
+Serialização JSON dos relatórios de conciliação e efetivação.
+
+Os relatórios têm listas com dezenas de milhares de itens; o caminho padrão
+do FastAPI (``jsonable_encoder`` + ``json.dumps``) percorre cada dict em
+Python. Aqui o dict é serializado direto para bytes pelo orjson:
+
+- escalares e arrays do numpy são aceitos (``np.int64``, ``np.float64``...);
+- NaN/Infinito viram ``null`` (o ``json`` padrão geraria JSON inválido ou erro);
+- chaves não-string (ex.: int) são convertidas para string, como no ``json``;
+- outros tipos (``pd.Timestamp``, ``Decimal``...) usam ``str()``, como o
+  ``default=str`` usado antes.
+"""
+from typing import Any
+
+import orjson
+import pandas as pd
+from fastapi.responses import Response
+
+_OPCOES = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _converter(valor: Any) -> Any:
+    if valor is pd.NA or valor is pd.NaT:
+        return None
+    return str(valor)
+
+
+def serializar_json(dados: Any, indentado: bool = False) -> bytes:
+    """Serializa ``dados`` em JSON (UTF-8); ``indentado`` usa 2 espaços."""
+    opcoes = _OPCOES | orjson.OPT_INDENT_2 if indentado else _OPCOES
+    return orjson.dumps(dados, default=_converter, option=opcoes)
+
+
+class RespostaJSON(Response):
+    """Resposta JSON serializada por ``serializar_json`` (sem ``jsonable_encoder``)."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return serializar_json(content)
@@ -3,6 +3,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 from core.config import settings
+from core.executor import executor_conciliacao
 import traceback
 from routers.empresa_router import router as empresa_router
 from routers.planodecontas_router import router as planodecontas_router
@@ -15,6 +16,7 @@ from routers.admin_perfis_router import router as admin_perfis_router
 from routers.efetivacao_router import router as efetivacao_router
 from routers.dashboard_router import router as dashboard_router
 from routers.conciliacao_bancaria_router import router as conciliacao_bancaria_router
+from routers.job_conciliacao_router import router as job_conciliacao_router
 
 app = FastAPI(
     title="Conciliação API",
@@ -56,6 +58,12 @@ async def global_exception_handler(request: Request, exc: Exception):
     )
 
 
+@app.on_event("shutdown")
+def encerrar_executor_conciliacao():
+    """Encerra o pool de processos das conciliações."""
+    executor_conciliacao.encerrar()
+
+
 app.include_router(empresa_router, prefix="/api")
 app.include_router(planodecontas_router, prefix="/api")
 app.include_router(conciliacao_router, prefix="/api")
@@ -67,3 +75,4 @@ app.include_router(admin_perfis_router, prefix="/api")
 app.include_router(efetivacao_router, prefix="/api")
 app.include_router(dashboard_router, prefix="/api")
 app.include_router(conciliacao_bancaria_router, prefix="/api")
+app.include_router(job_conciliacao_router, prefix="/api")
@@ -37,6 +37,9 @@ from .password_reset import PasswordReset
 from .user_session import UserSession
 from .audit_log import AuditLog, AuditAction
 
+# 8. Jobs assíncronos de conciliação
+from .job_conciliacao import JobConciliacao, StatusJob
+
 # Lista todos os modelos exportados
 __all__ = [
     "Base",
@@ -53,4 +56,6 @@ __all__ = [
     "PlanoDeContas",
     "Conciliacao",
     "ArquivoConciliacao",
+    "JobConciliacao",
+    "StatusJob",
 ]
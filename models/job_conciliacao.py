@@ -0,0 +1,47 @@
+# models/job_conciliacao.py
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, text
+from sqlalchemy.sql import func
+from db import Base
+
+
+class JobConciliacao(Base):
+    """Modelo de job assíncrono de conciliação (contábil ou bancária)."""
+
+    __tablename__ = "jobs_conciliacao"
+    __table_args__ = {"schema": "concilia"}
+
+    # Colunas principais
+    id = Column(String(32), primary_key=True)  # uuid4 hex
+    tipo = Column(String(20), nullable=False)  # contabil, bancaria
+    status = Column(String(20), nullable=False, default="PENDENTE", index=True)
+    progresso = Column(Integer, nullable=False, default=0)  # 0-100
+    etapa = Column(String(100), nullable=True)
+    mensagem_erro = Column(Text, nullable=True)
+    caminho_resultado = Column(String(300), nullable=True)  # JSON no volume do FileStorageService
+    usuario_id = Column(
+        Integer,
+        ForeignKey("concilia.usuario.id", ondelete="SET NULL"),
+        nullable=True,
+        index=True,
+    )
+
+    # Timestamps - padrão snake_case
+    iniciado_em = Column(DateTime(timezone=True), nullable=True)
+    concluido_em = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=text("NOW()"), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<JobConciliacao(id='{self.id}', tipo='{self.tipo}', status='{self.status}')>"
+
+
+# Constantes de status do job
+class StatusJob:
+    """Constantes para o status de um job de conciliação."""
+
+    PENDENTE = "PENDENTE"
+    EM_EXECUCAO = "EM_EXECUCAO"
+    CONCLUIDO = "CONCLUIDO"
+    FALHOU = "FALHOU"
+
+    FINAIS = (CONCLUIDO, FALHOU)
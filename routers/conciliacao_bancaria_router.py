@@ -3,9 +3,13 @@ Router para endpoints de Conciliacao Bancaria.
 
 Endpoints:
 - POST /conciliacoes/bancaria - Processa conciliacao bancaria
+- POST /conciliacoes/bancaria/arquivos - Idem, a partir das planilhas originais
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Depends, File, Form, UploadFile
+from fastapi.responses import Response
 import logging
 
 from schemas.conciliacao_bancaria_schema import (
@@ -13,10 +17,18 @@ from schemas.conciliacao_bancaria_schema import (
     RelatorioConciliacaoBancaria,
     EfetivarConciliacaoBancariaRequest,
 )
-from services.conciliacao_bancaria_service import ConciliacaoBancariaService
+from services.conciliacao_bancaria_service import (
+    ConciliacaoBancariaService,
+    processar_conciliacao_bancaria as processar_conciliacao_bancaria_processo,
+    processar_conciliacao_bancaria_planilhas,
+)
+from services.cache_resultado_service import CacheResultadoService
 from services.conciliacao_bancaria_efetivacao_service import ConciliacaoBancariaEfetivacaoService
 from schemas.efetivacao_schema import EfetivarConciliacaoResponse, StatusConciliacao
 from middleware.auth import get_current_user, CurrentUser
+from core.executor import executor_conciliacao, ExecutorSaturadoError
+from core.serializacao import RespostaJSON
+from services.upload_planilha_service import UploadPlanilhaService
 from db import get_db
 from sqlalchemy.orm import Session
 
@@ -29,7 +41,7 @@ router = APIRouter(
 
 
 @router.post("/bancaria", response_model=None)
-def processar_conciliacao_bancaria(request: RequestConciliacaoBancaria):
+async def processar_conciliacao_bancaria(request: RequestConciliacaoBancaria):
     """
     Processa conciliacao bancaria.
 
@@ -54,10 +66,79 @@ def processar_conciliacao_bancaria(request: RequestConciliacaoBancaria):
         raise HTTPException(status_code=400, detail=mensagem)
 
     try:
-        # Executar conciliacao
-        resultado = service.executar(request)
+        # Re-submissao identica: devolve o resultado ja serializado
+        cache = CacheResultadoService()
+        chave_cache = cache.chave_bancaria(request)
+        conteudo = cache.obter(chave_cache)
+        if conteudo is not None:
+            logger.info("Conciliacao bancaria devolvida do cache")
+            return Response(content=conteudo, media_type="application/json")
+
+        # Executar conciliacao no pool de conciliacoes (fora do event loop)
+        resultado = await executor_conciliacao.executar(
+            processar_conciliacao_bancaria_processo, request
+        )
         logger.info("Conciliacao bancaria executada com sucesso")
-        return resultado
+
+    except ExecutorSaturadoError as e:
+        logger.warning(f"Conciliacao bancaria recusada: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail=f"{str(e)}. Tente novamente em instantes.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+    except ValueError as e:
+        logger.error(f"Erro de validacao: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+    except Exception as e:
+        logger.exception(f"Erro interno: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erro interno ao processar conciliacao bancaria: {str(e)}"
+        )
+
+    return Response(content=cache.guardar(chave_cache, resultado), media_type="application/json")
+
+
+@router.post("/bancaria/arquivos", response_model=None)
+async def processar_conciliacao_bancaria_arquivos(
+    arquivo_extrato: UploadFile = File(..., description="Extrato bancario FINR470 (.xlsx/.csv/.parquet/.arrow)"),
+    arquivo_razao: UploadFile = File(..., description="Razao contabil do banco CTBR400 (.xlsx/.csv/.parquet/.arrow)"),
+    conta_contabil: str = Form(..., description="Conta contabil do banco"),
+    data_base: str = Form(..., description="Data-base (DD/MM/YYYY)"),
+    empresa_id: Optional[int] = Form(None),
+):
+    """
+    Processa conciliacao bancaria a partir das planilhas originais.
+
+    As planilhas sao lidas e normalizadas no servidor (Parquet e Arrow IPC
+    sao carregados sem parsing); o retorno e o mesmo de POST
+    /conciliacoes/bancaria.
+    """
+    logger.info("="*50)
+    logger.info("ENDPOINT: POST /conciliacoes/bancaria/arquivos")
+    logger.info("="*50)
+
+    try:
+        upload_service = UploadPlanilhaService()
+        extrato = await upload_service.ler(arquivo_extrato)
+        razao = await upload_service.ler(arquivo_razao)
+
+        resultado = await executor_conciliacao.executar(
+            processar_conciliacao_bancaria_planilhas,
+            extrato, razao, conta_contabil, data_base, empresa_id,
+        )
+        logger.info("Conciliacao bancaria (planilhas) executada com sucesso")
+
+    except ExecutorSaturadoError as e:
+        logger.warning(f"Conciliacao bancaria recusada: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail=f"{str(e)}. Tente novamente em instantes.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
 
     except ValueError as e:
         logger.error(f"Erro de validacao: {str(e)}")
@@ -70,6 +151,8 @@ def processar_conciliacao_bancaria(request: RequestConciliacaoBancaria):
             detail=f"Erro interno ao processar conciliacao bancaria: {str(e)}"
         )
 
+    return RespostaJSON(resultado)
+
 
 @router.post("/bancaria/efetivar", response_model=EfetivarConciliacaoResponse, status_code=201)
 def efetivar_conciliacao_bancaria(
@@ -1,24 +1,99 @@
-from fastapi import APIRouter, HTTPException, status
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, File, Form, HTTPException, Query, UploadFile, status
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+import asyncio
 import logging
+import os
+import tempfile
 
+from core.executor import executor_conciliacao, ExecutorSaturadoError
+from core.serializacao import RespostaJSON, serializar_json
 from schemas.conciliacao_schema import RequestConciliacao
-from services.conciliacao_service import ConciliacaoService
+from services.cache_resultado_service import CacheResultadoService
+from services.conciliacao_service import (
+    ConciliacaoService,
+    MODO_ANALISE_COMPLETO,
+    MODO_ANALISE_RESUMO,
+    processar_conciliacao as processar_conciliacao_contabil,
+    processar_conciliacao_planilhas,
+    transmitir_conciliacao,
+)
+from services.upload_planilha_service import (
+    ARQUIVO_CONTABIL_FILTRADO,
+    ARQUIVO_CONTABIL_GERAL,
+    ARQUIVO_ORIGEM,
+    UploadPlanilhaService,
+)
 
 router = APIRouter(prefix="/conciliacoes", tags=["Conciliações"])
 logger = logging.getLogger(__name__)
 
+# Formatos da resposta da conciliação contábil
+FORMATO_JSON = "json"
+FORMATO_NDJSON = "ndjson"  # streaming: uma linha {"secao", "dados"} por parte do relatório
+
+TAMANHO_LEITURA_STREAMING = 64 * 1024
+INTERVALO_STREAMING_SEGUNDOS = 0.05
+
+
+async def _aguardar_inicio(caminho: str, futuro: "asyncio.Future") -> None:
+    """Aguarda o worker gravar a primeira linha (ou terminar)."""
+    while not futuro.done() and os.path.getsize(caminho) == 0:
+        await asyncio.sleep(INTERVALO_STREAMING_SEGUNDOS)
+
+
+async def _transmitir_arquivo(caminho: str, futuro: "asyncio.Future"):
+    """Repassa as linhas completas gravadas pelo worker até ele terminar."""
+    try:
+        with open(caminho, "rb") as arquivo:
+            pendente = b""
+            while True:
+                terminou = futuro.done()
+                bloco = arquivo.read(TAMANHO_LEITURA_STREAMING)
+                if bloco:
+                    pendente += bloco
+                    fim_linha = pendente.rfind(b"\n")
+                    if fim_linha >= 0:
+                        yield pendente[:fim_linha + 1]
+                        pendente = pendente[fim_linha + 1:]
+                    continue
+                if terminou:
+                    break
+                await asyncio.sleep(INTERVALO_STREAMING_SEGUNDOS)
+
+        if futuro.cancelled() or futuro.exception() is not None:
+            erro = "cancelada" if futuro.cancelled() else str(futuro.exception())
+            logger.error(f"❌ Conciliação em streaming interrompida: {erro}")
+            linha = {"secao": "erro", "dados": f"Erro ao processar conciliação: {erro}"}
+            yield serializar_json(linha) + b"\n"
+    finally:
+        os.remove(caminho)
+
 
 @router.post("/contabil")
-async def processar_conciliacao(request: RequestConciliacao):
+async def processar_conciliacao(
+    request: RequestConciliacao,
+    modo_analise: str = Query(
+        MODO_ANALISE_COMPLETO,
+        pattern=f"^({MODO_ANALISE_COMPLETO}|{MODO_ANALISE_RESUMO})$",
+        description="resumo: apenas cabeçalhos da análise detalhada + execucao_id "
+        "para detalhar cada código sob demanda",
+    ),
+    formato: str = Query(
+        FORMATO_JSON,
+        pattern=f"^({FORMATO_JSON}|{FORMATO_NDJSON})$",
+        description="ndjson: relatório em streaming (application/x-ndjson), uma linha "
+        '{"secao", "dados"} por parte, começando pelo resumo; só no modo completo',
+    ),
+):
     """
     Processa uma conciliação contábil comparando origem vs contabilidade
     """
     try:
         logger.info("📥 Recebendo requisição de conciliação")
-        logger.info(f"📊 Origem: {len(request.base_origem.registros)} registros")
-        logger.info(f"📊 Contábil: {len(request.base_contabil_filtrada.registros)} registros")
-        logger.info(f"📊 Geral: {len(request.base_contabil_geral.registros)} registros")
+        logger.info(f"📊 Origem: {request.base_origem.quantidade} registros")
+        logger.info(f"📊 Contábil: {request.base_contabil_filtrada.quantidade} registros")
+        logger.info(f"📊 Geral: {request.base_contabil_geral.quantidade} registros")
         
         service = ConciliacaoService()
         
@@ -31,21 +106,164 @@ async def processar_conciliacao(request: RequestConciliacao):
                 detail=mensagem
             )
         
-        # Executar
-        resultado = service.executar(request)
+        if formato == FORMATO_NDJSON:
+            if modo_analise != MODO_ANALISE_COMPLETO:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="O formato ndjson está disponível apenas no modo de análise completo",
+                )
+            return await _responder_streaming(request)
+
+        # Re-submissão idêntica: devolve o resultado já serializado
+        # (o modo resumo depende do contexto da execução e não é cacheado)
+        cache = CacheResultadoService()
+        chave_cache = None
+        if modo_analise == MODO_ANALISE_COMPLETO:
+            chave_cache = cache.chave_contabil(request)
+            conteudo = cache.obter(chave_cache)
+            if conteudo is not None:
+                logger.info("⚡ Conciliação devolvida do cache")
+                return Response(content=conteudo, media_type="application/json")
+
+        # Executar no pool de conciliações (fora do event loop); o contexto do
+        # modo resumo é gravado pelo worker e só o execucao_id volta para cá
+        resultado = await executor_conciliacao.executar(
+            processar_conciliacao_contabil, request, modo_analise
+        )
         
         logger.info("✅ Conciliação processada com sucesso")
         logger.info(f"📊 Resultado: {resultado.get('resumo', {})}")
+
+        if chave_cache is not None:
+            return Response(content=cache.guardar(chave_cache, resultado), media_type="application/json")
         
-        # Retornar como dict direto (FastAPI converte para JSON)
-        return resultado
+        return RespostaJSON(resultado)
         
     except HTTPException:
         raise
+
+    except ExecutorSaturadoError as e:
+        logger.warning(f"⏳ Conciliação recusada: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"{str(e)}. Tente novamente em instantes.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
         
     except Exception as e:
         logger.error(f"❌ Erro ao processar conciliação: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao processar conciliação: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+async def _responder_streaming(request: RequestConciliacao) -> StreamingResponse:
+    """
+    Executa a conciliação no pool gravando NDJSON em um arquivo temporário e
+    repassa as linhas ao cliente à medida que são gravadas.
+
+    Falhas antes da primeira linha viram erro HTTP normal; depois disso o
+    stream termina com uma linha {"secao": "erro"}.
+    """
+    descritor, caminho = tempfile.mkstemp(prefix="conciliacao_", suffix=".ndjson")
+    os.close(descritor)
+    try:
+        futuro = executor_conciliacao.submeter(transmitir_conciliacao, request, caminho)
+        await _aguardar_inicio(caminho, futuro)
+        if futuro.done() and os.path.getsize(caminho) == 0:
+            futuro.result()  # propaga a falha do worker
+    except BaseException:
+        os.remove(caminho)
+        raise
+
+    logger.info("📤 Transmitindo conciliação em NDJSON")
+    return StreamingResponse(
+        _transmitir_arquivo(caminho, futuro), media_type="application/x-ndjson"
+    )
+
+
+@router.post("/contabil/arquivos")
+async def processar_conciliacao_arquivos(
+    arquivo_origem: UploadFile = File(..., description="Planilha do financeiro (.xlsx/.csv/.parquet/.arrow)"),
+    arquivo_contabil_filtrado: UploadFile = File(..., description="Planilha contábil filtrada (.xlsx/.csv/.parquet/.arrow)"),
+    arquivo_contabil_geral: UploadFile = File(..., description="Planilha contábil geral - razão (.xlsx/.csv/.parquet/.arrow)"),
+    conta_contabil: str = Form(..., description="Conta contábil conciliada"),
+    data_base: str = Form(..., description="Data-base (DD/MM/YYYY)"),
+    tipo: str = Form("contas_receber", description="contas_receber ou contas_pagar"),
+    modo_analise: str = Query(
+        MODO_ANALISE_COMPLETO,
+        pattern=f"^({MODO_ANALISE_COMPLETO}|{MODO_ANALISE_RESUMO})$",
+        description="resumo: apenas cabeçalhos da análise detalhada + execucao_id "
+        "para detalhar cada código sob demanda",
+    ),
+):
+    """
+    Processa uma conciliação contábil a partir das planilhas originais.
+
+    As planilhas são lidas e normalizadas no servidor (mesmo relatório de
+    POST /conciliacoes/contabil); extrações do ERP em Parquet ou Arrow IPC
+    são aceitas e carregadas sem parsing. Os arquivos ficam guardados: o
+    ``upload_id`` do retorno pode ser enviado na efetivação no lugar dos
+    arquivos.
+    """
+    try:
+        upload_service = UploadPlanilhaService()
+        arquivos = {
+            ARQUIVO_ORIGEM: await upload_service.ler(arquivo_origem),
+            ARQUIVO_CONTABIL_FILTRADO: await upload_service.ler(arquivo_contabil_filtrado),
+            ARQUIVO_CONTABIL_GERAL: await upload_service.ler(arquivo_contabil_geral),
+        }
+        logger.info("📥 Recebendo planilhas de conciliação: %s", [nome for nome, _ in arquivos.values()])
+        # Gravação (e limpeza dos uploads expirados) fora do event loop
+        upload_id = await run_in_threadpool(upload_service.guardar, arquivos)
+
+        try:
+            resultado = await executor_conciliacao.executar(
+                processar_conciliacao_planilhas, upload_id, conta_contabil, data_base, tipo, modo_analise
+            )
+        except Exception:
+            # Sem resultado o upload_id não chega ao cliente (ex.: 503 com o pool saturado)
+            await run_in_threadpool(upload_service.descartar, upload_id)
+            raise
+        resultado["upload_id"] = upload_id
+
+        logger.info("✅ Conciliação (planilhas) processada com sucesso")
+        return RespostaJSON(resultado)
+
+    except ExecutorSaturadoError as e:
+        logger.warning(f"⏳ Conciliação recusada: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"{str(e)}. Tente novamente em instantes.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+    except ValueError as e:
+        logger.error(f"❌ Planilhas inválidas: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    except Exception as e:
+        logger.error(f"❌ Erro ao processar conciliação: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao processar conciliação: {str(e)}"
+        )
+
+
+@router.get("/contabil/execucoes/{execucao_id}/codigos/{codigo}")
+def detalhar_codigo_conciliacao(execucao_id: str, codigo: str):
+    """
+    Detalha um código de uma conciliação processada no modo resumo.
+
+    Retorna a linha completa da análise detalhada (lançamentos do razão e do
+    financeiro, registros de match) e a análise profunda, quando SO_CONTABILIDADE.
+    """
+    service = ConciliacaoService()
+    detalhe = service.detalhar_codigo(execucao_id, codigo)
+    if detalhe is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Execução não encontrada (pode ter expirado) ou código fora da execução",
+        )
+    return RespostaJSON(detalhe)
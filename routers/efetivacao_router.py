@@ -10,6 +10,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 
+from core.serializacao import RespostaJSON
 from db import get_db
 from middleware.auth import get_current_user, CurrentUser
 from schemas.efetivacao_schema import (
@@ -23,6 +24,12 @@ from schemas.efetivacao_schema import (
     StatusConciliacao,
 )
 from services.efetivacao_service import EfetivacaoService
+from services.upload_planilha_service import (
+    ARQUIVO_CONTABIL_FILTRADO,
+    ARQUIVO_CONTABIL_GERAL,
+    ARQUIVO_ORIGEM,
+    UploadPlanilhaService,
+)
 
 router = APIRouter(prefix="/conciliacoes", tags=["Efetivação"])
 logger = logging.getLogger(__name__)
@@ -31,9 +38,13 @@ logger = logging.getLogger(__name__)
 @router.post("/efetivar", response_model=EfetivarConciliacaoResponse, status_code=201)
 async def efetivar_conciliacao(
     dados: str = Form(..., description="JSON com dados da conciliação"),
-    arquivo_origem: UploadFile = File(..., description="Arquivo Excel original de origem"),
-    arquivo_contabil_filtrado: UploadFile = File(..., description="Arquivo Excel contábil filtrado"),
-    arquivo_contabil_geral: UploadFile = File(..., description="Arquivo Excel contábil geral (razão)"),
+    arquivo_origem: Optional[UploadFile] = File(None, description="Arquivo Excel original de origem"),
+    arquivo_contabil_filtrado: Optional[UploadFile] = File(None, description="Arquivo Excel contábil filtrado"),
+    arquivo_contabil_geral: Optional[UploadFile] = File(None, description="Arquivo Excel contábil geral (razão)"),
+    upload_id: Optional[str] = Form(
+        None,
+        description="upload_id de POST /conciliacoes/contabil/arquivos, no lugar dos arquivos",
+    ),
     db: Session = Depends(get_db),
     current_user: CurrentUser = Depends(get_current_user)
 ):
@@ -49,6 +60,9 @@ async def efetivar_conciliacao(
     2. Salva arquivos originais e normalizados em estrutura hierárquica
     3. Cria registros no banco de dados
     4. É irreversível (somente admin pode excluir)
+
+    Os arquivos originais vêm no próprio request ou, se a conciliação foi
+    processada a partir das planilhas, do ``upload_id``.
     """
     logger.info(f"Efetivando conciliação - usuário: {current_user.user_id}")
 
@@ -75,9 +89,31 @@ async def efetivar_conciliacao(
         )
 
     # Ler arquivos
-    arquivo_origem_bytes = await arquivo_origem.read()
-    arquivo_contabil_filtrado_bytes = await arquivo_contabil_filtrado.read()
-    arquivo_contabil_geral_bytes = await arquivo_contabil_geral.read()
+    if upload_id:
+        try:
+            arquivos = UploadPlanilhaService().carregar(upload_id)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    else:
+        if not (arquivo_origem and arquivo_contabil_filtrado and arquivo_contabil_geral):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Envie os três arquivos da conciliação ou o upload_id"
+            )
+        arquivos = {
+            ARQUIVO_ORIGEM: (arquivo_origem.filename or "origem.xlsx", await arquivo_origem.read()),
+            ARQUIVO_CONTABIL_FILTRADO: (
+                arquivo_contabil_filtrado.filename or "contabil_filtrado.xlsx",
+                await arquivo_contabil_filtrado.read(),
+            ),
+            ARQUIVO_CONTABIL_GERAL: (
+                arquivo_contabil_geral.filename or "contabil_geral.xlsx",
+                await arquivo_contabil_geral.read(),
+            ),
+        }
+    nome_origem, arquivo_origem_bytes = arquivos[ARQUIVO_ORIGEM]
+    nome_contabil_filtrado, arquivo_contabil_filtrado_bytes = arquivos[ARQUIVO_CONTABIL_FILTRADO]
+    nome_contabil_geral, arquivo_contabil_geral_bytes = arquivos[ARQUIVO_CONTABIL_GERAL]
 
     service = EfetivacaoService()
     conciliacao = service.efetivar(
@@ -87,9 +123,9 @@ async def efetivar_conciliacao(
         arquivo_origem=arquivo_origem_bytes,
         arquivo_contabil_filtrado=arquivo_contabil_filtrado_bytes,
         arquivo_contabil_geral=arquivo_contabil_geral_bytes,
-        nome_origem=arquivo_origem.filename or "origem.xlsx",
-        nome_contabil_filtrado=arquivo_contabil_filtrado.filename or "contabil_filtrado.xlsx",
-        nome_contabil_geral=arquivo_contabil_geral.filename or "contabil_geral.xlsx"
+        nome_origem=nome_origem,
+        nome_contabil_filtrado=nome_contabil_filtrado,
+        nome_contabil_geral=nome_contabil_geral
     )
 
     return EfetivarConciliacaoResponse(
@@ -190,7 +226,13 @@ async def obter_detalhes_conciliacao(
         )
 
     service = EfetivacaoService()
-    return service.obter_detalhes(db, conciliacao_id, empresa_id)
+    detalhes = service.obter_detalhes(db, conciliacao_id, empresa_id)
+
+    # resultado_json vai direto para o serializador (pode ter dezenas de
+    # milhares de itens); os demais campos seguem a serialização do schema
+    conteudo = detalhes.model_dump(mode="json", exclude={"resultado_json"})
+    conteudo["resultado_json"] = detalhes.resultado_json
+    return RespostaJSON(conteudo)
 
 
 @router.get("/efetivadas/{conciliacao_id}/arquivos", response_model=list[ArquivoDownloadInfo])
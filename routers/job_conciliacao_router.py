@@ -0,0 +1,132 @@
+"""
+Router para os jobs assíncronos de conciliação.
+
+Endpoints:
+- POST /conciliacoes/jobs/contabil - Submete conciliação contábil
+- POST /conciliacoes/jobs/bancaria - Submete conciliação bancária
+- GET /conciliacoes/jobs/{job_id} - Status e progresso do job
+- GET /conciliacoes/jobs/{job_id}/resultado - Relatório do job concluído
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+import logging
+
+from core.executor import ExecutorSaturadoError
+from db import get_db
+from middleware.auth import get_optional_current_user, CurrentUser
+from models import StatusJob
+from schemas.conciliacao_bancaria_schema import RequestConciliacaoBancaria
+from schemas.conciliacao_schema import RequestConciliacao
+from schemas.job_conciliacao_schema import JobConciliacaoResponse
+from services.conciliacao_bancaria_service import ConciliacaoBancariaService
+from services.conciliacao_service import ConciliacaoService
+from services.job_conciliacao_service import (
+    JobConciliacaoService,
+    TIPO_JOB_BANCARIA,
+    TIPO_JOB_CONTABIL,
+)
+
+router = APIRouter(prefix="/conciliacoes/jobs", tags=["Jobs de Conciliação"])
+logger = logging.getLogger(__name__)
+
+
+def _submeter(db: Session, tipo: str, request, current_user: Optional[CurrentUser]):
+    try:
+        return JobConciliacaoService().submeter(
+            db, tipo, request, usuario_id=current_user.user_id if current_user else None
+        )
+    except ExecutorSaturadoError as e:
+        logger.warning(f"⏳ Job de conciliação recusado: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"{str(e)}. Tente novamente em instantes.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+@router.post(
+    "/contabil",
+    response_model=JobConciliacaoResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def submeter_conciliacao_contabil(
+    request: RequestConciliacao,
+    db: Session = Depends(get_db),
+    current_user: Optional[CurrentUser] = Depends(get_optional_current_user),
+):
+    """
+    Submete uma conciliação contábil para processamento assíncrono.
+
+    Retorna o job; acompanhe por GET /conciliacoes/jobs/{job_id}.
+    """
+    valido, mensagem = ConciliacaoService().validar_dados(request)
+    if not valido:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=mensagem)
+
+    return _submeter(db, TIPO_JOB_CONTABIL, request, current_user)
+
+
+@router.post(
+    "/bancaria",
+    response_model=JobConciliacaoResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def submeter_conciliacao_bancaria(
+    request: RequestConciliacaoBancaria,
+    db: Session = Depends(get_db),
+    current_user: Optional[CurrentUser] = Depends(get_optional_current_user),
+):
+    """
+    Submete uma conciliação bancária para processamento assíncrono.
+
+    Retorna o job; acompanhe por GET /conciliacoes/jobs/{job_id}.
+    """
+    valido, mensagem = ConciliacaoBancariaService().validar_dados(request)
+    if not valido:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=mensagem)
+
+    return _submeter(db, TIPO_JOB_BANCARIA, request, current_user)
+
+
+@router.get("/{job_id}", response_model=JobConciliacaoResponse)
+def obter_job(job_id: str, db: Session = Depends(get_db)):
+    """Status e progresso de um job de conciliação."""
+    job = JobConciliacaoService().obter(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job não encontrado")
+    return job
+
+
+@router.get("/{job_id}/resultado")
+def obter_resultado_job(job_id: str, db: Session = Depends(get_db)):
+    """
+    Relatório de um job concluído (mesmo formato de POST /conciliacoes/contabil
+    ou /conciliacoes/bancaria).
+
+    Retorna 409 enquanto o job não terminou ou se ele falhou.
+    """
+    service = JobConciliacaoService()
+    job = service.obter(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job não encontrado")
+
+    if job.status == StatusJob.FALHOU:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job falhou: {job.mensagem_erro}",
+        )
+    if job.status != StatusJob.CONCLUIDO:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job ainda não concluído (status {job.status}, {job.progresso}%)",
+        )
+
+    if not job.caminho_resultado or not service.file_storage.file_exists(job.caminho_resultado):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Resultado do job não encontrado no armazenamento",
+        )
+    return FileResponse(job.caminho_resultado, media_type="application/json")
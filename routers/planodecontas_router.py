@@ -3,8 +3,6 @@ from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
 from db import get_db
-import pandas as pd
-import io
 
 from services.planodecontas_services import (
     listar_planos_de_contas,
@@ -16,6 +14,7 @@ from services.planodecontas_services import (
     importar_plano_contas
 )
 from schemas.planodecontas_schema import PlanoDeContasResponse, PlanoDeContasCreate, PlanoDeContasUpdate
+from tools.planilhas import ler_excel
 
 router = APIRouter(prefix="/plano-contas", tags=["Plano de Contas"])
 
@@ -58,7 +57,7 @@ def route_deletar_conta(id: int, db: Session = Depends(get_db)):
 def route_importar_plano(file: UploadFile = File(...), empresa_id: int = Form(...), db: Session = Depends(get_db)):
     try:
         contents = file.file.read()
-        df = pd.read_excel(io.BytesIO(contents), dtype=str)
+        df = ler_excel(contents, dtype=str)
         df_sinteticas, df_analiticas = preparar_dados_importacao(df)
         resultado = importar_plano_contas(df_sinteticas, df_analiticas, empresa_id, db)
         return resultado
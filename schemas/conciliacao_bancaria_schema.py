@@ -7,19 +7,19 @@ Define estruturas de entrada e saida para o endpoint de conciliacao bancaria.
 from typing import List, Dict, Optional, Any
 from pydantic import BaseModel, Field
 
+from schemas.registros_schema import BaseRegistros
+
 
 # =======================
 # ENTRADA
 # =======================
 
-class BaseExtratoBancario(BaseModel):
+class BaseExtratoBancario(BaseRegistros):
     """Base financeira - FINR470 (extrato bancario)."""
-    registros: List[Dict[str, Any]]
 
 
-class BaseRazaoBanco(BaseModel):
+class BaseRazaoBanco(BaseRegistros):
     """Base contabil - CTBR400 (razao contabil do banco)."""
-    registros: List[Dict[str, Any]]
     conta_contabil: str
 
 
@@ -1,22 +1,22 @@
 ﻿from typing import List, Dict, Optional, Any
 from pydantic import BaseModel, Field
 
+from schemas.registros_schema import BaseRegistros
+
 # =======================
 # ENTRADA
 # =======================
 
-class BaseOrigem(BaseModel):
-    registros: List[Dict[str, Any]]
+class BaseOrigem(BaseRegistros):
     tipo: Optional[str] = None  # "contas_receber" ou "contas_pagar"
 
 
-class BaseContabilFiltrada(BaseModel):
-    registros: List[Dict[str, Any]]
+class BaseContabilFiltrada(BaseRegistros):
     conta_contabil: str
 
 
-class BaseContabilGeral(BaseModel):
-    registros: List[Dict[str, Any]]
+class BaseContabilGeral(BaseRegistros):
+    pass
 
 
 class RequestConciliacao(BaseModel):
@@ -124,3 +124,4 @@ class RelatorioConsolidacao(BaseModel):
     analise_profunda_contabil: List[AnaliseContabilProfunda] = []
     observacoes: List[str] = []
     alertas: List[str] = []
+    execucao_id: Optional[str] = None  # apenas no modo resumo
@@ -26,10 +26,11 @@ class EfetivarConciliacaoRequest(BaseModel):
     periodo: str  # "YYYY-MM"
     tipo_conciliacao: str = "receber"  # receber, pagar
 
-    # Dados já processados (normalizados)
-    base_origem: Dict[str, Any]  # { registros: [...] }
-    base_contabil_filtrada: Dict[str, Any]  # { conta_contabil, registros: [...] }
-    base_contabil_geral: Dict[str, Any]  # { registros: [...] }
+    # Dados já processados (normalizados); sem registros quando as planilhas
+    # foram enviadas por upload (upload_id), e são lidas dos arquivos
+    base_origem: Dict[str, Any] = Field(default_factory=dict)  # { registros: [...] }
+    base_contabil_filtrada: Dict[str, Any] = Field(default_factory=dict)  # { conta_contabil, registros: [...] }
+    base_contabil_geral: Dict[str, Any] = Field(default_factory=dict)  # { registros: [...] }
     resultado: Dict[str, Any]  # resultado completo do processamento
 
 
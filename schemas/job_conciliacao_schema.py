@@ -0,0 +1,18 @@
+from pydantic import BaseModel, ConfigDict
+from typing import Optional
+from datetime import datetime
+
+
+class JobConciliacaoResponse(BaseModel):
+    """Status de um job assíncrono de conciliação."""
+    id: str
+    tipo: str  # contabil, bancaria
+    status: str  # PENDENTE, EM_EXECUCAO, CONCLUIDO, FALHOU
+    progresso: int  # 0-100
+    etapa: Optional[str] = None
+    mensagem_erro: Optional[str] = None
+    created_at: datetime
+    iniciado_em: Optional[datetime] = None
+    concluido_em: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,147 @@
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import pandas as pd
+from pydantic import BaseModel, PrivateAttr, model_validator
+
+
+class BaseRegistros(BaseModel):
+    """
+    Registros de uma base enviada para conciliação, em um dos formatos:
+
+    - ``registros``: lista de objetos, um por linha (formato original);
+    - ``colunas`` + ``linhas``: nomes das colunas e as linhas como listas de
+      valores, na ordem das colunas;
+    - ``por_coluna``: objeto coluna -> lista de valores.
+
+    Nos formatos colunares os nomes das colunas não se repetem em cada linha
+    e as linhas não são validadas uma a uma: viram DataFrame direto
+    (``para_dataframe``).
+
+    Bases lidas de arquivos no servidor (planilhas, Parquet, Arrow) são
+    montadas com ``de_dataframe`` e usam o DataFrame lido, sem conversão, ou
+    com ``de_lotes``, lidas em lotes só quando usadas (ver ``iterar_lotes``).
+    """
+    registros: Optional[List[Dict[str, Any]]] = None
+    colunas: Optional[List[str]] = None
+    linhas: Optional[list] = None
+    por_coluna: Optional[Dict[str, list]] = None
+
+    _dataframe: Optional[pd.DataFrame] = PrivateAttr(default=None)
+    _hash_arquivo: Optional[str] = PrivateAttr(default=None)
+    _lotes: Optional[Callable[[], Iterator[pd.DataFrame]]] = PrivateAttr(default=None)
+
+    @classmethod
+    def de_dataframe(cls, df: pd.DataFrame, hash_arquivo: str, **campos: Any):
+        """
+        Base a partir de um DataFrame já carregado (sem validação por linha).
+
+        ``hash_arquivo`` (ex.: SHA-256 do arquivo lido) substitui os registros
+        no hash do conteúdo da base (ver ``conteudo``).
+        """
+        base = cls.model_construct(**campos)
+        base._dataframe = df
+        base._hash_arquivo = hash_arquivo
+        return base
+
+    @classmethod
+    def de_lotes(
+        cls, lotes: Callable[[], Iterator[pd.DataFrame]], hash_arquivo: str, **campos: Any
+    ):
+        """
+        Base lida em lotes: ``lotes()`` devolve um novo iterador de DataFrames
+        a cada leitura (ex.: ``tools.planilhas.iterar_planilha`` sobre o arquivo).
+
+        Nada é lido ao montar a base; quem usa pode filtrar cada lote sem ter a
+        base inteira em memória. ``hash_arquivo`` tem o mesmo papel de ``de_dataframe``.
+        """
+        base = cls.model_construct(**campos)
+        base._lotes = lotes
+        base._hash_arquivo = hash_arquivo
+        return base
+
+    @model_validator(mode="after")
+    def validar_formato(self):
+        if self._dataframe is not None or self._lotes is not None:
+            return self
+        formatos = [
+            nome for nome, valor in (
+                ("registros", self.registros),
+                ("linhas", self.linhas),
+                ("por_coluna", self.por_coluna),
+            )
+            if valor is not None
+        ]
+        if len(formatos) != 1:
+            raise ValueError("Informe exatamente um formato: registros, colunas + linhas ou por_coluna")
+
+        if self.linhas is not None:
+            if self.colunas is None:
+                raise ValueError("linhas exige colunas")
+            total_colunas = len(self.colunas)
+            if any(
+                not isinstance(linha, list) or len(linha) != total_colunas
+                for linha in self.linhas
+            ):
+                raise ValueError(f"Cada linha deve ser uma lista com {total_colunas} valores (colunas)")
+        elif self.colunas is not None:
+            raise ValueError("colunas só é usado junto com linhas")
+
+        if self.por_coluna is not None and len({len(v) for v in self.por_coluna.values()}) > 1:
+            raise ValueError("Todas as colunas de por_coluna devem ter o mesmo número de valores")
+        return self
+
+    @property
+    def em_lotes(self) -> bool:
+        """Base montada com ``de_lotes``."""
+        return self._lotes is not None
+
+    @property
+    def quantidade(self) -> Optional[int]:
+        """Número de registros (linhas) da base; None na base em lotes (só se sabe lendo)."""
+        if self._lotes is not None:
+            return None
+        if self._dataframe is not None:
+            return len(self._dataframe)
+        if self.registros is not None:
+            return len(self.registros)
+        if self.linhas is not None:
+            return len(self.linhas)
+        return len(next(iter(self.por_coluna.values()), []))
+
+    @property
+    def vazia(self) -> bool:
+        """Base sem registros; na base em lotes, lê só até o primeiro lote com linhas."""
+        if self._lotes is not None:
+            return not any(len(lote) for lote in self._lotes())
+        return not self.quantidade
+
+    @property
+    def conteudo(self) -> Any:
+        """Registros no formato recebido (usado no hash do conteúdo da base)."""
+        if self._hash_arquivo is not None:
+            return {"arquivo": self._hash_arquivo}
+        if self.registros is not None:
+            return self.registros
+        if self.linhas is not None:
+            return {"colunas": self.colunas, "linhas": self.linhas}
+        return {"por_coluna": self.por_coluna}
+
+    def iterar_lotes(self) -> Iterator[pd.DataFrame]:
+        """Registros em lotes de DataFrame; fora da base em lotes, um único lote."""
+        if self._lotes is not None:
+            yield from self._lotes()
+        else:
+            yield self.para_dataframe()
+
+    def para_dataframe(self) -> pd.DataFrame:
+        """DataFrame com os registros, qualquer que seja o formato recebido."""
+        if self._lotes is not None:
+            lotes = list(self._lotes())
+            return pd.concat(lotes) if lotes else pd.DataFrame()
+        if self._dataframe is not None:
+            return self._dataframe
+        if self.registros is not None:
+            return pd.DataFrame(self.registros)
+        if self.linhas is not None:
+            return pd.DataFrame(self.linhas, columns=self.colunas)
+        return pd.DataFrame(self.por_coluna)
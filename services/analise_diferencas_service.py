@@ -1,12 +1,211 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Iterable, Iterator
 from datetime import datetime, date
+import hashlib
 import logging
+import multiprocessing
+import os
 import re
+import threading
+import zlib
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 
+import numpy as np
 import pandas as pd
 
+from core.config import settings
+from tools.compactacao import categorizar, texto_compacto
+from tools.datas import formatar_datas
+from tools.layouts import LAYOUT_RAZAO_GERAL, resolver_layout
+from tools.numeros import converter_numeros
+from tools.soma_subconjunto import encontrar_subconjunto
+from tools.valores_centavos import MulticonjuntoCentavos, para_centavos
+
 logger = logging.getLogger(__name__)
 
+# Colunas candidatas do razão geral (CTBR400) por coluna lógica, em ordem de prioridade.
+# Relatório: DATA | LOTE/SUB/DOC/LINHA | HISTORICO | XPARTIDA | CCUSTO | ITEMCONTA | CODCLVAL | DEBITO | CREDITO | SALDO ATUAL
+COLUNAS_RAZAO_GERAL: Dict[str, List[str]] = {
+    "codigo": [
+        "CODCLVAL",
+        "codclval",
+        "cod_cl_val",
+        "COD CL VAL",
+        "codigo",
+        "Codigo",
+        "CODIGO",
+        "cod_cliente",
+        "cliente_codigo",
+        "codigo_cliente",
+        "Código",
+    ],
+    "itemconta": [
+        "ITEMCONTA",
+        "itemconta",
+        "item_conta",
+        "ITEM CONTA",
+        "conta_contabil",
+        "Conta Contabil",
+        "Conta Contábil",
+        "conta",
+        "Conta",
+        "CONTA",
+        "conta_contabil_debito",
+        "conta_debito",
+        "ContaContabil",
+    ],
+    "contra_partida": [
+        "XPARTIDA",
+        "xpartida",
+        "x_partida",
+        "X PARTIDA",
+        "contra_partida",
+        "contrapartida",
+        "conta_credito",
+    ],
+    "debito": ["DEBITO", "debito", "Debito", "DÉBITO", "débito", "vlr_debito"],
+    "credito": ["CREDITO", "credito", "Credito", "CRÉDITO", "crédito", "vlr_credito"],
+    "valor": [
+        "SALDO ATUAL",
+        "saldo_atual",
+        "SALDO_ATUAL",
+        "saldo atual",
+        "valor",
+        "Valor",
+        "VALOR",
+        "saldo",
+        "Saldo",
+    ],
+    "data": [
+        "DATA",
+        "data",
+        "Data",
+        "data_lancamento",
+        "dt_lancamento",
+        "data_movimento",
+        "dt_movimento",
+    ],
+    "documento": [
+        "LOTE/SUB/DOC/LINHA",
+        "lote_sub_doc_linha",
+        "LOTE SUB DOC LINHA",
+        "documento",
+        "Documento",
+        "DOCUMENTO",
+        "doc",
+        "num_documento",
+        "nr_documento",
+        "numero_documento",
+    ],
+    "historico": [
+        "HISTORICO",
+        "historico",
+        "Historico",
+        "descricao",
+        "Descricao",
+        "hist_lancamento",
+        "observacao",
+    ],
+    "centro_custo": ["CCUSTO", "ccusto", "c_custo", "C CUSTO", "centro_custo"],
+}
+
+
+@dataclass
+class RazaoProfundo:
+    """Razão geral preparado para a análise profunda (ver ``_preparar_razao_profundo``)."""
+    df_origens: pd.DataFrame
+    tabela_busca: Dict[tuple[str, str], np.ndarray]
+    col_conta: Optional[str]
+    col_codigo: Optional[str]
+
+
+@dataclass
+class ContextoAnalise:
+    """
+    Bases de uma execução indexadas pela chave do código (código normalizado).
+
+    Permite gerar a análise completa de um único código sob demanda, sem
+    varrer as bases inteiras (ver ``analisar_codigo``).
+    """
+    conta_contabil: str
+    bases: Dict[str, Optional[pd.DataFrame]]
+    indices: Dict[str, Optional[Dict[str, np.ndarray]]]
+    razao_geral_disponivel: bool
+    df_razao_geral: Optional[pd.DataFrame]
+    razao_profundo: Optional[RazaoProfundo] = None
+
+
+@dataclass
+class EstadoAnalise:
+    """
+    Análise detalhada completa de uma execução, por chave do código, para a
+    re-execução incremental (ver ``processar_analise_incremental``).
+
+    Vale enquanto contabilidade, razão e conta contábil forem os mesmos; só os
+    códigos cujo financeiro mudou precisam ser recalculados. ``impressoes``
+    identifica os DataFrames dessas bases (ver ``_impressao_base``): o estado
+    só é reaproveitado com as mesmas bases.
+    """
+    hashes_financeiro: Dict[str, str]
+    analises: Dict[str, List[Dict[str, Any]]]
+    impressoes: Dict[str, Optional[str]] = field(default_factory=dict)
+    indices: Dict[str, Optional[Dict[str, np.ndarray]]] = field(default_factory=dict)
+    analise_profunda: Dict[str, Dict[str, Any]] = field(default_factory=dict)  # por código
+    razao_profundo: Optional[RazaoProfundo] = None
+
+
+def _ordenar_analises(analises: List[Dict[str, Any]]) -> None:
+    """Divergentes primeiro, das menores para as maiores diferenças."""
+    analises.sort(key=lambda x: (x["status"] == "verde", abs(x["diferenca"])))
+
+
+# Serializa a preparação do razão da análise profunda de um contexto sob demanda
+_razao_profundo_lock = threading.Lock()
+
+# Pool de processos da análise detalhada em paralelo (criado sob demanda e
+# reaproveitado entre execuções para não pagar a inicialização dos workers).
+_pool_analise: Optional[ProcessPoolExecutor] = None
+_pool_analise_lock = threading.Lock()
+
+
+def _workers_analise() -> int:
+    """
+    Workers configurados para a análise em paralelo.
+
+    0 divide os núcleos da máquina entre os workers de conciliação, já que cada
+    um deles mantém o seu próprio pool de análise (pools aninhados).
+    """
+    workers = settings.ANALYSIS_PARALLEL_WORKERS
+    if workers <= 0:
+        workers = (os.cpu_count() or 1) // max(1, settings.RECONCILIATION_WORKERS)
+    return max(1, workers)
+
+
+def _obter_pool_analise(workers: int) -> ProcessPoolExecutor:
+    global _pool_analise
+    with _pool_analise_lock:
+        if _pool_analise is None:
+            # spawn: o processo da API tem threads; fork herdaria locks em estado inválido
+            _pool_analise = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool_analise
+
+
+def _descartar_pool_analise() -> None:
+    global _pool_analise
+    with _pool_analise_lock:
+        if _pool_analise is not None:
+            _pool_analise.shutdown(wait=False, cancel_futures=True)
+            _pool_analise = None
+
+
+def _analisar_particao(argumentos: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Ponto de entrada do worker: analisa os códigos de uma partição."""
+    return AnaliseDiferencasService()._analisar_codigos(**argumentos)
+
 
 class AnaliseDiferencasService:
     """Gera análise detalhada por código (financeiro/contábil)."""
@@ -25,6 +224,62 @@ class AnaliseDiferencasService:
     def _status(self, diferenca: float) -> str:
         return "verde" if abs(diferenca) <= 0.01 else "vermelho"
 
+    def _cabecalho_analise(
+        self,
+        row: Dict[str, Any],
+        conta_contabil: str,
+        lancamentos_razao_geral: Optional[Dict[str, int]],
+    ) -> Dict[str, Any]:
+        """
+        Linha da análise de um código sem os lançamentos (listas de detalhe vazias).
+
+        ``lancamentos_razao_geral`` conta os lançamentos do razão geral por
+        ITEMCONTA normalizado; None quando o razão geral não participa da análise.
+        """
+        codigo = str(row.get("codigo", "")).strip()
+        valor_fin = float(row.get("valor_financeiro", 0.0))
+        valor_cont = float(row.get("valor_contabilidade", 0.0))
+        diferenca = float(row.get("diferenca", 0.0))
+        tipo = self._classificar_tipo(valor_fin, valor_cont, diferenca)
+
+        # A coluna exibida como "Fornecedor" no frontend deve mostrar o código.
+        nome_exibicao = codigo or str(row.get("nome") or "").strip()
+
+        lancamentos_razao = int(row.get("lancamentos_razao", 0))
+        sem_lancamentos_razao = False
+        nota_razao = ""
+        if lancamentos_razao_geral is not None:
+            matches_razao_count = int(
+                lancamentos_razao_geral.get(self._normalizar_codigo_numerico(codigo), 0)
+            )
+            if (
+                matches_razao_count == 0
+                and abs(diferenca) > 0.01
+                and tipo == "SO_CONTABILIDADE"
+            ):
+                sem_lancamentos_razao = True
+                nota_razao = "Sem lançamentos no período."
+            if tipo == "SO_CONTABILIDADE":
+                lancamentos_razao = matches_razao_count
+
+        return {
+            "codigo": codigo,
+            "nome": nome_exibicao,
+            "conta_contabil": conta_contabil,
+            "valor_financeiro": round(valor_fin, 2),
+            "valor_contabilidade": round(valor_cont, 2),
+            "diferenca": round(diferenca, 2),
+            "tipo_diferenca": tipo,
+            "status": self._status(diferenca),
+            "lancamentos_razao": lancamentos_razao,
+            "lancamentos_razao_detalhes": [],
+            "lancamentos_financeiro_detalhes": [],
+            "registros_match_financeiro": [],
+            "registros_match_contabilidade": [],
+            "sem_lancamentos_razao": sem_lancamentos_razao,
+            "nota_razao": nota_razao,
+        }
+
     def processar_analise_detalhada(
         self,
         df_financeiro: pd.DataFrame,
@@ -36,13 +291,59 @@ class AnaliseDiferencasService:
     ) -> List[Dict[str, Any]]:
         """
         Consolida valores por código e gera uma análise detalhada financeira.
+
+        A análise de cada código é independente das demais. Com mais de um
+        worker configurado (``ANALYSIS_PARALLEL_WORKERS``) e volume a partir de
+        ``ANALYSIS_PARALLEL_MIN_ROWS`` linhas, os códigos são particionados por
+        hash e analisados em um pool de processos.
         """
         logger.info("[ANALISE DETALHADA] Iniciando processamento")
 
-        df_fin = df_financeiro[["codigo", "cliente", "valor"]].copy()
-        df_cont = df_contabilidade_filtrada[["codigo", "cliente", "valor"]].copy()
-        df_razao = df_razao_contabil.copy()
+        analises = None
+        workers = _workers_analise()
+        total_linhas = sum(
+            len(df)
+            for df in (
+                df_financeiro,
+                df_contabilidade_filtrada,
+                df_razao_contabil,
+                df_financeiro_detalhado,
+                df_razao_geral,
+            )
+            if df is not None
+        )
+        if workers > 1 and total_linhas >= settings.ANALYSIS_PARALLEL_MIN_ROWS:
+            analises = self._analisar_em_paralelo(
+                df_financeiro,
+                df_contabilidade_filtrada,
+                df_razao_contabil,
+                conta_contabil,
+                df_financeiro_detalhado,
+                df_razao_geral,
+                workers,
+            )
+        if analises is None:
+            analises = self._analisar_codigos(
+                df_financeiro,
+                df_contabilidade_filtrada,
+                df_razao_contabil,
+                conta_contabil,
+                df_financeiro_detalhado,
+                df_razao_geral,
+            )
+
+        _ordenar_analises(analises)
+
+        logger.info(f"[ANALISE DETALHADA] Total de analises geradas: {len(analises)}")
+        return analises
 
+    def _consolidar_por_codigo(
+        self,
+        df_fin: pd.DataFrame,
+        df_cont: pd.DataFrame,
+        df_razao: pd.DataFrame,
+    ) -> pd.DataFrame:
+        """Valores e nomes por código das duas bases, na ordem da análise."""
         fin_agg = df_fin.groupby("codigo", as_index=False).agg(
             nome_fin=("cliente", "first"),
             valor_financeiro=("valor", "sum"),
@@ -52,19 +353,6 @@ class AnaliseDiferencasService:
             valor_contabilidade=("valor", "sum"),
         )
 
-        # Criar mapa de código -> nome do cliente para uso em todos os lançamentos
-        codigo_nome_map: Dict[str, str] = {}
-        for _, row in df_fin.iterrows():
-            cod = str(row.get("codigo", "")).strip()
-            nome = str(row.get("cliente", "")).strip()
-            if cod and nome and nome != cod:
-                codigo_nome_map[cod] = nome
-        for _, row in df_cont.iterrows():
-            cod = str(row.get("codigo", "")).strip()
-            nome = str(row.get("cliente", "")).strip()
-            if cod and nome and nome != cod and cod not in codigo_nome_map:
-                codigo_nome_map[cod] = nome
-
         if not df_razao.empty and "codigo" in df_razao.columns:
             razao_agg = df_razao.groupby("codigo", as_index=False).agg(
                 lancamentos_razao=("codigo", "count"),
@@ -72,104 +360,6 @@ class AnaliseDiferencasService:
         else:
             razao_agg = pd.DataFrame(columns=["codigo", "lancamentos_razao"])
 
-        # Mapa de lancamentos no razao geral por ITEMCONTA (para SO_CONTABILIDADE)
-        lancamentos_razao_geral: Dict[str, int] = {}
-        df_razao_geral_norm = None
-        col_itemconta_geral = None
-        col_data_geral = None
-        col_documento_geral = None
-        col_historico_geral = None
-        col_debito_geral = None
-        col_credito_geral = None
-        if df_razao_geral is not None and not df_razao_geral.empty:
-            col_itemconta_geral = self._encontrar_coluna(
-                df_razao_geral,
-                [
-                    "ITEMCONTA",
-                    "itemconta",
-                    "item_conta",
-                    "ITEM CONTA",
-                    "conta_contabil",
-                    "Conta Contabil",
-                    "conta",
-                    "Conta",
-                    "CONTA",
-                    "conta_contabil_debito",
-                    "conta_debito",
-                    "ContaContabil",
-                ],
-            )
-            if col_itemconta_geral:
-                df_razao_geral_norm = df_razao_geral.copy()
-                df_razao_geral_norm["itemconta_normalizado"] = df_razao_geral_norm[col_itemconta_geral].apply(
-                    self._normalizar_codigo_numerico
-                )
-                lancamentos_razao_geral = (
-                    df_razao_geral_norm.groupby("itemconta_normalizado").size().to_dict()
-                )
-
-                col_data_geral = self._encontrar_coluna(
-                    df_razao_geral_norm,
-                    [
-                        "DATA",
-                        "data",
-                        "Data",
-                        "data_lancamento",
-                        "dt_lancamento",
-                        "data_movimento",
-                        "dt_movimento",
-                    ],
-                )
-                col_documento_geral = self._encontrar_coluna(
-                    df_razao_geral_norm,
-                    [
-                        "LOTE/SUB/DOC/LINHA",
-                        "lote_sub_doc_linha",
-                        "LOTE SUB DOC LINHA",
-                        "documento",
-                        "Documento",
-                        "DOCUMENTO",
-                        "doc",
-                        "num_documento",
-                        "nr_documento",
-                        "numero_documento",
-                    ],
-                )
-                col_historico_geral = self._encontrar_coluna(
-                    df_razao_geral_norm,
-                    [
-                        "HISTORICO",
-                        "historico",
-                        "Historico",
-                        "descricao",
-                        "Descricao",
-                        "hist_lancamento",
-                        "observacao",
-                    ],
-                )
-                col_debito_geral = self._encontrar_coluna(
-                    df_razao_geral_norm,
-                    [
-                        "DEBITO",
-                        "debito",
-                        "Debito",
-                        "DEBITO",
-                        "debito",
-                        "vlr_debito",
-                    ],
-                )
-                col_credito_geral = self._encontrar_coluna(
-                    df_razao_geral_norm,
-                    [
-                        "CREDITO",
-                        "credito",
-                        "Credito",
-                        "CREDITO",
-                        "credito",
-                        "vlr_credito",
-                    ],
-                )
-
         df_merge = fin_agg.merge(cont_agg, on="codigo", how="outer")
         if not razao_agg.empty:
             df_merge = df_merge.merge(razao_agg, on="codigo", how="left")
@@ -186,151 +376,184 @@ class AnaliseDiferencasService:
         df_merge["diferenca"] = (
             df_merge["valor_contabilidade"] - df_merge["valor_financeiro"]
         )
+        return df_merge
 
-        financeiro_match_map: Dict[tuple[str, str], List[float]] = {}
+    def _analisar_codigos(
+        self,
+        df_financeiro: pd.DataFrame,
+        df_contabilidade_filtrada: pd.DataFrame,
+        df_razao_contabil: pd.DataFrame,
+        conta_contabil: str,
+        df_financeiro_detalhado: Optional[pd.DataFrame] = None,
+        df_razao_geral: Optional[pd.DataFrame] = None,
+        razao_geral_disponivel: Optional[bool] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Gera a análise de cada código, na ordem da consolidação (sem ordenar).
+
+        ``razao_geral_disponivel`` indica se o razão geral completo tem
+        lançamentos; em uma partição, a fatia pode estar vazia sem que o
+        razão da execução esteja.
+        """
+        # Seleção de colunas já é uma cópia; as bases não são alteradas aqui
+        df_fin = df_financeiro[["codigo", "cliente", "valor"]]
+        df_cont = df_contabilidade_filtrada[["codigo", "cliente", "valor"]]
+        df_razao = df_razao_contabil
+
+        # Criar mapa de código -> nome do cliente para uso em todos os lançamentos
+        # (financeiro prevalece; na contabilidade vale o primeiro nome de cada código)
+        codigo_nome_map: Dict[str, str] = dict(self._pares_codigo_nome(df_fin))
+        for cod, nome in self._pares_codigo_nome(df_cont):
+            codigo_nome_map.setdefault(cod, nome)
+
+        # Mapa de lancamentos no razao geral por ITEMCONTA (para SO_CONTABILIDADE)
+        lancamentos_razao_geral: Dict[str, int] = {}
+        indice_razao_geral: Dict[str, np.ndarray] = {}
+        df_razao_geral_norm = None
+        col_itemconta_geral = None
+        col_data_geral = None
+        col_documento_geral = None
+        col_historico_geral = None
+        col_debito_geral = None
+        col_credito_geral = None
+        if razao_geral_disponivel is None:
+            razao_geral_disponivel = df_razao_geral is not None and not df_razao_geral.empty
+        if razao_geral_disponivel and df_razao_geral is not None:
+            colunas_razao_geral = self._resolver_colunas_razao_geral(df_razao_geral)
+            col_itemconta_geral = colunas_razao_geral["itemconta"]
+            if col_itemconta_geral:
+                indice_razao_geral = self._indexar_por_codigo(
+                    self._aplicar_por_valor(
+                        df_razao_geral[col_itemconta_geral], self._normalizar_codigo_numerico
+                    )
+                )
+                lancamentos_razao_geral = {
+                    cod: len(posicoes) for cod, posicoes in indice_razao_geral.items()
+                }
+
+                col_data_geral = colunas_razao_geral["data"]
+                col_documento_geral = colunas_razao_geral["documento"]
+                col_historico_geral = colunas_razao_geral["historico"]
+                col_debito_geral = colunas_razao_geral["debito"]
+                col_credito_geral = colunas_razao_geral["credito"]
+
+                # Débito/crédito convertidos uma única vez para todos os ramos da análise
+                debito_abs = self._converter_valores_razao(
+                    df_razao_geral, col_debito_geral
+                ).abs()
+                credito_abs = self._converter_valores_razao(
+                    df_razao_geral, col_credito_geral
+                ).abs()
+
+                # Só as colunas já formatadas para emissão dos detalhes (sem
+                # copiar o razão geral), em tipos compactos
+                df_razao_geral_norm = pd.DataFrame(
+                    {
+                        "valor_lancamento": debito_abs.where(debito_abs > 0, credito_abs),
+                        "tipo_lancamento": pd.Categorical(
+                            np.select([debito_abs > 0, credito_abs > 0], ["D", "C"], default="")
+                        ),
+                        "valor_credito": credito_abs,
+                        "conta_origem": self._coluna_texto_compacta(
+                            df_razao_geral, col_itemconta_geral, categoria=True
+                        ),
+                        "data_lancamento": categorizar(
+                            self._formatar_datas_coluna(df_razao_geral, col_data_geral)
+                        ),
+                        "documento": self._coluna_texto_compacta(
+                            df_razao_geral, col_documento_geral
+                        ),
+                        "historico": self._coluna_texto_compacta(
+                            df_razao_geral, col_historico_geral
+                        ),
+                    },
+                    index=df_razao_geral.index,
+                )
+
+        df_merge = self._consolidar_por_codigo(df_fin, df_cont, df_razao)
+
+        # Índices código -> posições, construídos uma única vez para evitar
+        # varrer os DataFrames inteiros a cada código analisado.
+        indice_fin_det: Dict[str, np.ndarray] = {}
+        if (
+            df_financeiro_detalhado is not None
+            and not df_financeiro_detalhado.empty
+            and "codigo" in df_financeiro_detalhado.columns
+        ):
+            indice_fin_det = self._indexar_por_codigo(
+                df_financeiro_detalhado["codigo"].astype(str).str.strip()
+            )
+        indice_cont = self._indexar_por_codigo(df_cont["codigo"].astype(str).str.strip())
+        registros_cont = pd.DataFrame(
+            {
+                "descricao": self._coluna_texto(df_cont, "cliente").str.strip(),
+                "valor": pd.to_numeric(df_cont["valor"], errors="coerce")
+                .fillna(0.0)
+                .round(2),
+            }
+        ).to_dict("records")
+
+        # Títulos do financeiro por (código, data) e valor em centavos, consumidos ao casar
+        financeiro_match = MulticonjuntoCentavos()
+        lancamentos_fin_det: List[Dict[str, Any]] = []
+        registros_fin_det: List[Dict[str, Any]] = []
         if df_financeiro_detalhado is not None and not df_financeiro_detalhado.empty:
             if "codigo" in df_financeiro_detalhado.columns:
-                df_fin_match = df_financeiro_detalhado.copy()
-                df_fin_match["codigo"] = df_fin_match["codigo"].astype(str).str.strip()
-                if "data_emissao" in df_fin_match.columns:
-                    df_fin_match["data_match"] = df_fin_match["data_emissao"].apply(
-                        self._formatar_data
-                    )
-                else:
-                    df_fin_match["data_match"] = ""
-                df_fin_match["valor_match"] = (
-                    pd.to_numeric(df_fin_match.get("valor"), errors="coerce")
+                codigos_fin = df_financeiro_detalhado["codigo"].astype(str).str.strip()
+                datas_fin = self._formatar_datas_coluna(
+                    df_financeiro_detalhado, "data_emissao"
+                )
+                valores_fin = (
+                    pd.to_numeric(df_financeiro_detalhado.get("valor"), errors="coerce")
                     .fillna(0.0)
                     .astype(float)
                 )
-                for _, row_fin in df_fin_match.iterrows():
-                    key = (row_fin.get("codigo", ""), row_fin.get("data_match", ""))
-                    financeiro_match_map.setdefault(key, []).append(
-                        float(row_fin.get("valor_match", 0.0))
-                    )
+                for cod_fin, data_fin, valor_fin_match in zip(
+                    codigos_fin.tolist(),
+                    datas_fin.tolist(),
+                    valores_fin.tolist(),
+                ):
+                    financeiro_match.adicionar((cod_fin, data_fin), valor_fin_match)
+
+                # Registros do financeiro detalhado formatados uma única vez;
+                # cada código apenas seleciona suas posições.
+                (
+                    lancamentos_fin_det,
+                    registros_fin_det,
+                ) = self._registros_financeiro_detalhado(
+                    df_financeiro_detalhado, datas_fin
+                )
 
         def _tem_match_financeiro(codigo: str, data_str: str, valor: float) -> bool:
-            key = (codigo, data_str)
-            valores = financeiro_match_map.get(key)
-            if not valores:
-                return False
-            for i, v in enumerate(valores):
-                if abs(v - valor) <= 0.01:
-                    valores.pop(i)
-                    return True
-            return False
+            return financeiro_match.consumir((codigo, data_str), valor)
 
         analises: List[Dict[str, Any]] = []
         for row in df_merge.to_dict("records"):
-            codigo = str(row.get("codigo", "")).strip()
+            analise = self._cabecalho_analise(
+                row,
+                conta_contabil,
+                lancamentos_razao_geral if df_razao_geral_norm is not None else None,
+            )
+            codigo = analise["codigo"]
+            tipo = analise["tipo_diferenca"]
             valor_fin = float(row.get("valor_financeiro", 0.0))
             valor_cont = float(row.get("valor_contabilidade", 0.0))
             diferenca = float(row.get("diferenca", 0.0))
-            tipo = self._classificar_tipo(valor_fin, valor_cont, diferenca)
-            status = self._status(diferenca)
 
-            # A coluna exibida como "Fornecedor" no frontend deve mostrar o código.
-            nome_exibicao = codigo or str(row.get("nome") or "").strip()
-
-            lancamentos_razao = int(row.get("lancamentos_razao", 0))
             lancamentos_razao_detalhes: List[Dict[str, Any]] = []
             lancamentos_financeiro_detalhes: List[Dict[str, Any]] = []
             lancamentos_razao_sem_financeiro: List[Dict[str, Any]] = []
-            registros_match_financeiro: List[Dict[str, Any]] = []
-            registros_match_contabilidade: List[Dict[str, Any]] = []
-            sem_lancamentos_razao = False
-            nota_razao = ""
-
-            matches_razao_count = 0
-            if df_razao_geral_norm is not None and col_itemconta_geral:
-                codigo_normalizado = self._normalizar_codigo_numerico(codigo)
-                matches_razao_count = int(
-                    (df_razao_geral_norm["itemconta_normalizado"] == codigo_normalizado).sum()
-                )
-                if (
-                    matches_razao_count == 0
-                    and abs(diferenca) > 0.01
-                    and tipo == "SO_CONTABILIDADE"
-                ):
-                    sem_lancamentos_razao = True
-                    nota_razao = "Sem lançamentos no período."
-            if tipo == "SO_CONTABILIDADE" and lancamentos_razao_geral:
-                codigo_normalizado = self._normalizar_codigo_numerico(codigo)
-                if df_razao_geral_norm is not None and col_itemconta_geral:
-                    matches_item = df_razao_geral_norm[
-                        df_razao_geral_norm["itemconta_normalizado"]
-                        == codigo_normalizado
-                    ]
-                    for _, r in matches_item.iterrows():
-                        valor_debito = 0.0
-                        valor_credito = 0.0
-                        if col_debito_geral:
-                            try:
-                                val = r.get(col_debito_geral, 0)
-                                if pd.notna(val):
-                                    valor_debito = float(
-                                        str(val).replace(".", "").replace(",", ".")
-                                        or 0
-                                    )
-                            except (ValueError, TypeError):
-                                valor_debito = 0.0
-                        if col_credito_geral:
-                            try:
-                                val = r.get(col_credito_geral, 0)
-                                if pd.notna(val):
-                                    valor_credito = float(
-                                        str(val).replace(".", "").replace(",", ".")
-                                        or 0
-                                    )
-                            except (ValueError, TypeError):
-                                valor_credito = 0.0
-
-                        if abs(valor_debito) > 0:
-                            valor_lancamento = abs(valor_debito)
-                            tipo_lancamento = "D"
-                        elif abs(valor_credito) > 0:
-                            valor_lancamento = abs(valor_credito)
-                            tipo_lancamento = "C"
-                        else:
-                            valor_lancamento = 0.0
-                            tipo_lancamento = ""
-                        item_conta = (
-                            str(r.get(col_itemconta_geral, ""))
-                            if col_itemconta_geral
-                            else ""
-                        )
 
-                        if valor_lancamento <= 0:
-                            continue
-
-                        data_lanc = self._formatar_data(
-                            r.get(col_data_geral, "") if col_data_geral else ""
-                        )
-                        if _tem_match_financeiro(codigo, data_lanc, valor_lancamento):
-                            continue
-
-                        # Obter nome do cliente do mapa
-                        nome_cliente = codigo_nome_map.get(codigo, "")
-
-                        lancamentos_razao_detalhes.append(
-                            {
-                                "conta_origem": item_conta,
-                                "descricao_conta": nome_cliente if nome_cliente else "",
-                                "valor": round(valor_lancamento, 2),
-                                "tipo_lancamento": tipo_lancamento,
-                                "data_lancamento": data_lanc,
-                                "documento": str(r.get(col_documento_geral, ""))
-                                if col_documento_geral
-                                else "",
-                                "historico": str(r.get(col_historico_geral, ""))
-                                if col_historico_geral
-                                else "",
-                                "tipo_movimento": "NAO_IDENTIFICADO",
-                            }
-                        )
-
-                lancamentos_razao = int(
-                    lancamentos_razao_geral.get(codigo_normalizado, 0)
+            codigo_normalizado = self._normalizar_codigo_numerico(codigo)
+            if tipo == "SO_CONTABILIDADE" and df_razao_geral_norm is not None:
+                lancamentos_razao_detalhes = self._emitir_lancamentos_razao(
+                    self._linhas_por_codigo(
+                        df_razao_geral_norm, indice_razao_geral, codigo_normalizado
+                    ),
+                    "valor_lancamento",
+                    codigo,
+                    codigo_nome_map.get(codigo, ""),
+                    _tem_match_financeiro,
                 )
 
                 # Em SO_CONTABILIDADE, listar apenas o que explica a diferenca
@@ -343,201 +566,44 @@ class AnaliseDiferencasService:
                 and df_razao_geral_norm is not None
                 and col_itemconta_geral
             ):
-                codigo_normalizado = self._normalizar_codigo_numerico(codigo)
-                matches_item = df_razao_geral_norm[
-                    df_razao_geral_norm["itemconta_normalizado"] == codigo_normalizado
-                ]
-                for _, r in matches_item.iterrows():
-                    valor_debito = 0.0
-                    valor_credito = 0.0
-                    if col_debito_geral:
-                        try:
-                            val = r.get(col_debito_geral, 0)
-                            if pd.notna(val):
-                                valor_debito = float(
-                                    str(val).replace(".", "").replace(",", ".") or 0
-                                )
-                        except (ValueError, TypeError):
-                            valor_debito = 0.0
-                    if col_credito_geral:
-                        try:
-                            val = r.get(col_credito_geral, 0)
-                            if pd.notna(val):
-                                valor_credito = float(
-                                    str(val).replace(".", "").replace(",", ".") or 0
-                                )
-                        except (ValueError, TypeError):
-                            valor_credito = 0.0
-
-                    if abs(valor_debito) > 0:
-                        valor_lancamento = abs(valor_debito)
-                        tipo_lancamento = "D"
-                    elif abs(valor_credito) > 0:
-                        valor_lancamento = abs(valor_credito)
-                        tipo_lancamento = "C"
-                    else:
-                        valor_lancamento = 0.0
-                        tipo_lancamento = ""
-                    if valor_lancamento <= 0:
-                        continue
-
-                    data_lanc = self._formatar_data(
-                        r.get(col_data_geral, "") if col_data_geral else ""
-                    )
-                    if _tem_match_financeiro(codigo, data_lanc, valor_lancamento):
-                        continue
-
-                    item_conta = (
-                        str(r.get(col_itemconta_geral, ""))
-                        if col_itemconta_geral
-                        else ""
-                    )
-                    # Obter nome do cliente do mapa
-                    nome_cliente = codigo_nome_map.get(codigo, "")
-
-                    lancamentos_razao_sem_financeiro.append(
-                        {
-                            "conta_origem": item_conta,
-                            "descricao_conta": nome_cliente if nome_cliente else "",
-                            "valor": round(valor_lancamento, 2),
-                            "tipo_lancamento": tipo_lancamento,
-                            "data_lancamento": data_lanc,
-                            "documento": str(r.get(col_documento_geral, ""))
-                            if col_documento_geral
-                            else "",
-                            "historico": str(r.get(col_historico_geral, ""))
-                            if col_historico_geral
-                            else "",
-                            "tipo_movimento": "NAO_IDENTIFICADO",
-                        }
-                    )
+                lancamentos_razao_sem_financeiro = self._emitir_lancamentos_razao(
+                    self._linhas_por_codigo(
+                        df_razao_geral_norm, indice_razao_geral, codigo_normalizado
+                    ),
+                    "valor_lancamento",
+                    codigo,
+                    codigo_nome_map.get(codigo, ""),
+                    _tem_match_financeiro,
+                )
 
                 # Em divergencia contabilidade > financeiro, listar apenas o que explica a diferenca
                 lancamentos_razao_sem_financeiro = self._selecionar_por_diferenca(
                     lancamentos_razao_sem_financeiro, diferenca, "D"
                 )
 
-            if tipo == "SO_FINANCEIRO" and df_financeiro_detalhado is not None and not df_financeiro_detalhado.empty:
-                if "codigo" in df_financeiro_detalhado.columns:
-                    matches_fin = df_financeiro_detalhado[
-                        df_financeiro_detalhado["codigo"].astype(str) == codigo
-                    ]
-                else:
-                    matches_fin = pd.DataFrame()
-
-                for _, r in matches_fin.iterrows():
-                    cliente = str(r.get("cliente", "")).strip()
-                    valor_fin_det = float(r.get("valor", 0) or 0)
-                    data_emissao = r.get("data_emissao", "")
-                    prf_numero = r.get("prf_numero", "")
-                    parcela = r.get("parcela", "")
-
-                    doc_parts = []
-                    prf_str = ""
-                    parcela_str = ""
-                    def _normalizar_doc(valor: object) -> str:
-                        if valor in [None, ""] or pd.isna(valor):
-                            return ""
-                        s = str(valor).strip()
-                        s_clean = s.strip("- ")
-                        if re.search(r"[A-Za-z]", s_clean):
-                            return s_clean
-                        digits = re.sub(r"\D+", "", s_clean)
-                        if len(digits) == 9:
-                            return digits
-                        return s_clean
-
-                    if prf_numero not in [None, ""] and not pd.isna(prf_numero):
-                        prf_str = _normalizar_doc(prf_numero)
-                        if prf_str:
-                            doc_parts.append(prf_str)
-                    if parcela not in [None, ""] and not pd.isna(parcela):
-                        parcela_str = _normalizar_doc(parcela)
-                        if parcela_str and parcela_str != prf_str:
-                            if prf_str and parcela_str in prf_str:
-                                pass
-                            else:
-                                doc_parts.append(parcela_str)
-                    documento = "-".join(doc_parts)
-
-                    lancamentos_financeiro_detalhes.append(
-                        {
-                            "conta_origem": codigo,
-                            "descricao_conta": cliente,
-                            "valor": round(valor_fin_det, 2),
-                            "tipo_lancamento": "",
-                            "data_lancamento": self._formatar_data(data_emissao),
-                            "documento": documento,
-                            "historico": "",
-                            "tipo_movimento": "NAO_IDENTIFICADO",
-                        }
-                    )
+            posicoes_fin_det = indice_fin_det.get(codigo, ())
+
+            if tipo == "SO_FINANCEIRO":
+                lancamentos_financeiro_detalhes = [
+                    {"conta_origem": codigo, **lancamentos_fin_det[i]}
+                    for i in posicoes_fin_det
+                ]
 
             if (
                 valor_cont < valor_fin
                 and df_razao_geral_norm is not None
                 and col_itemconta_geral
             ):
-                codigo_normalizado = self._normalizar_codigo_numerico(codigo)
-                matches_item = df_razao_geral_norm[
-                    df_razao_geral_norm["itemconta_normalizado"] == codigo_normalizado
-                ]
-                lancamentos_credito: List[Dict[str, Any]] = []
-                for _, r in matches_item.iterrows():
-                    valor_debito = 0.0
-                    valor_credito = 0.0
-                    if col_debito_geral:
-                        try:
-                            val = r.get(col_debito_geral, 0)
-                            if pd.notna(val):
-                                valor_debito = float(
-                                    str(val).replace(".", "").replace(",", ".") or 0
-                                )
-                        except (ValueError, TypeError):
-                            valor_debito = 0.0
-                    if col_credito_geral:
-                        try:
-                            val = r.get(col_credito_geral, 0)
-                            if pd.notna(val):
-                                valor_credito = float(
-                                    str(val).replace(".", "").replace(",", ".") or 0
-                                )
-                        except (ValueError, TypeError):
-                            valor_credito = 0.0
-
-                    if abs(valor_credito) <= 0:
-                        continue
-
-                    data_lanc = self._formatar_data(
-                        r.get(col_data_geral, "") if col_data_geral else ""
-                    )
-                    if _tem_match_financeiro(codigo, data_lanc, abs(valor_credito)):
-                        continue
-
-                    item_conta = (
-                        str(r.get(col_itemconta_geral, ""))
-                        if col_itemconta_geral
-                        else ""
-                    )
-                    # Obter nome do cliente do mapa
-                    nome_cliente = codigo_nome_map.get(codigo, "")
-
-                    lancamentos_credito.append(
-                        {
-                            "conta_origem": item_conta,
-                            "descricao_conta": nome_cliente if nome_cliente else "",
-                            "valor": round(abs(valor_credito), 2),
-                            "tipo_lancamento": "C",
-                            "data_lancamento": data_lanc,
-                            "documento": str(r.get(col_documento_geral, ""))
-                            if col_documento_geral
-                            else "",
-                            "historico": str(r.get(col_historico_geral, ""))
-                            if col_historico_geral
-                            else "",
-                            "tipo_movimento": "NAO_IDENTIFICADO",
-                        }
-                    )
+                lancamentos_credito = self._emitir_lancamentos_razao(
+                    self._linhas_por_codigo(
+                        df_razao_geral_norm, indice_razao_geral, codigo_normalizado
+                    ),
+                    "valor_credito",
+                    codigo,
+                    codigo_nome_map.get(codigo, ""),
+                    _tem_match_financeiro,
+                    tipo_lancamento="C",
+                )
 
                 lancamentos_razao_sem_financeiro = self._selecionar_por_diferenca(
                     lancamentos_credito, diferenca, "C"
@@ -546,66 +612,598 @@ class AnaliseDiferencasService:
             # Registros individuais de ambas as bases (para todos os tipos)
             status_registro = "conciliado" if tipo == "CONCILIADO" else "divergente"
 
-            # Financeiro detalhado
-            if df_financeiro_detalhado is not None and not df_financeiro_detalhado.empty:
-                if "codigo" in df_financeiro_detalhado.columns:
-                    matches_fin_det = df_financeiro_detalhado[
-                        df_financeiro_detalhado["codigo"].astype(str).str.strip() == codigo
-                    ]
-                    for _, r in matches_fin_det.iterrows():
-                        prf = r.get("prf_numero", "")
-                        parcela_val = r.get("parcela", "")
-                        doc_parts = []
-                        if prf not in [None, ""] and not pd.isna(prf):
-                            doc_parts.append(str(prf).strip())
-                        if parcela_val not in [None, ""] and not pd.isna(parcela_val):
-                            p_str = str(parcela_val).strip()
-                            if p_str and p_str not in doc_parts:
-                                doc_parts.append(p_str)
-                        registros_match_financeiro.append({
-                            "descricao": str(r.get("cliente", "")).strip(),
-                            "valor": round(float(r.get("valor", 0) or 0), 2),
-                            "data_emissao": self._formatar_data(r.get("data_emissao", "")),
-                            "documento": "-".join(doc_parts),
-                            "status": status_registro,
-                        })
-
-            # Contabilidade
-            matches_cont_det = df_cont[df_cont["codigo"].astype(str).str.strip() == codigo]
-            for _, r in matches_cont_det.iterrows():
-                registros_match_contabilidade.append({
-                    "descricao": str(r.get("cliente", "")).strip(),
-                    "valor": round(float(r.get("valor", 0) or 0), 2),
-                    "status": status_registro,
-                })
-
-            analises.append(
+            registros_match_financeiro = [
+                {**registros_fin_det[i], "status": status_registro}
+                for i in posicoes_fin_det
+            ]
+            registros_match_contabilidade = [
+                {**registros_cont[i], "status": status_registro}
+                for i in indice_cont.get(codigo, ())
+            ]
+
+            analise.update(
                 {
-                    "codigo": codigo,
-                    "nome": nome_exibicao,
-                    "conta_contabil": conta_contabil,
-                    "valor_financeiro": round(valor_fin, 2),
-                    "valor_contabilidade": round(valor_cont, 2),
-                    "diferenca": round(diferenca, 2),
-                    "tipo_diferenca": tipo,
-                    "status": status,
-                    "lancamentos_razao": lancamentos_razao,
                     "lancamentos_razao_detalhes": lancamentos_razao_detalhes
                     if lancamentos_razao_detalhes
                     else lancamentos_razao_sem_financeiro,
                     "lancamentos_financeiro_detalhes": lancamentos_financeiro_detalhes,
                     "registros_match_financeiro": registros_match_financeiro,
                     "registros_match_contabilidade": registros_match_contabilidade,
-                    "sem_lancamentos_razao": sem_lancamentos_razao,
-                    "nota_razao": nota_razao,
                 }
             )
+            analises.append(analise)
 
-        analises.sort(key=lambda x: (x["status"] == "verde", abs(x["diferenca"])))
+        return analises
 
-        logger.info(f"[ANALISE DETALHADA] Total de analises geradas: {len(analises)}")
+    def _analisar_em_paralelo(
+        self,
+        df_financeiro: pd.DataFrame,
+        df_contabilidade_filtrada: pd.DataFrame,
+        df_razao_contabil: pd.DataFrame,
+        conta_contabil: str,
+        df_financeiro_detalhado: Optional[pd.DataFrame],
+        df_razao_geral: Optional[pd.DataFrame],
+        workers: int,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Analisa os códigos em um pool de processos, particionados por hash.
+
+        A partição de um código é o hash do código normalizado: códigos que
+        compartilham lançamentos do razão geral (mesmo ITEMCONTA normalizado)
+        ficam na mesma partição, e cada worker recebe apenas as fatias das
+        bases que dizem respeito aos seus códigos. O resultado volta na ordem
+        da consolidação, como na execução sequencial.
+
+        Retorna None se o pool falhar; o chamador segue com a execução sequencial.
+        """
+        num_particoes = workers * 2
+
+        def _fatias(
+            df: Optional[pd.DataFrame], coluna: Optional[str], chave: Callable[[object], str]
+        ) -> List[Optional[pd.DataFrame]]:
+            if df is None or not coluna or coluna not in df.columns:
+                return [df] * num_particoes
+            particao = self._particionar(df[coluna], num_particoes, chave)
+            return [df.iloc[np.flatnonzero(particao == p)] for p in range(num_particoes)]
+
+        bases = self._bases_por_codigo(
+            df_financeiro,
+            df_contabilidade_filtrada,
+            df_razao_contabil,
+            df_financeiro_detalhado,
+            df_razao_geral,
+        )
+        fatias = {
+            nome: _fatias(df, coluna, chave) for nome, (df, coluna, chave) in bases.items()
+        }
+        razao_geral_disponivel = df_razao_geral is not None and not df_razao_geral.empty
+
+        particoes = [
+            {
+                **{nome: fatias_base[p] for nome, fatias_base in fatias.items()},
+                "conta_contabil": conta_contabil,
+                "razao_geral_disponivel": razao_geral_disponivel,
+            }
+            for p in range(num_particoes)
+            if not (
+                fatias["df_financeiro"][p].empty
+                and fatias["df_contabilidade_filtrada"][p].empty
+            )
+        ]
+        logger.info(
+            f"[ANALISE DETALHADA] Paralelo: {len(particoes)} particoes em {workers} processos"
+        )
+
+        try:
+            pool = _obter_pool_analise(workers)
+            resultados = list(pool.map(_analisar_particao, particoes))
+        except Exception as exc:
+            logger.warning(
+                f"[ANALISE DETALHADA] Falha no pool de processos ({exc!r}); "
+                "seguindo com a execucao sequencial"
+            )
+            _descartar_pool_analise()
+            return None
+
+        # Ordem da consolidação completa (a mesma da execução sequencial)
+        df_merge = self._consolidar_por_codigo(
+            df_financeiro[["codigo", "cliente", "valor"]],
+            df_contabilidade_filtrada[["codigo", "cliente", "valor"]],
+            df_razao_contabil,
+        )
+        ordem: Dict[str, int] = {}
+        for posicao, codigo in enumerate(df_merge["codigo"].tolist()):
+            ordem.setdefault(str(codigo).strip(), posicao)
+
+        analises = [analise for resultado in resultados for analise in resultado]
+        analises.sort(key=lambda x: ordem.get(x["codigo"], len(ordem)))
         return analises
 
+    def _chave_codigo(self, valor: object) -> str:
+        """Chave que liga uma linha das bases a um código: o código normalizado."""
+        return self._normalizar_codigo_numerico(str(valor).strip())
+
+    def _bases_por_codigo(
+        self,
+        df_financeiro: pd.DataFrame,
+        df_contabilidade_filtrada: pd.DataFrame,
+        df_razao_contabil: pd.DataFrame,
+        df_financeiro_detalhado: Optional[pd.DataFrame],
+        df_razao_geral: Optional[pd.DataFrame],
+    ) -> Dict[str, tuple[Optional[pd.DataFrame], Optional[str], Callable[[object], str]]]:
+        """
+        Bases da análise (pelo nome do argumento) com a coluna e a função que
+        dão a chave de código de cada linha.
+
+        No razão geral a chave é o ITEMCONTA normalizado; sem ITEMCONTA o razão
+        geral não participa da análise detalhada e fica de fora (None).
+        """
+        col_itemconta_geral = None
+        if df_razao_geral is not None and not df_razao_geral.empty:
+            col_itemconta_geral = self._resolver_colunas_razao_geral(df_razao_geral)[
+                "itemconta"
+            ]
+        return {
+            "df_financeiro": (df_financeiro, "codigo", self._chave_codigo),
+            "df_contabilidade_filtrada": (
+                df_contabilidade_filtrada,
+                "codigo",
+                self._chave_codigo,
+            ),
+            "df_razao_contabil": (df_razao_contabil, "codigo", self._chave_codigo),
+            "df_financeiro_detalhado": (
+                df_financeiro_detalhado,
+                "codigo",
+                self._chave_codigo,
+            ),
+            "df_razao_geral": (
+                df_razao_geral if col_itemconta_geral else None,
+                col_itemconta_geral,
+                self._normalizar_codigo_numerico,
+            ),
+        }
+
+    def _particionar(
+        self, serie: pd.Series, num_particoes: int, chave: Callable[[object], str]
+    ) -> np.ndarray:
+        """Partição (crc32 da chave) de cada linha, calculada uma vez por valor distinto."""
+        codigos, unicos = pd.factorize(serie.astype(object), use_na_sentinel=False)
+        particoes = np.fromiter(
+            (zlib.crc32(chave(valor).encode("utf-8")) % num_particoes for valor in unicos),
+            dtype=np.int64,
+            count=len(unicos),
+        )
+        return particoes[codigos]
+
+    # ==================================================
+    # ANÁLISE SOB DEMANDA (RESUMO PRIMEIRO)
+    # ==================================================
+
+    def preparar_contexto_analise(
+        self,
+        df_financeiro: pd.DataFrame,
+        df_contabilidade_filtrada: pd.DataFrame,
+        df_razao_contabil: pd.DataFrame,
+        conta_contabil: str,
+        df_financeiro_detalhado: Optional[pd.DataFrame] = None,
+        df_razao_geral: Optional[pd.DataFrame] = None,
+    ) -> ContextoAnalise:
+        """Indexa as bases da execução pela chave do código, uma única vez."""
+        bases = self._bases_por_codigo(
+            df_financeiro,
+            df_contabilidade_filtrada,
+            df_razao_contabil,
+            df_financeiro_detalhado,
+            df_razao_geral,
+        )
+        return ContextoAnalise(
+            conta_contabil=conta_contabil,
+            bases={nome: df for nome, (df, _, _) in bases.items()},
+            indices=self._indexar_bases(bases),
+            razao_geral_disponivel=df_razao_geral is not None and not df_razao_geral.empty,
+            df_razao_geral=df_razao_geral,
+        )
+
+    def _indexar_bases(
+        self,
+        bases: Dict[str, tuple[Optional[pd.DataFrame], Optional[str], Callable[[object], str]]],
+    ) -> Dict[str, Optional[Dict[str, np.ndarray]]]:
+        """Índice chave do código -> posições de cada base (None se a base não tem a coluna)."""
+        indices: Dict[str, Optional[Dict[str, np.ndarray]]] = {}
+        for nome, (df, coluna, chave) in bases.items():
+            if df is None or not coluna or coluna not in df.columns:
+                indices[nome] = None
+                continue
+            codigos, unicos = pd.factorize(df[coluna].astype(object), use_na_sentinel=False)
+            chaves = np.array([chave(valor) for valor in unicos], dtype=object)
+            indices[nome] = self._indexar_por_codigo(pd.Series(chaves[codigos]))
+        return indices
+
+    def gerar_cabecalhos_analise(self, contexto: ContextoAnalise) -> List[Dict[str, Any]]:
+        """
+        Linhas da análise detalhada sem os lançamentos, na ordem da análise completa.
+
+        Os valores, o tipo de diferença e as contagens são os mesmos de
+        ``processar_analise_detalhada``; os detalhes de cada código vêm de
+        ``analisar_codigo``.
+        """
+        df_merge = self._consolidar_por_codigo(
+            contexto.bases["df_financeiro"][["codigo", "cliente", "valor"]],
+            contexto.bases["df_contabilidade_filtrada"][["codigo", "cliente", "valor"]],
+            contexto.bases["df_razao_contabil"],
+        )
+        lancamentos_razao_geral = None
+        if contexto.bases["df_razao_geral"] is not None:
+            lancamentos_razao_geral = {
+                cod: len(posicoes)
+                for cod, posicoes in contexto.indices["df_razao_geral"].items()
+            }
+
+        cabecalhos = [
+            self._cabecalho_analise(row, contexto.conta_contabil, lancamentos_razao_geral)
+            for row in df_merge.to_dict("records")
+        ]
+        _ordenar_analises(cabecalhos)
+        logger.info(f"[ANALISE DETALHADA] Cabecalhos gerados: {len(cabecalhos)}")
+        return cabecalhos
+
+    def analisar_codigo(
+        self, contexto: ContextoAnalise, codigo: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Análise completa de um código a partir do contexto da execução.
+
+        Retorna a análise detalhada do código e, para SO_CONTABILIDADE, a análise
+        profunda; None se o código não faz parte da execução.
+        """
+        codigo = str(codigo).strip()
+        chave = self._chave_codigo(codigo)
+        fatias: Dict[str, Optional[pd.DataFrame]] = {}
+        for nome, df in contexto.bases.items():
+            indice = contexto.indices[nome]
+            if df is None or indice is None:
+                fatias[nome] = df
+            else:
+                fatias[nome] = df.iloc[indice.get(chave, np.array([], dtype=np.intp))]
+
+        analises = self._analisar_codigos(
+            conta_contabil=contexto.conta_contabil,
+            razao_geral_disponivel=contexto.razao_geral_disponivel,
+            **fatias,
+        )
+        analise = next((a for a in analises if a["codigo"] == codigo), None)
+        if analise is None:
+            return None
+
+        analise_profunda: List[Dict[str, Any]] = []
+        if analise["tipo_diferenca"] == "SO_CONTABILIDADE":
+            df_razao_geral = contexto.df_razao_geral
+            if df_razao_geral is None or df_razao_geral.empty:
+                analise_profunda = self.analisar_so_contabilidade_profundo(
+                    [analise], pd.DataFrame(), contexto.conta_contabil
+                )
+            else:
+                with _razao_profundo_lock:
+                    if contexto.razao_profundo is None:
+                        contexto.razao_profundo = self._preparar_razao_profundo(
+                            df_razao_geral
+                        )
+                analise_profunda = self._analisar_registros_profundo(
+                    [analise], contexto.razao_profundo, contexto.conta_contabil
+                )
+
+        return {"analise": analise, "analise_profunda_contabil": analise_profunda}
+
+    def iterar_analises(
+        self,
+        contexto: ContextoAnalise,
+        cabecalhos: List[Dict[str, Any]],
+        tamanho_lote: int = 200,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Análises completas na ordem de ``cabecalhos`` (ver ``gerar_cabecalhos_analise``),
+        calculadas em lotes de códigos à medida que são consumidas.
+
+        Produz as mesmas linhas de ``processar_analise_detalhada``, sem manter a
+        análise inteira em memória.
+        """
+        prontas: Dict[str, Dict[str, Any]] = {}
+        calculadas: set = set()
+        chaves_em_ordem = list(
+            dict.fromkeys(self._chave_codigo(c["codigo"]) for c in cabecalhos)
+        )
+        proxima = 0
+
+        for cabecalho in cabecalhos:
+            codigo = cabecalho["codigo"]
+            while codigo not in prontas and proxima < len(chaves_em_ordem):
+                lote = []
+                while proxima < len(chaves_em_ordem) and len(lote) < tamanho_lote:
+                    chave = chaves_em_ordem[proxima]
+                    proxima += 1
+                    if chave not in calculadas:
+                        lote.append(chave)
+                        calculadas.add(chave)
+
+                fatias: Dict[str, Optional[pd.DataFrame]] = {}
+                for nome, df in contexto.bases.items():
+                    indice = contexto.indices[nome]
+                    if df is None or indice is None:
+                        fatias[nome] = df
+                        continue
+                    posicoes = [indice[chave] for chave in lote if chave in indice]
+                    fatias[nome] = df.iloc[
+                        np.sort(np.concatenate(posicoes)) if posicoes else np.array([], dtype=np.intp)
+                    ]
+                for analise in self._analisar_codigos(
+                    conta_contabil=contexto.conta_contabil,
+                    razao_geral_disponivel=contexto.razao_geral_disponivel,
+                    **fatias,
+                ):
+                    prontas[analise["codigo"]] = analise
+
+            analise = prontas.pop(codigo, None)
+            if analise is not None:
+                yield analise
+
+    def iterar_analise_profunda(
+        self,
+        registros_so_contabilidade: List[Dict[str, Any]],
+        df_razao_geral: pd.DataFrame,
+        conta_analisada: str,
+        tamanho_lote: int = 500,
+    ) -> Iterator[Dict[str, Any]]:
+        """Análise profunda dos registros SO_CONTABILIDADE, em lotes, na ordem dos registros."""
+        if df_razao_geral.empty:
+            yield from self.analisar_so_contabilidade_profundo(
+                registros_so_contabilidade, df_razao_geral, conta_analisada
+            )
+            return
+
+        razao = self._preparar_razao_profundo(df_razao_geral)
+        for inicio in range(0, len(registros_so_contabilidade), tamanho_lote):
+            yield from self._analisar_registros_profundo(
+                registros_so_contabilidade[inicio:inicio + tamanho_lote],
+                razao,
+                conta_analisada,
+            )
+
+    # ==================================================
+    # RE-EXECUÇÃO INCREMENTAL
+    # ==================================================
+
+    def hashes_financeiro_por_codigo(
+        self,
+        df_financeiro: pd.DataFrame,
+        df_financeiro_detalhado: Optional[pd.DataFrame],
+    ) -> Dict[str, str]:
+        """
+        Hash, por chave do código, das linhas do financeiro (agregado e detalhado).
+
+        Dois financeiros com o mesmo hash em uma chave produzem a mesma análise
+        para os códigos dessa chave (as demais bases iguais).
+        """
+        hashers: Dict[str, Any] = {}
+        for nome, df in (("agregado", df_financeiro), ("detalhado", df_financeiro_detalhado)):
+            if df is None or df.empty or "codigo" not in df.columns:
+                continue
+            linhas = pd.util.hash_pandas_object(df, index=False).to_numpy()
+            codigos, unicos = pd.factorize(df["codigo"].astype(object), use_na_sentinel=False)
+            chaves = np.array([self._chave_codigo(valor) for valor in unicos], dtype=object)
+            for chave, posicoes in self._indexar_por_codigo(pd.Series(chaves[codigos])).items():
+                hasher = hashers.get(chave)
+                if hasher is None:
+                    hasher = hashers[chave] = hashlib.blake2b(digest_size=16)
+                hasher.update(nome.encode("utf-8"))
+                hasher.update(linhas[posicoes].tobytes())
+        return {chave: hasher.hexdigest() for chave, hasher in hashers.items()}
+
+    def _impressao_base(self, df: Optional[pd.DataFrame]) -> Optional[str]:
+        """Hash das colunas e linhas de uma base (posições incluídas); None se não há base."""
+        if df is None:
+            return None
+        hasher = hashlib.blake2b(digest_size=16)
+        hasher.update(str(len(df)).encode("utf-8"))
+        hasher.update("\x1f".join(map(str, df.columns)).encode("utf-8"))
+        hasher.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+        return hasher.hexdigest()
+
+    def processar_analise_incremental(
+        self,
+        anterior: Optional[EstadoAnalise],
+        df_financeiro: pd.DataFrame,
+        df_contabilidade_filtrada: pd.DataFrame,
+        df_razao_contabil: pd.DataFrame,
+        conta_contabil: str,
+        df_financeiro_detalhado: Optional[pd.DataFrame] = None,
+        df_razao_geral: Optional[pd.DataFrame] = None,
+    ) -> tuple[List[Dict[str, Any]], EstadoAnalise]:
+        """
+        Análise detalhada reaproveitando a execução anterior com as mesmas
+        contabilidade, razão e conta contábil.
+
+        Só os códigos cujo financeiro mudou (presentes no financeiro anterior ou
+        no novo, com linhas diferentes) são recalculados; os demais vêm de
+        ``anterior``. Sem execução anterior, ou se contabilidade ou razões não
+        são os mesmos DataFrames de ``anterior``, equivale a
+        ``processar_analise_detalhada``. O resultado é o mesmo da análise completa.
+
+        Retorna as análises e o estado para a próxima re-execução.
+        """
+        hashes = self.hashes_financeiro_por_codigo(df_financeiro, df_financeiro_detalhado)
+        impressoes = {
+            "df_contabilidade_filtrada": self._impressao_base(df_contabilidade_filtrada),
+            "df_razao_contabil": self._impressao_base(df_razao_contabil),
+            "df_razao_geral": self._impressao_base(df_razao_geral),
+        }
+        if anterior is not None and anterior.impressoes != impressoes:
+            logger.info(
+                "[ANALISE DETALHADA] Incremental: bases diferentes da execucao anterior; "
+                "analise completa"
+            )
+            anterior = None
+
+        bases = self._bases_por_codigo(
+            df_financeiro,
+            df_contabilidade_filtrada,
+            df_razao_contabil,
+            df_financeiro_detalhado,
+            df_razao_geral,
+        )
+
+        if anterior is None:
+            analises = self.processar_analise_detalhada(
+                df_financeiro=df_financeiro,
+                df_contabilidade_filtrada=df_contabilidade_filtrada,
+                df_razao_contabil=df_razao_contabil,
+                conta_contabil=conta_contabil,
+                df_financeiro_detalhado=df_financeiro_detalhado,
+                df_razao_geral=df_razao_geral,
+            )
+            por_chave: Dict[str, List[Dict[str, Any]]] = {}
+            for analise in analises:
+                por_chave.setdefault(self._chave_codigo(analise["codigo"]), []).append(analise)
+            # Índices das bases que não são o financeiro, para a próxima re-execução
+            return analises, EstadoAnalise(
+                hashes_financeiro=hashes,
+                analises=por_chave,
+                impressoes=impressoes,
+                indices=self._indexar_bases(
+                    {nome: bases[nome] for nome in impressoes}
+                ),
+            )
+
+        df_merge = self._consolidar_por_codigo(
+            df_financeiro[["codigo", "cliente", "valor"]],
+            df_contabilidade_filtrada[["codigo", "cliente", "valor"]],
+            df_razao_contabil,
+        )
+        codigos = [str(codigo).strip() for codigo in df_merge["codigo"].tolist()]
+
+        afetadas = {
+            chave
+            for chave in set(hashes) | set(anterior.hashes_financeiro)
+            if hashes.get(chave) != anterior.hashes_financeiro.get(chave)
+        }
+        afetadas.update(
+            chave
+            for chave in map(self._chave_codigo, codigos)
+            if chave not in anterior.analises
+        )
+        logger.info(
+            f"[ANALISE DETALHADA] Incremental: {len(afetadas)} chaves de codigo recalculadas, "
+            f"{len(anterior.analises)} na execucao anterior"
+        )
+
+        # Índices das bases que não mudaram vêm da execução anterior
+        indices = dict(anterior.indices)
+        faltantes = {
+            nome: base
+            for nome, base in bases.items()
+            if nome not in indices or nome in ("df_financeiro", "df_financeiro_detalhado")
+        }
+        indices.update(self._indexar_bases(faltantes))
+
+        fatias: Dict[str, Optional[pd.DataFrame]] = {}
+        for nome, (df, _, _) in bases.items():
+            indice = indices[nome]
+            if df is None or indice is None:
+                fatias[nome] = df
+                continue
+            posicoes = [indice[chave] for chave in afetadas if chave in indice]
+            fatias[nome] = df.iloc[
+                np.sort(np.concatenate(posicoes)) if posicoes else np.array([], dtype=np.intp)
+            ]
+
+        recalculadas: Dict[str, List[Dict[str, Any]]] = {}
+        if afetadas:
+            for analise in self._analisar_codigos(
+                conta_contabil=conta_contabil,
+                razao_geral_disponivel=df_razao_geral is not None and not df_razao_geral.empty,
+                **fatias,
+            ):
+                recalculadas.setdefault(self._chave_codigo(analise["codigo"]), []).append(analise)
+
+        por_chave = {
+            chave: analises
+            for chave, analises in anterior.analises.items()
+            if chave not in afetadas
+        }
+        por_chave.update(recalculadas)
+
+        # Ordem da consolidação completa (a mesma da execução sequencial)
+        ordem: Dict[str, int] = {}
+        for posicao, codigo in enumerate(codigos):
+            ordem.setdefault(codigo, posicao)
+        analises = [
+            analise
+            for chave in dict.fromkeys(map(self._chave_codigo, codigos))
+            for analise in por_chave.get(chave, ())
+        ]
+        analises.sort(key=lambda x: ordem.get(x["codigo"], len(ordem)))
+        _ordenar_analises(analises)
+
+        logger.info(f"[ANALISE DETALHADA] Total de analises geradas: {len(analises)}")
+        return analises, EstadoAnalise(
+            hashes_financeiro=hashes,
+            analises=por_chave,
+            impressoes=impressoes,
+            indices={
+                nome: indice
+                for nome, indice in indices.items()
+                if nome not in ("df_financeiro", "df_financeiro_detalhado")
+            },
+            analise_profunda={
+                codigo: resultado
+                for codigo, resultado in anterior.analise_profunda.items()
+                if self._chave_codigo(codigo) not in afetadas
+            },
+            razao_profundo=anterior.razao_profundo,
+        )
+
+    def analisar_so_contabilidade_incremental(
+        self,
+        registros_so_contabilidade: List[Dict[str, Any]],
+        df_razao_geral: pd.DataFrame,
+        conta_analisada: str,
+        estado: EstadoAnalise,
+    ) -> List[Dict[str, Any]]:
+        """
+        Análise profunda reaproveitando o razão preparado e os registros dos
+        códigos que não foram recalculados desde a execução anterior.
+
+        Atualiza ``estado`` com a análise profunda desta execução.
+        """
+        if df_razao_geral.empty:
+            analise_profunda = self.analisar_so_contabilidade_profundo(
+                registros_so_contabilidade, df_razao_geral, conta_analisada
+            )
+        else:
+            if estado.razao_profundo is None:
+                estado.razao_profundo = self._preparar_razao_profundo(df_razao_geral)
+
+            anteriores = estado.analise_profunda
+            pendentes = [
+                registro
+                for registro in registros_so_contabilidade
+                if registro["codigo"] not in anteriores
+            ]
+            calculados = {
+                resultado["codigo"]: resultado
+                for resultado in self._analisar_registros_profundo(
+                    pendentes, estado.razao_profundo, conta_analisada
+                )
+            }
+            analise_profunda = [
+                calculados.get(registro["codigo"]) or anteriores[registro["codigo"]]
+                for registro in registros_so_contabilidade
+            ]
+
+        estado.analise_profunda = {
+            resultado["codigo"]: resultado for resultado in analise_profunda
+        }
+        return analise_profunda
+
     def gerar_resumo_analise(self, analises: List[Dict[str, Any]]) -> Dict[str, Any]:
         total = len(analises)
         conciliados = sum(1 for a in analises if a.get("status") == "verde")
@@ -678,7 +1276,8 @@ class AnaliseDiferencasService:
             if stripped:
                 variacoes.append(stripped)
 
-        return list(set(variacoes))
+        # Sem duplicatas, preservando a ordem de prioridade
+        return list(dict.fromkeys(variacoes))
 
     def _formatar_data(self, valor: object) -> str:
         """Formata datas em dd/mm/aaaa, tratando serial do Excel."""
@@ -722,7 +1321,13 @@ class AnaliseDiferencasService:
     def _selecionar_por_diferenca(
         self, lancamentos: List[Dict[str, Any]], diferenca: float, tipo_lancamento: str
     ) -> List[Dict[str, Any]]:
-        """Seleciona subconjunto de lançamentos que soma a diferença (tolerância 0,01)."""
+        """
+        Seleciona subconjunto de lançamentos que soma a diferença (tolerância 0,01).
+
+        Tenta primeiro o guloso (maiores valores primeiro); se ele não fechar a
+        diferença, busca o subconjunto exato em centavos dentro do orçamento
+        configurado. Sem solução, retorna lista vazia.
+        """
         alvo = abs(float(diferenca or 0))
         if alvo <= 0.01:
             return []
@@ -743,8 +1348,342 @@ class AnaliseDiferencasService:
             if abs(soma - alvo) <= 0.01:
                 break
 
-        return selecionados if abs(soma - alvo) <= 0.01 else []
+        if abs(soma - alvo) <= 0.01:
+            return selecionados
+
+        posicoes = encontrar_subconjunto(
+            [para_centavos(item.get("valor", 0) or 0) for item in candidatos],
+            para_centavos(alvo),
+            max_nos=settings.SUBSET_SUM_MAX_NODES,
+            tempo_limite_ms=settings.SUBSET_SUM_TIME_LIMIT_MS,
+            dp_max_alvo=settings.SUBSET_SUM_DP_MAX_TARGET_CENTS,
+            mitm_max_itens=settings.SUBSET_SUM_MITM_MAX_ITEMS,
+        )
+        if posicoes is None:
+            return []
+        return [candidatos[i] for i in posicoes]
+
+    def _converter_valores_razao(
+        self, df: pd.DataFrame, coluna: Optional[str]
+    ) -> pd.Series:
+        """
+        Converte uma coluna de DEBITO/CREDITO do razão para float de forma vetorizada.
 
+        Mesma gramática dos demais relatórios (``tools.numeros.converter_numeros``):
+        formato brasileiro, negativos por "-" ou parênteses e sufixo D/C (C
+        negativo). Valores ausentes ou inválidos viram 0.0.
+        """
+        if not coluna or coluna not in df.columns:
+            return pd.Series(0.0, index=df.index)
+        return converter_numeros(df[coluna], padrao=0.0)
+
+    def _indexar_por_codigo(self, serie_codigos: pd.Series) -> Dict[str, np.ndarray]:
+        """Mapeia cada código para as posições (iloc) das linhas onde ele ocorre."""
+        if serie_codigos.empty:
+            return {}
+        return {
+            str(cod): posicoes
+            for cod, posicoes in serie_codigos.groupby(
+                serie_codigos.to_numpy(), sort=False
+            ).indices.items()
+        }
+
+    def _linhas_por_codigo(
+        self, df: pd.DataFrame, indice: Dict[str, np.ndarray], codigo: str
+    ) -> pd.DataFrame:
+        """Retorna as linhas de ``df`` do código usando o índice pré-calculado."""
+        posicoes = indice.get(codigo)
+        if posicoes is None:
+            return df.iloc[0:0]
+        return df.iloc[posicoes]
+
+    def _coluna_texto(self, df: pd.DataFrame, coluna: Optional[str]) -> pd.Series:
+        """Converte a coluna para texto (equivalente a ``str(valor)``); ausente vira ""."""
+        if not coluna or coluna not in df.columns:
+            return pd.Series("", index=df.index, dtype=object)
+        return df[coluna].astype(object).map(str)
+
+    def _coluna_texto_compacta(
+        self, df: pd.DataFrame, coluna: Optional[str], categoria: bool = False
+    ) -> pd.Series:
+        """
+        ``_coluna_texto`` em tipo compacto: ``categorizar`` ou ``texto_compacto``.
+
+        Colunas só de textos, sem ausentes, são convertidas direto, sem montar
+        um ``str`` por célula.
+        """
+        serie = df[coluna] if coluna and coluna in df.columns else None
+        if (
+            serie is None
+            or serie.hasnans
+            or pd.api.types.infer_dtype(serie, skipna=False) != "string"
+        ):
+            serie = self._coluna_texto(df, coluna)
+        return categorizar(serie) if categoria else texto_compacto(serie)
+
+    def _formatar_datas_coluna(
+        self, df: pd.DataFrame, coluna: Optional[str]
+    ) -> pd.Series:
+        """Formata a coluna de datas em lote (ver ``tools.datas``); ausente vira ""."""
+        if not coluna or coluna not in df.columns:
+            return pd.Series("", index=df.index, dtype=object)
+        return formatar_datas(df[coluna], fallback=self._formatar_data)
+
+    def _aplicar_por_valor(
+        self, serie: pd.Series, funcao: Callable[[object], str]
+    ) -> pd.Series:
+        """Aplica ``funcao`` uma única vez por valor distinto da coluna (mesmo resultado de ``apply``)."""
+        codigos, unicos = pd.factorize(serie.astype(object), use_na_sentinel=False)
+        resultados = np.array([funcao(valor) for valor in unicos], dtype=object)
+        return pd.Series(resultados[codigos], index=serie.index, dtype=object)
+
+    def _pares_codigo_nome(self, df: pd.DataFrame) -> List[tuple[str, str]]:
+        """Pares (código, nome) válidos para o mapa de nomes, na ordem das linhas."""
+        codigos = self._coluna_texto(df, "codigo").str.strip()
+        nomes = self._coluna_texto(df, "cliente").str.strip()
+        validos = (codigos != "") & (nomes != "") & (nomes != codigos)
+        return list(zip(codigos[validos].tolist(), nomes[validos].tolist()))
+
+    def _normalizar_documento_financeiro(self, valor: object) -> str:
+        """Normaliza número de título/parcela do financeiro para exibição."""
+        if valor in [None, ""] or pd.isna(valor):
+            return ""
+        s = str(valor).strip()
+        s_clean = s.strip("- ")
+        if re.search(r"[A-Za-z]", s_clean):
+            return s_clean
+        digits = re.sub(r"\D+", "", s_clean)
+        if len(digits) == 9:
+            return digits
+        return s_clean
+
+    def _registros_financeiro_detalhado(
+        self, df: pd.DataFrame, datas: pd.Series
+    ) -> tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Formata o financeiro detalhado uma única vez, na ordem das linhas.
+
+        Retorna os lançamentos exibidos em SO_FINANCEIRO (sem ``conta_origem``) e
+        os registros de match (sem ``status``); o chamador seleciona as posições
+        de cada código e completa os campos que dependem da análise.
+        """
+        clientes = self._coluna_texto(df, "cliente").str.strip().tolist()
+        valores = (
+            pd.to_numeric(df["valor"], errors="coerce").fillna(0.0).round(2).tolist()
+            if "valor" in df.columns
+            else [0.0] * len(df)
+        )
+        prfs = df["prf_numero"].tolist() if "prf_numero" in df.columns else [""] * len(df)
+        parcelas = df["parcela"].tolist() if "parcela" in df.columns else [""] * len(df)
+
+        lancamentos: List[Dict[str, Any]] = []
+        registros: List[Dict[str, Any]] = []
+        for cliente, valor, data, prf, parcela in zip(
+            clientes, valores, datas.tolist(), prfs, parcelas
+        ):
+            # Documento exibido no detalhe SO_FINANCEIRO (título + parcela normalizados)
+            doc_parts = []
+            prf_str = ""
+            if prf not in [None, ""] and not pd.isna(prf):
+                prf_str = self._normalizar_documento_financeiro(prf)
+                if prf_str:
+                    doc_parts.append(prf_str)
+            if parcela not in [None, ""] and not pd.isna(parcela):
+                parcela_str = self._normalizar_documento_financeiro(parcela)
+                if parcela_str and parcela_str != prf_str:
+                    if not (prf_str and parcela_str in prf_str):
+                        doc_parts.append(parcela_str)
+
+            # Documento dos registros de match (valores originais)
+            doc_match = []
+            if prf not in [None, ""] and not pd.isna(prf):
+                doc_match.append(str(prf).strip())
+            if parcela not in [None, ""] and not pd.isna(parcela):
+                p_str = str(parcela).strip()
+                if p_str and p_str not in doc_match:
+                    doc_match.append(p_str)
+
+            lancamentos.append(
+                {
+                    "descricao_conta": cliente,
+                    "valor": valor,
+                    "tipo_lancamento": "",
+                    "data_lancamento": data,
+                    "documento": "-".join(doc_parts),
+                    "historico": "",
+                    "tipo_movimento": "NAO_IDENTIFICADO",
+                }
+            )
+            registros.append(
+                {
+                    "descricao": cliente,
+                    "valor": valor,
+                    "data_emissao": data,
+                    "documento": "-".join(doc_match),
+                }
+            )
+        return lancamentos, registros
+
+    def _emitir_lancamentos_razao(
+        self,
+        linhas: pd.DataFrame,
+        coluna_valor: str,
+        codigo: str,
+        nome_cliente: str,
+        tem_match: Callable[[str, str, float], bool],
+        tipo_lancamento: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Monta os detalhes de lançamentos do razão geral a partir das colunas já
+        formatadas, descartando valores zerados e os que casam com o financeiro.
+        """
+        linhas = linhas[linhas[coluna_valor] > 0]
+        if linhas.empty:
+            return []
+
+        valores = linhas[coluna_valor].to_numpy(dtype=float)
+        tipos = (
+            [tipo_lancamento] * len(linhas)
+            if tipo_lancamento is not None
+            else linhas["tipo_lancamento"].tolist()
+        )
+        lancamentos: List[Dict[str, Any]] = []
+        for conta, valor, valor_arredondado, tipo, data, documento, historico in zip(
+            linhas["conta_origem"].tolist(),
+            valores.tolist(),
+            np.round(valores, 2).tolist(),
+            tipos,
+            linhas["data_lancamento"].tolist(),
+            linhas["documento"].tolist(),
+            linhas["historico"].tolist(),
+        ):
+            if tem_match(codigo, data, valor):
+                continue
+            lancamentos.append(
+                {
+                    "conta_origem": conta,
+                    "descricao_conta": nome_cliente if nome_cliente else "",
+                    "valor": valor_arredondado,
+                    "tipo_lancamento": tipo,
+                    "data_lancamento": data,
+                    "documento": documento,
+                    "historico": historico,
+                    "tipo_movimento": "NAO_IDENTIFICADO",
+                }
+            )
+        return lancamentos
+
+    def _montar_tabela_busca_razao(
+        self, df_razao: pd.DataFrame, col_conta: Optional[str], col_codigo: Optional[str]
+    ) -> Dict[tuple[str, str], np.ndarray]:
+        """
+        Monta a tabela de busca do razão para a análise profunda.
+
+        Chaves: ("itemconta", ITEMCONTA normalizado), ("codigo", código normalizado)
+        e ("original", código original); valores são as posições (iloc) das linhas.
+        """
+        tabela: Dict[tuple[str, str], np.ndarray] = {}
+        colunas = []
+        if col_conta:
+            colunas.append(("itemconta", "itemconta_normalizado"))
+        if col_codigo:
+            colunas.extend(
+                [("codigo", "codigo_normalizado"), ("original", "codigo_original")]
+            )
+        for tipo_chave, coluna in colunas:
+            for chave, posicoes in self._indexar_por_codigo(df_razao[coluna]).items():
+                tabela[(tipo_chave, chave)] = posicoes
+        return tabela
+
+    def _resolver_linhas_razao(
+        self,
+        tabela: Dict[tuple[str, str], np.ndarray],
+        codigo: str,
+        col_conta: Optional[str],
+        col_codigo: Optional[str],
+    ) -> tuple[np.ndarray, str]:
+        """
+        Localiza as linhas do razão de um código na tabela de busca.
+
+        Ordem: ITEMCONTA = código; código normalizado = código; código original =
+        cada variação do código. Retorna as posições e a forma de resolução.
+        """
+        chaves = []
+        if col_conta:
+            chaves.append(("itemconta", self._normalizar_codigo_numerico(codigo)))
+        if col_codigo:
+            chaves.append(("codigo", codigo))
+            chaves.extend(
+                ("original", var) for var in self._gerar_variacoes_codigo(codigo)
+            )
+
+        for tipo_chave, chave in chaves:
+            posicoes = tabela.get((tipo_chave, chave))
+            if posicoes is not None and len(posicoes):
+                resolucao = "variacao" if tipo_chave == "original" else tipo_chave
+                return posicoes, resolucao
+        return np.array([], dtype=np.intp), "sem_match"
+
+    def chaves_razao_geral(self, codigos: Iterable[object]) -> Dict[str, set]:
+        """
+        Chaves pelas quais a análise dos ``codigos`` busca linhas no razão geral
+        (ver ``linhas_relevantes_razao_geral``).
+        """
+        codigos = {str(codigo).strip() for codigo in codigos}
+        return {
+            "itemconta": {self._normalizar_codigo_numerico(codigo) for codigo in codigos},
+            "codigo": codigos,
+            "original": {
+                variacao for codigo in codigos for variacao in self._gerar_variacoes_codigo(codigo)
+            },
+        }
+
+    def linhas_relevantes_razao_geral(
+        self, df_razao_geral: pd.DataFrame, chaves: Dict[str, set]
+    ) -> np.ndarray:
+        """
+        Máscara das linhas do razão geral que a análise pode usar: as mesmas
+        buscas de ``_analisar_codigos`` (ITEMCONTA normalizado) e da análise
+        profunda (ITEMCONTA, código normalizado e código original), feitas
+        contra as ``chaves`` dos códigos da conciliação.
+
+        As demais linhas não aparecem em nenhum resultado e podem ser
+        descartadas antes da análise (semi-join do razão com os códigos).
+        """
+        colunas = self._resolver_colunas_razao_geral(df_razao_geral)
+        col_conta = colunas["itemconta"]
+        col_codigo = colunas["codigo"]
+
+        relevantes = np.zeros(len(df_razao_geral), dtype=bool)
+        if col_conta:
+            relevantes |= (
+                self._aplicar_por_valor(df_razao_geral[col_conta], self._normalizar_codigo_numerico)
+                .isin(chaves["itemconta"])
+                .to_numpy()
+            )
+        if col_codigo:
+            relevantes |= (
+                self._aplicar_por_valor(df_razao_geral[col_codigo], self._normalizar_codigo_razao)
+                .isin(chaves["codigo"])
+                .to_numpy()
+            )
+            relevantes |= (
+                df_razao_geral[col_codigo].astype(str).str.strip()
+                .isin(chaves["original"])
+                .to_numpy(dtype=bool)
+            )
+        return relevantes
+
+    def _resolver_colunas_razao_geral(self, df: pd.DataFrame) -> Dict[str, Optional[str]]:
+        """Mapa coluna lógica -> coluna do razão geral, resolvido uma vez por layout."""
+        return resolver_layout(
+            LAYOUT_RAZAO_GERAL,
+            df.columns,
+            lambda: {
+                logica: self._encontrar_coluna(df, candidatas)
+                for logica, candidatas in COLUNAS_RAZAO_GERAL.items()
+            },
+        )
 
     def _encontrar_coluna(
         self, df: pd.DataFrame, candidatas: List[str]
@@ -882,118 +1821,29 @@ class AnaliseDiferencasService:
                 for r in registros_so_contabilidade
             ]
 
-        # Identificar colunas do razão geral
-        # Colunas do relatório: DATA | LOTE/SUB/DOC/LINHA | HISTORICO | XPARTIDA | CCUSTO | ITEMCONTA | CODCLVAL | DEBITO | CREDITO | SALDO ATUAL
-        col_codigo = self._encontrar_coluna(
-            df_razao_geral,
-            [
-                "CODCLVAL",
-                "codclval",
-                "cod_cl_val",
-                "COD CL VAL",
-                "codigo",
-                "Codigo",
-                "CODIGO",
-                "cod_cliente",
-                "cliente_codigo",
-                "codigo_cliente",
-                "Código",
-            ],
-        )
-        col_conta = self._encontrar_coluna(
-            df_razao_geral,
-            [
-                "ITEMCONTA",
-                "itemconta",
-                "item_conta",
-                "ITEM CONTA",
-                "conta_contabil",
-                "Conta Contábil",
-                "conta",
-                "Conta",
-                "CONTA",
-                "conta_contabil_debito",
-                "conta_debito",
-                "ContaContabil",
-            ],
-        )
-        col_contra_partida = self._encontrar_coluna(
-            df_razao_geral,
-            [
-                "XPARTIDA",
-                "xpartida",
-                "x_partida",
-                "X PARTIDA",
-                "contra_partida",
-                "contrapartida",
-                "conta_credito",
-            ],
-        )
-        col_debito = self._encontrar_coluna(
-            df_razao_geral,
-            ["DEBITO", "debito", "Debito", "DÉBITO", "débito", "vlr_debito"],
-        )
-        col_credito = self._encontrar_coluna(
-            df_razao_geral,
-            ["CREDITO", "credito", "Credito", "CRÉDITO", "crédito", "vlr_credito"],
-        )
-        col_valor = self._encontrar_coluna(
-            df_razao_geral,
-            [
-                "SALDO ATUAL",
-                "saldo_atual",
-                "SALDO_ATUAL",
-                "saldo atual",
-                "valor",
-                "Valor",
-                "VALOR",
-                "saldo",
-                "Saldo",
-            ],
-        )
-        col_data = self._encontrar_coluna(
-            df_razao_geral,
-            [
-                "DATA",
-                "data",
-                "Data",
-                "data_lancamento",
-                "dt_lancamento",
-                "data_movimento",
-                "dt_movimento",
-            ],
-        )
-        col_documento = self._encontrar_coluna(
-            df_razao_geral,
-            [
-                "LOTE/SUB/DOC/LINHA",
-                "lote_sub_doc_linha",
-                "LOTE SUB DOC LINHA",
-                "documento",
-                "Documento",
-                "DOCUMENTO",
-                "doc",
-                "num_documento",
-                "nr_documento",
-                "numero_documento",
-            ],
-        )
-        col_historico = self._encontrar_coluna(
-            df_razao_geral,
-            [
-                "HISTORICO",
-                "historico",
-                "Historico",
-                "descricao",
-                "Descricao",
-                "hist_lancamento",
-                "observacao",
-            ],
-        )
-        col_centro_custo = self._encontrar_coluna(
-            df_razao_geral, ["CCUSTO", "ccusto", "c_custo", "C CUSTO", "centro_custo"]
+        razao = self._preparar_razao_profundo(df_razao_geral)
+        return self._analisar_registros_profundo(
+            registros_so_contabilidade, razao, conta_analisada
         )
 
+    def _preparar_razao_profundo(self, df_razao_geral: pd.DataFrame) -> RazaoProfundo:
+        """
+        Prepara o razão geral para a análise profunda: campos das origens
+        formatados e tabela de busca por código, montados uma única vez.
+        """
+        # Identificar colunas do razão geral
+        colunas_razao_geral = self._resolver_colunas_razao_geral(df_razao_geral)
+        col_codigo = colunas_razao_geral["codigo"]
+        col_conta = colunas_razao_geral["itemconta"]
+        col_contra_partida = colunas_razao_geral["contra_partida"]
+        col_debito = colunas_razao_geral["debito"]
+        col_credito = colunas_razao_geral["credito"]
+        col_valor = colunas_razao_geral["valor"]
+        col_data = colunas_razao_geral["data"]
+        col_documento = colunas_razao_geral["documento"]
+        col_historico = colunas_razao_geral["historico"]
+        col_centro_custo = colunas_razao_geral["centro_custo"]
+
         logger.info(
             "[ANÁLISE PROFUNDA] Colunas identificadas - codigo: %s, conta: %s, xpartida: %s, debito: %s, credito: %s",
             col_codigo,
@@ -1003,138 +1853,123 @@ class AnaliseDiferencasService:
             col_credito,
         )
 
-        # Normalizar códigos no razão geral se a coluna existir
-        df_razao = df_razao_geral.copy()
+        # Chaves de busca e campos das origens montados à parte, sem copiar o
+        # razão geral: só essas colunas ficam guardadas para a análise profunda
+        sem_coluna = pd.Series("", index=df_razao_geral.index, dtype=object)
         if col_codigo:
-            df_razao["codigo_normalizado"] = df_razao[col_codigo].apply(
-                self._normalizar_codigo_razao
+            codigo_normalizado = self._aplicar_por_valor(
+                df_razao_geral[col_codigo], self._normalizar_codigo_razao
             )
             # Também guardar o valor original para busca flexível
-            df_razao["codigo_original"] = df_razao[col_codigo].astype(str).str.strip()
+            codigo_original = df_razao_geral[col_codigo].astype(str).str.strip()
         else:
-            df_razao["codigo_normalizado"] = ""
-            df_razao["codigo_original"] = ""
+            codigo_normalizado = codigo_original = sem_coluna
 
         if col_conta:
-            df_razao["itemconta_normalizado"] = df_razao[col_conta].apply(
-                self._normalizar_codigo_numerico
+            itemconta_normalizado = self._aplicar_por_valor(
+                df_razao_geral[col_conta], self._normalizar_codigo_numerico
             )
         else:
-            df_razao["itemconta_normalizado"] = ""
+            itemconta_normalizado = sem_coluna
+
+        debito_num = self._converter_valores_razao(df_razao_geral, col_debito)
+        credito_num = self._converter_valores_razao(df_razao_geral, col_credito)
+
+        # Campos das origens formatados uma única vez para todo o razão; cada
+        # registro analisado apenas seleciona suas linhas.
+        # Valor é débito ou crédito (o que tiver)
+        debito_positivo = debito_num > 0
+        df_origens = pd.DataFrame(
+            {
+                "origem_item_conta": self._coluna_texto_compacta(
+                    df_razao_geral, col_conta, categoria=True
+                ),
+                "origem_contra_partida": self._coluna_texto_compacta(
+                    df_razao_geral, col_contra_partida, categoria=True
+                ),
+                "origem_valor": debito_num.where(debito_positivo, credito_num).round(2),
+                "origem_tipo_lancamento": pd.Categorical(
+                    np.select([debito_positivo, credito_num > 0], ["D", "C"], default="")
+                ),
+                "origem_data": categorizar(
+                    self._formatar_datas_coluna(df_razao_geral, col_data)
+                ),
+                "origem_documento": self._coluna_texto_compacta(
+                    df_razao_geral, col_documento
+                ),
+                "origem_historico": self._coluna_texto_compacta(
+                    df_razao_geral, col_historico
+                ),
+            },
+            index=df_razao_geral.index,
+        )
 
         # Log de amostra dos códigos no razão para debug
-        if col_codigo and not df_razao.empty:
+        if col_codigo and not df_razao_geral.empty:
             amostra = (
-                df_razao[[col_codigo, "codigo_normalizado"]].head(10).to_dict("records")
+                pd.DataFrame(
+                    {
+                        col_codigo: df_razao_geral[col_codigo],
+                        "codigo_normalizado": codigo_normalizado,
+                    }
+                )
+                .head(10)
+                .to_dict("records")
             )
             logger.info("[ANÁLISE PROFUNDA] Amostra de códigos no razão: %s", amostra)
 
+        # Tabela de busca montada uma única vez: cada chave (ITEMCONTA normalizado,
+        # código normalizado, código original) aponta para as posições no razão.
+        chaves = pd.DataFrame(
+            {
+                "itemconta_normalizado": itemconta_normalizado,
+                "codigo_normalizado": codigo_normalizado,
+                "codigo_original": codigo_original,
+            }
+        )
+        tabela_busca = self._montar_tabela_busca_razao(chaves, col_conta, col_codigo)
+        return RazaoProfundo(
+            df_origens=df_origens,
+            tabela_busca=tabela_busca,
+            col_conta=col_conta,
+            col_codigo=col_codigo,
+        )
+
+    def _analisar_registros_profundo(
+        self,
+        registros_so_contabilidade: List[Dict[str, Any]],
+        razao: RazaoProfundo,
+        conta_analisada: str,
+    ) -> List[Dict[str, Any]]:
+        """Busca as origens de cada registro SO_CONTABILIDADE no razão preparado."""
         resultados = []
+        resolucoes: Counter = Counter()
 
         for registro in registros_so_contabilidade:
             codigo = str(registro.get("codigo", "")).strip()
             nome = str(registro.get("nome", codigo)).strip()
             valor_cont = float(registro.get("valor_contabilidade", 0))
 
-            logger.info(
-                "[ANÁLISE PROFUNDA] Analisando código %s, valor %.2f",
-                codigo,
-                valor_cont,
-            )
-
             origens = []
 
-            # Buscar TODOS os lançamentos no razão geral para ITEMCONTA = CODIGO
-            matches_codigo = pd.DataFrame()
-            if col_conta:
-                codigo_normalizado = self._normalizar_codigo_numerico(codigo)
-                matches_codigo = df_razao[
-                    df_razao["itemconta_normalizado"] == codigo_normalizado
-                ]
-                logger.info(
-                    "[ANÁLISE PROFUNDA] Registros encontrados por ITEMCONTA=%s: %d",
-                    codigo_normalizado,
-                    len(matches_codigo),
-                )
-
-            # Se não há coluna ITEMCONTA, manter fallback para o campo de código
-            if matches_codigo.empty and col_codigo:
-                # Gerar variações do código para busca flexível
-                variacoes = self._gerar_variacoes_codigo(codigo)
-                logger.info(
-                    "[ANÁLISE PROFUNDA] Variações do código %s: %s", codigo, variacoes
-                )
-
-                # Primeiro tenta match exato pelo código normalizado
-                matches_codigo = df_razao[df_razao["codigo_normalizado"] == codigo]
-
-                # Se não encontrou, tenta pelas variações no código original
-                if matches_codigo.empty:
-                    for var in variacoes:
-                        matches_codigo = df_razao[df_razao["codigo_original"] == var]
-                        if not matches_codigo.empty:
-                            logger.info(
-                                "[ANÁLISE PROFUNDA] Match encontrado com variação '%s'",
-                                var,
-                            )
-                            break
-
-                logger.info(
-                    "[ANÁLISE PROFUNDA] Registros encontrados para %s: %d",
-                    codigo,
-                    len(matches_codigo),
-                )
+            posicoes, resolucao = self._resolver_linhas_razao(
+                razao.tabela_busca, codigo, razao.col_conta, razao.col_codigo
+            )
+            resolucoes[resolucao] += 1
+            matches_codigo = razao.df_origens.iloc[posicoes]
 
             # Listar TODOS os lançamentos encontrados (não filtrar por XPARTIDA)
             if not matches_codigo.empty:
-                for _, row in matches_codigo.iterrows():
-                    # Conta do lançamento (ITEMCONTA ou similar)
-                    item_conta = str(row.get(col_conta, "")) if col_conta else ""
-                    # Contrapartida (se existir)
-                    contra_partida = (
-                        str(row.get(col_contra_partida, ""))
-                        if col_contra_partida
-                        else ""
-                    )
-
-                    # Calcular valor: DEBITO ou CREDITO (o que tiver valor)
-                    valor_debito = 0.0
-                    valor_credito = 0.0
-                    if col_debito:
-                        try:
-                            val = row.get(col_debito, 0)
-                            if pd.notna(val):
-                                valor_debito = float(
-                                    str(val).replace(".", "").replace(",", ".") or 0
-                                )
-                        except (ValueError, TypeError):
-                            valor_debito = 0.0
-                    if col_credito:
-                        try:
-                            val = row.get(col_credito, 0)
-                            if pd.notna(val):
-                                valor_credito = float(
-                                    str(val).replace(".", "").replace(",", ".") or 0
-                                )
-                        except (ValueError, TypeError):
-                            valor_credito = 0.0
-
-                    # Valor é débito ou crédito (o que tiver)
-                    valor_lancamento = (
-                        valor_debito if valor_debito > 0 else valor_credito
-                    )
-                    tipo_lancamento = (
-                        "D"
-                        if valor_debito > 0
-                        else ("C" if valor_credito > 0 else "")
-                    )
-
-                    data_lancamento = (
-                        self._formatar_data(row.get(col_data, "")) if col_data else ""
-                    )
-                    documento = str(row.get(col_documento, "")) if col_documento else ""
-                    historico = str(row.get(col_historico, "")) if col_historico else ""
-
+                descricao_conta = nome if nome and nome != codigo else ""
+                for (
+                    item_conta,
+                    contra_partida,
+                    valor_lancamento,
+                    tipo_lancamento,
+                    data_lancamento,
+                    documento,
+                    historico,
+                ) in matches_codigo.itertuples(index=False, name=None):
                     # Determinar tipo de movimento baseado no histórico
                     tipo_movimento = self._classificar_tipo_movimento(
                         contra_partida, conta_analisada, historico
@@ -1150,8 +1985,8 @@ class AnaliseDiferencasService:
                     origens.append(
                         {
                             "conta_origem": conta_para_exibir,
-                            "descricao_conta": nome if nome and nome != codigo else "",
-                            "valor": round(valor_lancamento, 2),
+                            "descricao_conta": descricao_conta,
+                            "valor": valor_lancamento,
                             "tipo_lancamento": tipo_lancamento,
                             "data_lancamento": data_lancamento,
                             "documento": documento,
@@ -1185,6 +2020,15 @@ class AnaliseDiferencasService:
                 }
             )
 
+        logger.info(
+            "[ANÁLISE PROFUNDA] Lançamentos localizados por ITEMCONTA: %s, por código: %s, "
+            "por variação do código: %s, sem lançamentos: %s",
+            resolucoes["itemconta"],
+            resolucoes["codigo"],
+            resolucoes["variacao"],
+            resolucoes["sem_match"],
+        )
+
         # Estatísticas
         total = len(resultados)
         identificados = sum(
@@ -0,0 +1,141 @@
+"""
+Service de cache das bases normalizadas da conciliação contábil.
+
+O usuário costuma corrigir só a exportação do financeiro e reenviar, com a
+contabilidade e o razão geral iguais. Cada base normalizada fica guardada sob
+o hash do seu conteúdo, e a análise detalhada da execução (``EstadoAnalise``)
+sob os hashes da contabilidade, do razão e da conta: a re-execução normaliza
+apenas a base que mudou e recalcula apenas os códigos afetados.
+
+Camadas (até ``RECONCILIATION_BASE_CACHE_ENTRIES`` itens de cada tipo em
+cada uma, saindo os menos usados; 0 desativa):
+- memória: por processo do pool de conciliações, então só é aproveitada
+  quando a re-execução cai no mesmo processo;
+- disco (``RESULT_CACHE_DIR``, a mesma da ``CacheResultadoService``):
+  compartilhada entre os processos do pool e reinícios, em pickle sob
+  ``bases/<tipo>/``.
+"""
+import logging
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from core.config import settings
+from services.cache_resultado_service import hash_conteudo
+
+logger = logging.getLogger(__name__)
+
+# Tipos de item guardado
+BASE_FINANCEIRO = "financeiro"  # (agregado, detalhado)
+BASE_CONTABIL = "contabil"  # contabilidade normalizada
+BASE_RAZAO_GERAL = "razao_geral"  # DataFrame do razão geral
+ESTADO_ANALISE = "analise"  # EstadoAnalise da última execução completa
+
+
+class CacheBasesService:
+    """Service para guardar e recuperar bases normalizadas por hash do conteúdo."""
+
+    _itens: Dict[str, "OrderedDict[str, Any]"] = {}
+    _lock = threading.Lock()
+
+    def hash_base(self, tipo: str, registros: Any, *parametros: Any) -> str:
+        """
+        Hash dos registros de uma base (``BaseRegistros.conteudo``) e dos
+        parâmetros que afetam sua normalização.
+        """
+        return hash_conteudo(tipo, (("parametros", list(parametros)), ("registros", registros)))
+
+    def obter(self, tipo: str, chave: str) -> Optional[Any]:
+        """Retorna o item guardado, ou None."""
+        if settings.RECONCILIATION_BASE_CACHE_ENTRIES <= 0:
+            return None
+
+        with self._lock:
+            itens = self._itens.get(tipo)
+            if itens is not None and chave in itens:
+                itens.move_to_end(chave)
+                logger.info("[CACHE BASES] %s %s encontrado em memória", tipo, chave[:12])
+                return itens[chave]
+
+        valor = self._ler_disco(tipo, chave)
+        if valor is not None:
+            logger.info("[CACHE BASES] %s %s encontrado em disco", tipo, chave[:12])
+            self._guardar_memoria(tipo, chave, valor)
+            return valor
+
+        logger.info("[CACHE BASES] %s %s não encontrado (pid %s)", tipo, chave[:12], os.getpid())
+        return None
+
+    def guardar(self, tipo: str, chave: str, valor: Any) -> None:
+        """Guarda o item, descartando os menos usados do mesmo tipo acima do limite."""
+        if settings.RECONCILIATION_BASE_CACHE_ENTRIES <= 0:
+            return
+        self._guardar_memoria(tipo, chave, valor)
+        self._gravar_disco(tipo, chave, valor)
+
+    @classmethod
+    def _guardar_memoria(cls, tipo: str, chave: str, valor: Any) -> None:
+        limite = settings.RECONCILIATION_BASE_CACHE_ENTRIES
+        with cls._lock:
+            itens = cls._itens.setdefault(tipo, OrderedDict())
+            itens[chave] = valor
+            itens.move_to_end(chave)
+            while len(itens) > limite:
+                itens.popitem(last=False)
+
+    # ==================================================
+    # CAMADA EM DISCO
+    # ==================================================
+    def _diretorio_disco(self, tipo: str) -> Optional[Path]:
+        if not settings.RESULT_CACHE_DIR:
+            return None
+        return Path(settings.RESULT_CACHE_DIR) / "bases" / tipo
+
+    def _ler_disco(self, tipo: str, chave: str) -> Optional[Any]:
+        diretorio = self._diretorio_disco(tipo)
+        if diretorio is None:
+            return None
+        caminho = diretorio / f"{chave}.pkl"
+        try:
+            with caminho.open("rb") as arquivo:
+                valor = pickle.load(arquivo)
+            os.utime(caminho)  # marca o acesso para a ordem de descarte
+            return valor
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as e:
+            logger.warning("[CACHE BASES] Falha ao ler %s: %s", caminho, e)
+            return None
+
+    def _gravar_disco(self, tipo: str, chave: str, valor: Any) -> None:
+        diretorio = self._diretorio_disco(tipo)
+        if diretorio is None:
+            return
+        caminho = diretorio / f"{chave}.pkl"
+        try:
+            diretorio.mkdir(parents=True, exist_ok=True)
+            tmp = caminho.with_suffix(f".{os.getpid()}.tmp")
+            with tmp.open("wb") as arquivo:
+                pickle.dump(valor, arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, caminho)
+            self._limitar_disco(diretorio)
+        except (OSError, pickle.PicklingError) as e:
+            logger.warning("[CACHE BASES] Falha ao gravar %s: %s", caminho, e)
+
+    def _limitar_disco(self, diretorio: Path) -> None:
+        arquivos = []
+        for caminho in diretorio.glob("*.pkl"):
+            try:
+                arquivos.append((caminho.stat().st_mtime, caminho))
+            except FileNotFoundError:
+                continue
+
+        excedentes = len(arquivos) - settings.RECONCILIATION_BASE_CACHE_ENTRIES
+        for _, caminho in sorted(arquivos)[:max(0, excedentes)]:
+            try:
+                caminho.unlink()
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,194 @@
+"""
+Service de cache dos resultados de conciliação, endereçado por conteúdo.
+
+Durante a revisão o usuário reprocessa a mesma conciliação várias vezes
+(atualizar a tela, trocar de aba, antes de efetivar). O resultado depende
+apenas das bases e de poucos parâmetros, então é guardado sob um hash estável
+desse conteúdo e uma re-submissão idêntica devolve o JSON já serializado, sem
+passar pelo pandas nem pelo pool de conciliações.
+
+Camadas:
+- memória (por processo da API): LRU limitada por tamanho em bytes
+  (``RESULT_CACHE_MAX_MB``);
+- disco (opcional, ``RESULT_CACHE_DIR``): compartilhada entre processos e
+  reinícios, limitada por ``RESULT_CACHE_DISK_MAX_MB`` (saem os arquivos
+  acessados há mais tempo).
+
+Só entram no cache conciliações concluídas; o modo resumo da contábil não é
+cacheado (cada execução registra o seu próprio contexto).
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from core.config import settings
+from core.serializacao import serializar_json
+from schemas.conciliacao_bancaria_schema import RequestConciliacaoBancaria
+from schemas.conciliacao_schema import RequestConciliacao
+
+logger = logging.getLogger(__name__)
+
+# Incrementar quando a lógica da conciliação mudar o resultado para as mesmas
+# bases: invalida as entradas antigas (inclusive as do disco)
+VERSAO_CACHE = "2"
+
+
+def _atualizar_hash(hasher: "hashlib._Hash", nome: str, valor: Any) -> None:
+    conteudo = json.dumps(valor, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    hasher.update(nome.encode("utf-8"))
+    hasher.update(b"\x1e")
+    hasher.update(conteudo.encode("utf-8"))
+    hasher.update(b"\x1e")
+
+
+def hash_conteudo(tipo: str, partes: Iterable[tuple]) -> str:
+    """Hash estável (SHA-256) das partes (nome, valor) serializadas em JSON canônico."""
+    hasher = hashlib.sha256()
+    _atualizar_hash(hasher, "versao", f"{tipo}:{VERSAO_CACHE}")
+    for nome, valor in partes:
+        _atualizar_hash(hasher, nome, valor)
+    return hasher.hexdigest()
+
+
+class CacheResultadoService:
+    """Service para guardar e recuperar resultados de conciliação por hash do conteúdo."""
+
+    _memoria: "OrderedDict[str, bytes]" = OrderedDict()
+    _bytes_memoria = 0
+    _lock = threading.Lock()
+
+    # ==================================================
+    # CHAVES
+    # ==================================================
+    def chave_contabil(self, request: RequestConciliacao) -> str:
+        """Hash das bases e dos parâmetros que afetam a conciliação contábil."""
+        parametros = request.parametros or {}
+        tipo_financeiro = request.base_origem.tipo or parametros.get("tipo_financeiro", "contas_receber")
+        return hash_conteudo(
+            "contabil",
+            (
+                ("tipo_financeiro", tipo_financeiro),
+                ("conta_contabil", request.base_contabil_filtrada.conta_contabil),
+                ("base_origem", request.base_origem.conteudo),
+                ("base_contabil_filtrada", request.base_contabil_filtrada.conteudo),
+                ("base_contabil_geral", request.base_contabil_geral.conteudo),
+            ),
+        )
+
+    def chave_bancaria(self, request: RequestConciliacaoBancaria) -> str:
+        """Hash das bases e dos parâmetros que afetam a conciliação bancária."""
+        return hash_conteudo(
+            "bancaria",
+            (
+                ("data_base", request.parametros.data_base),
+                ("conta_contabil", request.base_razao.conta_contabil),
+                ("base_extrato", request.base_extrato.conteudo),
+                ("base_razao", request.base_razao.conteudo),
+            ),
+        )
+
+    # ==================================================
+    # LEITURA / ESCRITA
+    # ==================================================
+    def obter(self, chave: str) -> Optional[bytes]:
+        """Retorna o JSON serializado do resultado, ou None se não está em cache."""
+        with self._lock:
+            conteudo = self._memoria.get(chave)
+            if conteudo is not None:
+                self._memoria.move_to_end(chave)
+                logger.info("[CACHE] Resultado %s encontrado em memória", chave[:12])
+                return conteudo
+
+        conteudo = self._ler_disco(chave)
+        if conteudo is not None:
+            logger.info("[CACHE] Resultado %s encontrado em disco", chave[:12])
+            self._guardar_memoria(chave, conteudo)
+        return conteudo
+
+    def guardar(self, chave: str, resultado: Dict[str, Any]) -> bytes:
+        """Serializa o resultado, guarda nas camadas e retorna o JSON serializado."""
+        conteudo = serializar_json(resultado)
+        self._guardar_memoria(chave, conteudo)
+        self._gravar_disco(chave, conteudo)
+        return conteudo
+
+    @classmethod
+    def _guardar_memoria(cls, chave: str, conteudo: bytes) -> None:
+        limite = settings.RESULT_CACHE_MAX_MB * 1024 * 1024
+        if len(conteudo) > limite:
+            logger.info("[CACHE] Resultado %s maior que o cache em memória; não guardado", chave[:12])
+            return
+
+        with cls._lock:
+            anterior = cls._memoria.pop(chave, None)
+            if anterior is not None:
+                cls._bytes_memoria -= len(anterior)
+            cls._memoria[chave] = conteudo
+            cls._bytes_memoria += len(conteudo)
+            while cls._bytes_memoria > limite:
+                _, descartado = cls._memoria.popitem(last=False)
+                cls._bytes_memoria -= len(descartado)
+
+    # ==================================================
+    # CAMADA EM DISCO
+    # ==================================================
+    def _caminho_disco(self, chave: str) -> Optional[Path]:
+        if not settings.RESULT_CACHE_DIR:
+            return None
+        return Path(settings.RESULT_CACHE_DIR) / chave[:2] / f"{chave}.json"
+
+    def _ler_disco(self, chave: str) -> Optional[bytes]:
+        caminho = self._caminho_disco(chave)
+        if caminho is None:
+            return None
+        try:
+            conteudo = caminho.read_bytes()
+            os.utime(caminho)  # marca o acesso para a ordem de descarte
+            return conteudo
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning("[CACHE] Falha ao ler %s: %s", caminho, e)
+            return None
+
+    def _gravar_disco(self, chave: str, conteudo: bytes) -> None:
+        caminho = self._caminho_disco(chave)
+        if caminho is None:
+            return
+        try:
+            caminho.parent.mkdir(parents=True, exist_ok=True)
+            tmp = caminho.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_bytes(conteudo)
+            os.replace(tmp, caminho)
+            self._limitar_disco()
+        except OSError as e:
+            logger.warning("[CACHE] Falha ao gravar %s: %s", caminho, e)
+
+    def _limitar_disco(self) -> None:
+        limite = settings.RESULT_CACHE_DISK_MAX_MB * 1024 * 1024
+        arquivos = []
+        total = 0
+        for caminho in Path(settings.RESULT_CACHE_DIR).glob("*/*.json"):
+            try:
+                info = caminho.stat()
+            except FileNotFoundError:
+                continue
+            arquivos.append((info.st_mtime, info.st_size, caminho))
+            total += info.st_size
+
+        if total <= limite:
+            return
+
+        for _, tamanho, caminho in sorted(arquivos):
+            try:
+                caminho.unlink()
+            except FileNotFoundError:
+                pass
+            total -= tamanho
+            if total <= limite:
+                break
@@ -5,16 +5,20 @@ Orquestra o fluxo de conciliacao entre extrato bancario (FINR470)
 e razao contabil de banco (CTBR400).
 """
 
+import hashlib
 import logging
 from datetime import datetime
-from typing import Dict, Any
+from typing import Any, Callable, Dict, Optional, Tuple
 
-import pandas as pd
-
-from schemas.conciliacao_bancaria_schema import RequestConciliacaoBancaria
+from schemas.conciliacao_bancaria_schema import (
+    BaseExtratoBancario,
+    BaseRazaoBanco,
+    RequestConciliacaoBancaria,
+)
 from tools.banco.extrato_bancario import normalizar_extrato_bancario
 from tools.banco.razao_banco import normalizar_razao_banco
 from tools.banco.calc_diferencas_banco import calcular_diferencas_bancarias
+from tools.planilhas import ler_planilha
 
 logger = logging.getLogger(__name__)
 
@@ -24,10 +28,10 @@ class ConciliacaoBancariaService:
 
     def validar_dados(self, request: RequestConciliacaoBancaria) -> tuple[bool, str]:
         """Valida os dados de entrada."""
-        if not request.base_extrato or not request.base_extrato.registros:
+        if not request.base_extrato or not request.base_extrato.quantidade:
             return False, "Base do extrato bancario vazia"
 
-        if not request.base_razao or not request.base_razao.registros:
+        if not request.base_razao or not request.base_razao.quantidade:
             return False, "Base do razao contabil vazia"
 
         if not request.parametros or not request.parametros.data_base:
@@ -35,7 +39,11 @@ class ConciliacaoBancariaService:
 
         return True, ""
 
-    def executar(self, request: RequestConciliacaoBancaria) -> Dict[str, Any]:
+    def executar(
+        self,
+        request: RequestConciliacaoBancaria,
+        progresso: Optional[Callable[[int, str], None]] = None,
+    ) -> Dict[str, Any]:
         """
         Executa a conciliacao bancaria agrupada por dia.
 
@@ -45,9 +53,15 @@ class ConciliacaoBancariaService:
         3. Agrupa por dia e calcula diferencas
         4. Gera relatorio
 
+        Args:
+            request: Dados da conciliacao
+            progresso: Chamado com (percentual, etapa) no inicio de cada etapa
+                (usado pelos jobs assincronos)
+
         Returns:
             Dict com relatorio completo da conciliacao
         """
+        informar = progresso or (lambda percentual, etapa: None)
         logger.info("=" * 50)
         logger.info("CONCILIACAO BANCARIA - INICIO")
         logger.info("=" * 50)
@@ -56,8 +70,9 @@ class ConciliacaoBancariaService:
         # 1. NORMALIZAR EXTRATO
         # ==========================
         logger.info("[1/3] Normalizando extrato bancario (FINR470)")
+        informar(10, "Normalizando extrato bancario")
 
-        df_extrato_raw = pd.DataFrame(request.base_extrato.registros)
+        df_extrato_raw = request.base_extrato.para_dataframe()
         logger.info(f"   Registros recebidos: {len(df_extrato_raw)}")
 
         try:
@@ -71,8 +86,9 @@ class ConciliacaoBancariaService:
         # 2. NORMALIZAR RAZAO
         # ==========================
         logger.info("[2/3] Normalizando razao contabil (CTBR400)")
+        informar(35, "Normalizando razao contabil")
 
-        df_razao_raw = pd.DataFrame(request.base_razao.registros)
+        df_razao_raw = request.base_razao.para_dataframe()
         logger.info(f"   Registros recebidos: {len(df_razao_raw)}")
 
         try:
@@ -86,6 +102,7 @@ class ConciliacaoBancariaService:
         # 3. CALCULAR DIFERENCAS POR DIA
         # ==========================
         logger.info("[3/3] Calculando diferencas por dia")
+        informar(60, "Calculando diferencas por dia")
 
         resultado = calcular_diferencas_bancarias(
             df_extrato=df_extrato,
@@ -167,3 +184,45 @@ class ConciliacaoBancariaService:
             alertas.append("Conciliacao OK - Todos os dias conferem")
 
         return alertas
+
+
+def processar_conciliacao_bancaria(request: RequestConciliacaoBancaria) -> Dict[str, Any]:
+    """Ponto de entrada no pool de conciliacoes (ver ``core.executor``)."""
+    return ConciliacaoBancariaService().executar(request)
+
+
+def processar_conciliacao_bancaria_planilhas(
+    arquivo_extrato: Tuple[str, bytes],
+    arquivo_razao: Tuple[str, bytes],
+    conta_contabil: str,
+    data_base: str,
+    empresa_id: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Ponto de entrada no pool de conciliacoes para planilhas enviadas direto:
+    le o extrato e o razao ((nome, conteudo)) e processa. Aceita tambem
+    Parquet e Arrow IPC (ver ``tools.planilhas``).
+
+    Raises:
+        ValueError: Planilha ilegivel ou dados invalidos
+    """
+    def base(classe, arquivo: Tuple[str, bytes], **campos):
+        nome, conteudo = arquivo
+        try:
+            df = ler_planilha(conteudo, nome)
+        except Exception as e:
+            raise ValueError(f"Nao foi possivel ler a planilha '{nome}': {e}")
+        logger.info(f"Planilha {nome} lida: {len(df)} linhas")
+        return classe.de_dataframe(df, hashlib.sha256(conteudo).hexdigest(), **campos)
+
+    request = RequestConciliacaoBancaria(
+        base_extrato=base(BaseExtratoBancario, arquivo_extrato),
+        base_razao=base(BaseRazaoBanco, arquivo_razao, conta_contabil=conta_contabil),
+        parametros={"data_base": data_base, "empresa_id": empresa_id},
+    )
+
+    service = ConciliacaoBancariaService()
+    valido, mensagem = service.validar_dados(request)
+    if not valido:
+        raise ValueError(mensagem)
+    return service.executar(request)
@@ -1,11 +1,34 @@
-﻿import logging
+﻿import hashlib
+import logging
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import Any, Callable, List, Optional
 
 import pandas as pd
 
-from schemas.conciliacao_schema import RequestConciliacao
-from services.analise_diferencas_service import AnaliseDiferencasService
+from core.config import settings
+from core.serializacao import serializar_json
+from schemas.conciliacao_schema import (
+    BaseContabilFiltrada,
+    BaseContabilGeral,
+    BaseOrigem,
+    RequestConciliacao,
+)
+from services.analise_diferencas_service import AnaliseDiferencasService, ContextoAnalise
+from services.cache_bases_service import (
+    BASE_CONTABIL,
+    BASE_FINANCEIRO,
+    BASE_RAZAO_GERAL,
+    ESTADO_ANALISE,
+    CacheBasesService,
+)
+from services.execucao_analise_service import ExecucaoAnaliseService
+from services.upload_planilha_service import (
+    ARQUIVO_CONTABIL_FILTRADO,
+    ARQUIVO_CONTABIL_GERAL,
+    ARQUIVO_ORIGEM,
+    UploadPlanilhaService,
+)
 from tools.calc_diferencas import calcular_diferencas
 from tools.contabilidade import normalizar_planilha_contabilidade
 from tools.financeiro import (
@@ -15,12 +38,32 @@ from tools.financeiro import (
 from tools.financeiro.factory import (
     get_processador_por_nome,
     TipoFinanceiro,
-    validar_layout_planilha,
 )
 from tools.mappers import map_origem_maior
+from tools.planilhas import iterar_planilha, ler_planilha
 
 logger = logging.getLogger(__name__)
 
+@dataclass
+class DiferencasConciliacao:
+    """Bases normalizadas, diferenças e resumo de uma conciliação (etapas 1 a 6)."""
+    conta_contabil: str
+    financeiro_norm: pd.DataFrame
+    financeiro_detalhado: pd.DataFrame
+    contabil_norm: pd.DataFrame
+    hash_contabil: str
+    df_completo: pd.DataFrame
+    resumo: dict
+    diferencas_origem_maior: list
+    diferencas_contabilidade_maior: list
+    percentual_divergencia: float
+    diferenca: float
+
+
+# Modos da análise detalhada
+MODO_ANALISE_COMPLETO = "completo"
+MODO_ANALISE_RESUMO = "resumo"  # só cabeçalhos; detalhes por código sob demanda
+
 
 class ConciliacaoService:
 
@@ -28,13 +71,13 @@ class ConciliacaoService:
     # VALIDAÇÃO
     # ==================================================
     def validar_dados(self, request: RequestConciliacao) -> tuple[bool, str]:
-        if not request.base_origem or not request.base_origem.registros:
+        if not request.base_origem or not request.base_origem.quantidade:
             return False, "Base de origem vazia"
 
-        if not request.base_contabil_filtrada or not request.base_contabil_filtrada.registros:
+        if not request.base_contabil_filtrada or not request.base_contabil_filtrada.quantidade:
             return False, "Base contábil filtrada vazia"
 
-        if not request.base_contabil_geral or not request.base_contabil_geral.registros:
+        if not request.base_contabil_geral or request.base_contabil_geral.vazia:
             return False, "Base geral da contabilidade vazia"
 
         if not request.parametros or not request.parametros.get("data_base"):
@@ -42,19 +85,21 @@ class ConciliacaoService:
 
         return True, ""
 
+    def _coluna_conta_razao(self, df_razao: pd.DataFrame) -> Optional[str]:
+        colunas_candidatas = ["conta_contabil", "Conta Contábil", "conta"]
+        return next((c for c in colunas_candidatas if c in df_razao.columns), None)
+
     def _filtrar_razao_por_conta(self, df_razao: pd.DataFrame, conta_contabil: str) -> pd.DataFrame:
         """Filtra o razão pela conta contábil sendo conciliada, se a coluna existir."""
         if df_razao.empty:
             return df_razao
 
-        colunas_candidatas = ["conta_contabil", "Conta Contábil", "conta"]
-        coluna_conta: Optional[str] = next((c for c in colunas_candidatas if c in df_razao.columns), None)
-
+        coluna_conta = self._coluna_conta_razao(df_razao)
         if not coluna_conta:
             logger.info("[ANÁLISE DETALHADA] Coluna de conta não encontrada no razão; usando razão completo")
             return df_razao
 
-        df_filtrado = df_razao[df_razao[coluna_conta].astype(str) == str(conta_contabil)].copy()
+        df_filtrado = df_razao[df_razao[coluna_conta].astype(str) == str(conta_contabil)]
         logger.info(
             "[ANÁLISE DETALHADA] Razão filtrado por conta %s: %s -> %s registros",
             conta_contabil,
@@ -87,20 +132,56 @@ class ConciliacaoService:
         logger.info("[ANÁLISE DETALHADA] Resumo fallback: %s", resumo)
         return resumo
 
-    # ==================================================
-    # EXECUÇÃO PRINCIPAL
-    # ==================================================
-    def executar(self, request: RequestConciliacao) -> dict:
-        """
-        Retorna dict para compatibilidade com o frontend.
-        """
-        logger.info("⚙️ Executando conciliação contábil")
+    def _normalizar_financeiro(
+        self, df_financeiro_raw: pd.DataFrame, tipo_financeiro: str
+    ) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """Valida o layout e normaliza o financeiro (agregado e detalhado) em uma única passada."""
+        # Validar layout e normalizar em uma única passada via factory
+        # (o detalhado e o agregado saem da mesma base normalizada)
+        processador = get_processador_por_nome(tipo_financeiro)
+        try:
+            normalizacao = processador.normalizar_completo(df_financeiro_raw)
+        except ValueError as e:
+            # Se for erro de layout, propagar com mensagem clara
+            if "coluna" in str(e).lower() or "encontrada" in str(e).lower():
+                raise ValueError(f"Erro no layout do arquivo financeiro: {str(e)}")
+            # Fallback para o método legado (contas a receber)
+            logger.warning("⚠️ Falha no processador '%s' (%s), usando processador padrão (contas_receber)", tipo_financeiro, e)
+            financeiro_norm = normalizar_planilha_financeira(df_financeiro_raw)
+            financeiro_detalhado = normalizar_planilha_financeira_detalhada(df_financeiro_raw)
+            logger.info("✅ Financeiro normalizado (legado): %s registros", len(financeiro_norm))
+        else:
+            validacao_layout = normalizacao.validacao
+            if not validacao_layout.valido:
+                logger.error("❌ Layout inválido: %s", validacao_layout.mensagem)
+                raise ValueError(
+                    f"Layout do arquivo financeiro inválido: {validacao_layout.mensagem} "
+                    f"Colunas encontradas no arquivo: {validacao_layout.colunas_arquivo}"
+                )
+
+            if validacao_layout.avisos:
+                for aviso in validacao_layout.avisos:
+                    logger.warning("⚠️ %s", aviso)
+
+            financeiro_norm = normalizacao.agregado
+            financeiro_detalhado = normalizacao.detalhado
+            logger.info("✅ %s normalizado via factory: %s registros", tipo_financeiro.upper(), len(financeiro_norm))
+
+        return financeiro_norm, financeiro_detalhado
 
+    def _calcular_diferencas(
+        self,
+        request: RequestConciliacao,
+        informar: Callable[[int, str], None],
+        cache_bases: CacheBasesService,
+    ) -> DiferencasConciliacao:
+        """Etapas 1 a 6: normaliza as bases, calcula e mapeia as diferenças e o resumo."""
         # ==========================
         # 1️⃣ NORMALIZAR FINANCEIRO
         # ==========================
-        df_financeiro_raw = pd.DataFrame(request.base_origem.registros)
-        logger.info("📊 Registros origem recebidos: %s", len(df_financeiro_raw))
+        informar(5, "Normalizando financeiro")
+        base_origem = request.base_origem
+        logger.info("📊 Registros origem recebidos: %s", base_origem.quantidade)
 
         # Detectar tipo financeiro (contas_receber ou contas_pagar)
         tipo_financeiro = request.parametros.get("tipo_financeiro", "contas_receber")
@@ -109,47 +190,37 @@ class ConciliacaoService:
             tipo_financeiro = request.base_origem.tipo
         logger.info("📋 Tipo financeiro: %s", tipo_financeiro)
 
-        # Validar layout do arquivo financeiro ANTES de processar
-        validacao_layout = validar_layout_planilha(df_financeiro_raw, tipo_financeiro)
-        if not validacao_layout.valido:
-            logger.error("❌ Layout inválido: %s", validacao_layout.mensagem)
-            raise ValueError(
-                f"Layout do arquivo financeiro inválido: {validacao_layout.mensagem} "
-                f"Colunas encontradas no arquivo: {validacao_layout.colunas_arquivo}"
+        # Base igual à de uma execução anterior: reaproveita a normalização
+        hash_financeiro = cache_bases.hash_base(BASE_FINANCEIRO, base_origem.conteudo, tipo_financeiro)
+        financeiro_cache = cache_bases.obter(BASE_FINANCEIRO, hash_financeiro)
+        if financeiro_cache is not None:
+            financeiro_norm, financeiro_detalhado = financeiro_cache
+        else:
+            financeiro_norm, financeiro_detalhado = self._normalizar_financeiro(
+                base_origem.para_dataframe(), tipo_financeiro
+            )
+            cache_bases.guardar(
+                BASE_FINANCEIRO, hash_financeiro, (financeiro_norm, financeiro_detalhado)
             )
-
-        if validacao_layout.avisos:
-            for aviso in validacao_layout.avisos:
-                logger.warning("⚠️ %s", aviso)
-
-        # Usar o processador apropriado via factory
-        try:
-            processador = get_processador_por_nome(tipo_financeiro)
-            financeiro_norm = processador.normalizar(df_financeiro_raw)
-            financeiro_detalhado = processador.normalizar_detalhado(df_financeiro_raw)
-            logger.info("✅ %s normalizado via factory: %s registros", tipo_financeiro.upper(), len(financeiro_norm))
-        except ValueError as e:
-            # Se for erro de layout, propagar com mensagem clara
-            if "coluna" in str(e).lower() or "encontrada" in str(e).lower():
-                raise ValueError(f"Erro no layout do arquivo financeiro: {str(e)}")
-            # Fallback para o método legado (contas a receber) se tipo não reconhecido
-            logger.warning("⚠️ Tipo '%s' não reconhecido, usando processador padrão (contas_receber)", tipo_financeiro)
-            financeiro_norm = normalizar_planilha_financeira(df_financeiro_raw)
-            financeiro_detalhado = normalizar_planilha_financeira_detalhada(df_financeiro_raw)
-            logger.info("✅ Financeiro normalizado (legado): %s registros", len(financeiro_norm))
 
         # ==========================
         # 2️⃣ NORMALIZAR CONTABILIDADE
         # ==========================
-        df_contabil_raw = pd.DataFrame(request.base_contabil_filtrada.registros)
-        logger.info("📊 Registros contábeis recebidos: %s", len(df_contabil_raw))
-
-        contabil_norm = normalizar_planilha_contabilidade(df_contabil_raw)
+        informar(25, "Normalizando contabilidade")
+        base_contabil = request.base_contabil_filtrada
+        logger.info("📊 Registros contábeis recebidos: %s", base_contabil.quantidade)
+
+        hash_contabil = cache_bases.hash_base(BASE_CONTABIL, base_contabil.conteudo)
+        contabil_norm = cache_bases.obter(BASE_CONTABIL, hash_contabil)
+        if contabil_norm is None:
+            contabil_norm = normalizar_planilha_contabilidade(base_contabil.para_dataframe())
+            cache_bases.guardar(BASE_CONTABIL, hash_contabil, contabil_norm)
         logger.info("✅ Contabilidade normalizada: %s registros", len(contabil_norm))
 
         # ==========================
         # 3️⃣ CALCULAR DIFERENÇAS
         # ==========================
+        informar(35, "Calculando diferenças")
         resultado = calcular_diferencas(
             df_financeiro=financeiro_norm,
             df_contabilidade=contabil_norm,
@@ -167,11 +238,11 @@ class ConciliacaoService:
         # ==========================
         df_origem_maior = df_completo[
             df_completo["Tipo Diferença"] == "Financeiro > Contabilidade"
-        ].copy()
+        ]
 
         df_contabil_maior = df_completo[
             df_completo["Tipo Diferença"] == "Contabilidade > Financeiro"
-        ].copy()
+        ]
 
         logger.info("📊 Diferenças Origem > Contábil: %s", len(df_origem_maior))
         logger.info("📊 Diferenças Contábil > Origem: %s", len(df_contabil_maior))
@@ -238,25 +309,216 @@ class ConciliacaoService:
 
         logger.info("✅ Resumo final: %s", resumo)
 
+        return DiferencasConciliacao(
+            conta_contabil=conta_contabil,
+            financeiro_norm=financeiro_norm,
+            financeiro_detalhado=financeiro_detalhado,
+            contabil_norm=contabil_norm,
+            hash_contabil=hash_contabil,
+            df_completo=df_completo,
+            resumo=resumo,
+            diferencas_origem_maior=diferencas_origem_maior,
+            diferencas_contabilidade_maior=diferencas_contabilidade_maior,
+            percentual_divergencia=percentual_divergencia,
+            diferenca=diferenca,
+        )
+
+    def _carregar_razao_geral(
+        self,
+        request: RequestConciliacao,
+        cache_bases: CacheBasesService,
+        diferencas: DiferencasConciliacao,
+    ) -> tuple[pd.DataFrame, str]:
+        """
+        DataFrame do razão geral (reaproveitado se a base não mudou) e a chave
+        que o identifica no cache.
+
+        Razão enviado como planilha (base em lotes) é lido lote a lote e fica só
+        com as linhas que a análise dos códigos da conciliação pode usar (ver
+        ``_ler_razao_geral_relevante``); a chave inclui a conta e esses códigos,
+        já que o DataFrame muda com eles.
+        """
+        base_razao = request.base_contabil_geral
+        hash_razao = cache_bases.hash_base(BASE_RAZAO_GERAL, base_razao.conteudo)
+        if not base_razao.em_lotes:
+            df_razao_geral = cache_bases.obter(BASE_RAZAO_GERAL, hash_razao)
+            if df_razao_geral is None:
+                df_razao_geral = base_razao.para_dataframe()
+                cache_bases.guardar(BASE_RAZAO_GERAL, hash_razao, df_razao_geral)
+            return df_razao_geral, hash_razao
+
+        codigos = sorted(
+            {
+                str(codigo).strip()
+                for df in (
+                    diferencas.financeiro_norm,
+                    diferencas.financeiro_detalhado,
+                    diferencas.contabil_norm,
+                )
+                if df is not None and "codigo" in df.columns
+                for codigo in df["codigo"].tolist()
+            }
+        )
+        chave = cache_bases.hash_base(
+            BASE_RAZAO_GERAL, base_razao.conteudo, diferencas.conta_contabil, codigos
+        )
+        df_razao_geral = cache_bases.obter(BASE_RAZAO_GERAL, chave)
+        if df_razao_geral is None:
+            df_razao_geral = self._ler_razao_geral_relevante(
+                base_razao, codigos, diferencas.conta_contabil
+            )
+            cache_bases.guardar(BASE_RAZAO_GERAL, chave, df_razao_geral)
+        return df_razao_geral, chave
+
+    def _ler_razao_geral_relevante(
+        self, base_razao: BaseContabilGeral, codigos: List[str], conta_contabil: str
+    ) -> pd.DataFrame:
+        """
+        Lê o razão geral em lotes e acumula só as linhas relevantes: as que a
+        análise dos ``codigos`` busca (``linhas_relevantes_razao_geral``) e as
+        da conta conciliada (``_filtrar_razao_por_conta``).
+
+        A memória fica limitada ao lote corrente mais as linhas relevantes, não
+        ao tamanho do arquivo. As linhas descartadas não casam com nenhum código
+        e não mudam a análise; se nenhuma sobrar, a primeira linha é mantida
+        para o razão seguir disponível (não vazio), como na leitura completa.
+        """
+        analise_service = AnaliseDiferencasService()
+        chaves = analise_service.chaves_razao_geral(codigos)
+        relevantes: List[pd.DataFrame] = []
+        primeiro_lote: Optional[pd.DataFrame] = None
+        total = 0
+        for lote in base_razao.iterar_lotes():
+            if primeiro_lote is None or primeiro_lote.empty:
+                primeiro_lote = lote.iloc[:1]
+            total += len(lote)
+
+            mascara = analise_service.linhas_relevantes_razao_geral(lote, chaves)
+            coluna_conta = self._coluna_conta_razao(lote)
+            if coluna_conta:
+                mascara |= (lote[coluna_conta].astype(str) == str(conta_contabil)).to_numpy()
+            if mascara.any():
+                relevantes.append(lote[mascara])
+
+        if relevantes:
+            df_razao_geral = pd.concat(relevantes) if len(relevantes) > 1 else relevantes[0]
+        else:
+            df_razao_geral = primeiro_lote if primeiro_lote is not None else pd.DataFrame()
+        logger.info(
+            "📄 Razão geral lido em lotes: %s linhas, %s relevantes para %s códigos",
+            total,
+            len(df_razao_geral) if relevantes else 0,
+            len(codigos),
+        )
+        return df_razao_geral
+
+    def _observacoes(self, diferencas: DiferencasConciliacao, total_analise_profunda: int) -> list:
+        return [
+            f"Total de {len(diferencas.diferencas_origem_maior)} registros onde origem > contabilidade",
+            f"Total de {len(diferencas.diferencas_contabilidade_maior)} registros onde contabilidade > origem",
+            f"Percentual de divergência: {diferencas.percentual_divergencia:.2f}%",
+            f"Total de {total_analise_profunda} registros SO_CONTABILIDADE analisados em profundidade",
+        ]
+
+    def _alertas(self, diferencas: DiferencasConciliacao) -> list:
+        return [
+            "⚠️ Verificar diferenças significativas"
+            if abs(diferencas.diferenca) > 1000
+            else "✅ Diferenças dentro do esperado"
+        ]
+
+    # ==================================================
+    # EXECUÇÃO PRINCIPAL
+    # ==================================================
+    def executar(
+        self, request: RequestConciliacao, modo_analise: str = MODO_ANALISE_COMPLETO
+    ) -> dict:
+        """
+        Retorna dict para compatibilidade com o frontend.
+
+        No modo resumo, ``analise_detalhada`` traz apenas os cabeçalhos por código,
+        a análise profunda não é gerada e o retorno inclui ``execucao_id`` para o
+        detalhamento sob demanda (``detalhar_codigo``).
+        """
+        retorno, contexto = self.processar(request, modo_analise)
+        return self.registrar_execucao(retorno, contexto)
+
+    def registrar_execucao(
+        self, retorno: dict, contexto: Optional[ContextoAnalise]
+    ) -> dict:
+        """
+        Grava o contexto do modo resumo no volume compartilhado e inclui o
+        ``execucao_id`` (no processo do pool, para o contexto não voltar à API).
+        """
+        if contexto is not None:
+            retorno["execucao_id"] = ExecucaoAnaliseService().registrar(contexto)
+        return retorno
+
+    def processar(
+        self,
+        request: RequestConciliacao,
+        modo_analise: str = MODO_ANALISE_COMPLETO,
+        progresso: Optional[Callable[[int, str], None]] = None,
+    ) -> tuple[dict, Optional[ContextoAnalise]]:
+        """
+        Executa a conciliação sem registrar a execução.
+
+        Retorna o dict do relatório e, no modo resumo, o contexto da análise
+        (a ser registrado no processo que atende o detalhamento).
+
+        ``progresso(percentual, etapa)``, se informado, é chamado no início de
+        cada etapa (usado pelos jobs assíncronos).
+        """
+        logger.info("⚙️ Executando conciliação contábil")
+        informar = progresso or (lambda percentual, etapa: None)
+
+        cache_bases = CacheBasesService()
+        diferencas = self._calcular_diferencas(request, informar, cache_bases)
+        conta_contabil = diferencas.conta_contabil
+        financeiro_norm = diferencas.financeiro_norm
+        financeiro_detalhado = diferencas.financeiro_detalhado
+        contabil_norm = diferencas.contabil_norm
+        df_completo = diferencas.df_completo
+
         # ==========================
         # 7️⃣ ANÁLISE DETALHADA (RESTAURO)
         # ==========================
+        informar(45, "Gerando análise detalhada")
         analise_detalhada = []
         analise_profunda_contabil = []
+        contexto = None
         resumo_analise = self._gerar_resumo_analise_fallback(df_completo)
         try:
-            df_razao_geral = pd.DataFrame(request.base_contabil_geral.registros)
+            df_razao_geral, chave_razao = self._carregar_razao_geral(
+                request, cache_bases, diferencas
+            )
             df_razao_filtrado = self._filtrar_razao_por_conta(df_razao_geral, conta_contabil)
 
             analise_service = AnaliseDiferencasService()
-            analise_detalhada = analise_service.processar_analise_detalhada(
-                df_financeiro=financeiro_norm,
-                df_contabilidade_filtrada=contabil_norm,
-                df_razao_contabil=df_razao_filtrado,
-                df_financeiro_detalhado=financeiro_detalhado,
-                df_razao_geral=df_razao_geral,
-                conta_contabil=conta_contabil,
-            )
+            if modo_analise == MODO_ANALISE_RESUMO:
+                contexto_resumo = analise_service.preparar_contexto_analise(
+                    df_financeiro=financeiro_norm,
+                    df_contabilidade_filtrada=contabil_norm,
+                    df_razao_contabil=df_razao_filtrado,
+                    df_financeiro_detalhado=financeiro_detalhado,
+                    df_razao_geral=df_razao_geral,
+                    conta_contabil=conta_contabil,
+                )
+                analise_detalhada = analise_service.gerar_cabecalhos_analise(contexto_resumo)
+                contexto = contexto_resumo
+            else:
+                # Mesmas contabilidade, razão (o DataFrame analisado) e conta de uma
+                # execução anterior: só os códigos cujo financeiro mudou são recalculados
+                chave_estado = f"{diferencas.hash_contabil}:{chave_razao}:{conta_contabil}"
+                analise_detalhada, estado_analise = analise_service.processar_analise_incremental(
+                    anterior=cache_bases.obter(ESTADO_ANALISE, chave_estado),
+                    df_financeiro=financeiro_norm,
+                    df_contabilidade_filtrada=contabil_norm,
+                    df_razao_contabil=df_razao_filtrado,
+                    df_financeiro_detalhado=financeiro_detalhado,
+                    df_razao_geral=df_razao_geral,
+                    conta_contabil=conta_contabil,
+                )
 
             if analise_detalhada:
                 resumo_analise = analise_service.gerar_resumo_analise(analise_detalhada)
@@ -277,18 +539,23 @@ class ConciliacaoService:
             ]
             logger.info("🔍 Registros SO_CONTABILIDADE encontrados: %s", len(registros_so_contabilidade))
 
-            if registros_so_contabilidade:
+            if registros_so_contabilidade and modo_analise != MODO_ANALISE_RESUMO:
+                informar(75, "Analisando lançamentos SO_CONTABILIDADE")
                 logger.info(
                     "🔍 Iniciando análise profunda de %s registros SO_CONTABILIDADE",
                     len(registros_so_contabilidade)
                 )
-                analise_profunda_contabil = analise_service.analisar_so_contabilidade_profundo(
+                analise_profunda_contabil = analise_service.analisar_so_contabilidade_incremental(
                     registros_so_contabilidade=registros_so_contabilidade,
                     df_razao_geral=df_razao_geral,  # Usa razão geral COMPLETO para buscar origens
                     conta_analisada=conta_contabil,
+                    estado=estado_analise,
                 )
                 logger.info("✅ Análise profunda concluída: %s registros", len(analise_profunda_contabil))
 
+            if modo_analise != MODO_ANALISE_RESUMO:
+                cache_bases.guardar(ESTADO_ANALISE, chave_estado, estado_analise)
+
         except Exception as exc:
             logger.error("❌ Falha ao gerar análise detalhada: %s", exc, exc_info=True)
 
@@ -296,32 +563,217 @@ class ConciliacaoService:
         # 8️⃣ RETORNO FINAL (DICT)
         # ==========================
         retorno = {
-            "resumo": resumo,
-            "diferencas_origem_maior": diferencas_origem_maior,
-            "diferencas_contabilidade_maior": diferencas_contabilidade_maior,
+            "resumo": diferencas.resumo,
+            "diferencas_origem_maior": diferencas.diferencas_origem_maior,
+            "diferencas_contabilidade_maior": diferencas.diferencas_contabilidade_maior,
             "analise_detalhada": analise_detalhada,
             "resumo_analise": resumo_analise,
             "analise_profunda_contabil": analise_profunda_contabil,
-            "observacoes": [
-                f"Total de {len(diferencas_origem_maior)} registros onde origem > contabilidade",
-                f"Total de {len(diferencas_contabilidade_maior)} registros onde contabilidade > origem",
-                f"Percentual de divergência: {percentual_divergencia:.2f}%",
-                f"Total de {len(analise_profunda_contabil)} registros SO_CONTABILIDADE analisados em profundidade",
-            ],
-            "alertas": [
-                "⚠️ Verificar diferenças significativas"
-                if abs(diferenca) > 1000
-                else "✅ Diferenças dentro do esperado"
-            ],
+            "observacoes": self._observacoes(diferencas, len(analise_profunda_contabil)),
+            "alertas": self._alertas(diferencas),
         }
 
         logger.info("✅ Conciliação executada com sucesso")
         logger.info(
             "📦 Retorno final com %s origem_maior, %s contabil_maior, %s análise_detalhada, %s análise_profunda",
-            len(diferencas_origem_maior),
-            len(diferencas_contabilidade_maior),
+            len(diferencas.diferencas_origem_maior),
+            len(diferencas.diferencas_contabilidade_maior),
             len(analise_detalhada),
             len(analise_profunda_contabil),
         )
 
-        return retorno
+        return retorno, contexto
+
+    # ==================================================
+    # EXECUÇÃO EM STREAMING (NDJSON)
+    # ==================================================
+    def transmitir(
+        self,
+        request: RequestConciliacao,
+        escrever: Callable[[str, Any], None],
+        progresso: Optional[Callable[[int, str], None]] = None,
+    ) -> None:
+        """
+        Executa a conciliação (modo completo) entregando o relatório por partes.
+
+        ``escrever(secao, dados)`` recebe primeiro ``resumo`` e ``resumo_analise``,
+        depois cada item das listas do relatório (``diferencas_origem_maior``,
+        ``diferencas_contabilidade_maior``, ``analise_detalhada``,
+        ``analise_profunda_contabil``) à medida que é gerado, e por fim
+        ``observacoes`` e ``alertas``. As linhas são as mesmas de ``processar``,
+        sem manter a análise detalhada inteira em memória.
+        """
+        logger.info("⚙️ Executando conciliação contábil (streaming)")
+        informar = progresso or (lambda percentual, etapa: None)
+
+        cache_bases = CacheBasesService()
+        diferencas = self._calcular_diferencas(request, informar, cache_bases)
+        conta_contabil = diferencas.conta_contabil
+        escrever("resumo", diferencas.resumo)
+
+        informar(45, "Gerando análise detalhada")
+        analise_service = AnaliseDiferencasService()
+        contexto = None
+        cabecalhos = []
+        try:
+            df_razao_geral, _ = self._carregar_razao_geral(request, cache_bases, diferencas)
+            contexto = analise_service.preparar_contexto_analise(
+                df_financeiro=diferencas.financeiro_norm,
+                df_contabilidade_filtrada=diferencas.contabil_norm,
+                df_razao_contabil=self._filtrar_razao_por_conta(df_razao_geral, conta_contabil),
+                df_financeiro_detalhado=diferencas.financeiro_detalhado,
+                df_razao_geral=df_razao_geral,
+                conta_contabil=conta_contabil,
+            )
+            cabecalhos = analise_service.gerar_cabecalhos_analise(contexto)
+            if cabecalhos:
+                resumo_analise = analise_service.gerar_resumo_analise(cabecalhos)
+            else:
+                resumo_analise = self._formatar_resumo_analise(
+                    total=len(diferencas.df_completo), conciliados=0
+                )
+        except Exception as exc:
+            logger.error("❌ Falha ao gerar análise detalhada: %s", exc, exc_info=True)
+            contexto = None
+            resumo_analise = self._gerar_resumo_analise_fallback(diferencas.df_completo)
+        escrever("resumo_analise", resumo_analise)
+
+        for item in diferencas.diferencas_origem_maior:
+            escrever("diferencas_origem_maior", item)
+        for item in diferencas.diferencas_contabilidade_maior:
+            escrever("diferencas_contabilidade_maior", item)
+
+        # As linhas já enviadas não voltam atrás: uma falha no meio da análise
+        # encerra a seção com o que foi gerado, como no relatório completo
+        total_analise_profunda = 0
+        registros_so_contabilidade = []
+        try:
+            if contexto is not None:
+                for analise in analise_service.iterar_analises(contexto, cabecalhos):
+                    if analise.get("tipo_diferenca") == "SO_CONTABILIDADE":
+                        registros_so_contabilidade.append(analise)
+                    escrever("analise_detalhada", analise)
+
+            if registros_so_contabilidade:
+                informar(75, "Analisando lançamentos SO_CONTABILIDADE")
+                for item in analise_service.iterar_analise_profunda(
+                    registros_so_contabilidade, contexto.df_razao_geral, conta_contabil
+                ):
+                    escrever("analise_profunda_contabil", item)
+                    total_analise_profunda += 1
+        except Exception as exc:
+            logger.error("❌ Falha ao gerar análise detalhada: %s", exc, exc_info=True)
+
+        escrever("observacoes", self._observacoes(diferencas, total_analise_profunda))
+        escrever("alertas", self._alertas(diferencas))
+        logger.info("✅ Conciliação transmitida com sucesso")
+
+    # ==================================================
+    # DETALHAMENTO SOB DEMANDA (MODO RESUMO)
+    # ==================================================
+    def detalhar_codigo(self, execucao_id: str, codigo: str) -> Optional[dict]:
+        """
+        Análise completa de um código de uma execução em modo resumo.
+
+        Retorna ``analise`` (linha da análise detalhada com os lançamentos) e
+        ``analise_profunda_contabil``; None se a execução expirou ou o código
+        não faz parte dela.
+        """
+        contexto = ExecucaoAnaliseService().obter(execucao_id)
+        if contexto is None:
+            logger.warning("⚠️ Execução %s não encontrada ou expirada", execucao_id)
+            return None
+
+        detalhe = AnaliseDiferencasService().analisar_codigo(contexto, codigo)
+        if detalhe is None:
+            logger.warning("⚠️ Código %s não encontrado na execução %s", codigo, execucao_id)
+        return detalhe
+
+
+def processar_conciliacao(
+    request: RequestConciliacao, modo_analise: str = MODO_ANALISE_COMPLETO
+) -> dict:
+    """
+    Ponto de entrada no pool de conciliações (ver ``core.executor``).
+
+    No modo resumo, o contexto é registrado aqui e só o ``execucao_id`` volta
+    ao processo da API.
+    """
+    return ConciliacaoService().executar(request, modo_analise)
+
+
+def processar_conciliacao_planilhas(
+    upload_id: str,
+    conta_contabil: str,
+    data_base: str,
+    tipo_financeiro: str,
+    modo_analise: str = MODO_ANALISE_COMPLETO,
+) -> dict:
+    """
+    Ponto de entrada no pool de conciliações para planilhas enviadas direto
+    (ver ``UploadPlanilhaService``): lê as planilhas do upload e processa
+    (como ``processar_conciliacao``, registrando o contexto do modo resumo).
+
+    Aceita também Parquet e Arrow IPC (ver ``tools.planilhas``); o DataFrame
+    lido vai direto para a normalização. O razão geral é lido em lotes e só
+    as linhas relevantes para a conciliação ficam em memória.
+
+    Raises:
+        ValueError: Upload inexistente, planilha ilegível ou dados inválidos
+    """
+    arquivos = UploadPlanilhaService().carregar(upload_id)
+
+    def base(classe, tipo_arquivo: str, **campos):
+        nome, conteudo = arquivos[tipo_arquivo]
+        try:
+            df = ler_planilha(conteudo, nome)
+        except Exception as e:
+            raise ValueError(f"Não foi possível ler a planilha '{nome}': {e}")
+        logger.info("📄 Planilha %s lida: %s linhas", nome, len(df))
+        return classe.de_dataframe(df, hashlib.sha256(conteudo).hexdigest(), **campos)
+
+    def base_em_lotes(classe, tipo_arquivo: str, **campos):
+        nome, conteudo = arquivos[tipo_arquivo]
+        tamanho_lote = settings.RECONCILIATION_LEDGER_BATCH_ROWS
+
+        def lotes():
+            try:
+                yield from iterar_planilha(conteudo, nome, tamanho_lote)
+            except Exception as e:
+                raise ValueError(f"Não foi possível ler a planilha '{nome}': {e}")
+
+        return classe.de_lotes(lotes, hashlib.sha256(conteudo).hexdigest(), **campos)
+
+    request = RequestConciliacao(
+        base_origem=base(BaseOrigem, ARQUIVO_ORIGEM, tipo=tipo_financeiro),
+        base_contabil_filtrada=base(
+            BaseContabilFiltrada, ARQUIVO_CONTABIL_FILTRADO, conta_contabil=conta_contabil
+        ),
+        # O razão geral (às vezes o ano inteiro) só é lido depois das outras
+        # bases, em lotes filtrados pelos códigos da conciliação
+        base_contabil_geral=base_em_lotes(BaseContabilGeral, ARQUIVO_CONTABIL_GERAL),
+        parametros={"data_base": data_base, "tipo_financeiro": tipo_financeiro},
+    )
+
+    service = ConciliacaoService()
+    valido, mensagem = service.validar_dados(request)
+    if not valido:
+        raise ValueError(mensagem)
+    return service.executar(request, modo_analise)
+
+
+def transmitir_conciliacao(request: RequestConciliacao, caminho: str) -> None:
+    """
+    Ponto de entrada no pool de conciliações para o modo streaming.
+
+    Grava o relatório em NDJSON no arquivo ``caminho``, uma linha
+    ``{"secao": ..., "dados": ...}`` por parte, terminando com ``{"secao": "fim"}``.
+    O processo da API acompanha o arquivo e repassa as linhas ao cliente.
+    """
+    # Sem buffer: cada linha fica visível para o processo da API assim que gravada
+    with open(caminho, "wb", buffering=0) as arquivo:
+        def escrever(secao: str, dados: Any) -> None:
+            arquivo.write(serializar_json({"secao": secao, "dados": dados}) + b"\n")
+
+        ConciliacaoService().transmitir(request, escrever)
+        arquivo.write(serializar_json({"secao": "fim"}) + b"\n")
@@ -19,6 +19,7 @@ from schemas.efetivacao_schema import (
     ValidacaoEfetivacaoResponse,
 )
 from services.file_storage_service import FileStorageService
+from tools.planilhas import ler_planilha
 from middleware.auth import CurrentUser
 
 logger = logging.getLogger(__name__)
@@ -124,6 +125,21 @@ class EfetivacaoService:
         # Valida se não há divergências
         return self._validate_no_divergencias(request.resultado)
 
+    def _dataframe_base(self, base: Dict[str, Any], arquivo: bytes, nome_arquivo: str) -> pd.DataFrame:
+        """
+        DataFrame dos registros enviados; sem registros (planilhas enviadas por
+        upload_id), lê a própria planilha.
+        """
+        if base.get("registros") is not None:
+            return pd.DataFrame(base["registros"])
+        try:
+            return ler_planilha(arquivo, nome_arquivo)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Não foi possível ler a planilha '{nome_arquivo}': {str(e)}"
+            )
+
     def efetivar(
         self,
         db: Session,
@@ -174,9 +190,13 @@ class EfetivacaoService:
             )
 
         # Criar DataFrames a partir dos registros normalizados
-        df_origem = pd.DataFrame(request.base_origem.get("registros", []))
-        df_contabil_filtrado = pd.DataFrame(request.base_contabil_filtrada.get("registros", []))
-        df_contabil_geral = pd.DataFrame(request.base_contabil_geral.get("registros", []))
+        df_origem = self._dataframe_base(request.base_origem, arquivo_origem, nome_origem)
+        df_contabil_filtrado = self._dataframe_base(
+            request.base_contabil_filtrada, arquivo_contabil_filtrado, nome_contabil_filtrado
+        )
+        df_contabil_geral = self._dataframe_base(
+            request.base_contabil_geral, arquivo_contabil_geral, nome_contabil_geral
+        )
 
         # Salvar arquivos
         caminhos = self.file_storage.save_all_reconciliation_files(
@@ -0,0 +1,79 @@
+"""
+Service para as execuções da conciliação contábil em modo resumo.
+
+No modo resumo, POST /conciliacoes/contabil devolve apenas os cabeçalhos da
+análise detalhada e um ``execucao_id``. O contexto da execução (bases
+indexadas por código) é gravado pelo processo do pool de conciliações no
+volume do FileStorageService ({STORAGE_DIR}/execucoes/{execucao_id}/), e só o
+id volta ao processo da API. Assim qualquer processo da API (vários workers
+do uvicorn) calcula o detalhamento de cada código sob demanda, sem reenviar
+nem reprocessar as bases.
+
+Os contextos expiram ``ANALYSIS_RUN_TTL_MINUTES`` após o registro. Cada
+processo da API mantém em memória até ``ANALYSIS_RUN_MAX_ENTRIES`` contextos
+já lidos do disco (os menos usados saem primeiro).
+"""
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from core.config import settings
+from services.analise_diferencas_service import ContextoAnalise
+from services.file_storage_service import FileStorageService
+
+logger = logging.getLogger(__name__)
+
+
+class ExecucaoAnaliseService:
+    """Service para guardar e recuperar contextos de execuções em modo resumo."""
+
+    _execucoes: "OrderedDict[str, Tuple[float, ContextoAnalise]]" = OrderedDict()
+    _lock = threading.Lock()
+
+    def __init__(self):
+        self.file_storage = FileStorageService()
+
+    def registrar(self, contexto: ContextoAnalise) -> str:
+        """Grava o contexto no volume compartilhado e retorna o id da execução."""
+        self.file_storage.purge_executions(settings.ANALYSIS_RUN_TTL_MINUTES)
+        execucao_id = uuid.uuid4().hex
+        self.file_storage.save_execution_context(execucao_id, contexto)
+        logger.info("[EXECUCAO] Execução %s registrada", execucao_id)
+        return execucao_id
+
+    def obter(self, execucao_id: str) -> Optional[ContextoAnalise]:
+        """Retorna o contexto da execução, ou None se não existe ou expirou."""
+        with self._lock:
+            self._remover_expiradas()
+            item = self._execucoes.get(execucao_id)
+            if item is not None:
+                self._execucoes.move_to_end(execucao_id)
+                return item[1]
+
+        carregado = self.file_storage.load_execution_context(execucao_id)
+        if carregado is None:
+            return None
+        gravado_em, contexto = carregado
+        restante = gravado_em + settings.ANALYSIS_RUN_TTL_MINUTES * 60 - time.time()
+        if restante <= 0:
+            return None
+        logger.info("[EXECUCAO] Execução %s carregada do disco", execucao_id)
+
+        with self._lock:
+            self._execucoes[execucao_id] = (time.monotonic() + restante, contexto)
+            while len(self._execucoes) > settings.ANALYSIS_RUN_MAX_ENTRIES:
+                self._execucoes.popitem(last=False)
+        return contexto
+
+    def _remover_expiradas(self) -> None:
+        agora = time.monotonic()
+        expiradas = [
+            execucao_id
+            for execucao_id, (expira_em, _) in self._execucoes.items()
+            if expira_em <= agora
+        ]
+        for execucao_id in expiradas:
+            del self._execucoes[execucao_id]
@@ -15,17 +15,30 @@ Estrutura de diretórios:
       └── resultado.json
 
 Tipos: banco, receber, pagar
+
+Resultados dos jobs assíncronos de conciliação:
+{STORAGE_DIR}/jobs/{job_id}/resultado.json
+
+Planilhas enviadas direto para a conciliação, guardadas para a efetivação:
+{STORAGE_DIR}/uploads/{upload_id}/{origem|contabil_filtrado|contabil_geral}.{ext}
+
+Contexto das execuções da conciliação contábil em modo resumo:
+{STORAGE_DIR}/execucoes/{execucao_id}/contexto.pkl
 """
 import os
-import json
+import pickle
+import re
 import shutil
+import time
 import logging
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Optional, Any, BinaryIO
+from typing import Dict, Optional, Any, BinaryIO, Tuple
 
 import pandas as pd
 
+from core.serializacao import serializar_json
+
 logger = logging.getLogger(__name__)
 
 # Diretório base - usa env var STORAGE_DIR, default "data"
@@ -155,8 +168,8 @@ class FileStorageService:
         filename = "resultado.json"
         file_path = relatorio_path / filename
 
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+        with open(file_path, 'wb') as f:
+            f.write(serializar_json(data, indentado=True))
 
         logger.info(f"Resultado JSON salvo: {file_path}")
         return str(file_path)
@@ -258,6 +271,174 @@ class FileStorageService:
         logger.info(f"Arquivos bancários salvos para empresa {empresa_id}, período {ano}-{mes:02d}, conta {conta_contabil}")
         return caminhos
 
+    def get_job_path(self, job_id: str) -> Path:
+        """Retorna o diretório de um job assíncrono: {STORAGE_DIR}/jobs/{job_id}/"""
+        return UPLOAD_BASE_DIR / "jobs" / job_id
+
+    def save_job_result(self, job_id: str, data: Dict[str, Any]) -> str:
+        """
+        Salva o resultado de um job assíncrono como JSON.
+
+        O arquivo é gravado em um temporário e renomeado, para que outros
+        processos da API nunca leiam um resultado pela metade.
+
+        Returns:
+            Caminho completo do arquivo salvo
+        """
+        job_path = self.get_job_path(job_id)
+        self._ensure_directory(job_path)
+
+        file_path = job_path / "resultado.json"
+        tmp_path = job_path / "resultado.json.tmp"
+
+        with open(tmp_path, 'wb') as f:
+            f.write(serializar_json(data))
+        os.replace(tmp_path, file_path)
+
+        logger.info(f"Resultado do job salvo: {file_path}")
+        return str(file_path)
+
+    def get_upload_path(self, upload_id: str) -> Path:
+        """
+        Retorna o diretório de um upload de planilhas: {STORAGE_DIR}/uploads/{upload_id}/
+
+        Raises:
+            ValueError: Se o id não tem o formato gerado pela API (evita path traversal)
+        """
+        if not re.fullmatch(r"[0-9a-f]{32}", upload_id or ""):
+            raise ValueError("upload_id inválido")
+        return UPLOAD_BASE_DIR / "uploads" / upload_id
+
+    def save_upload_files(self, upload_id: str, arquivos: Dict[str, Tuple[str, bytes]]) -> None:
+        """
+        Salva as planilhas enviadas para uma conciliação.
+
+        Args:
+            upload_id: Id do upload (uuid hex)
+            arquivos: tipo_arquivo -> (nome original, conteúdo)
+        """
+        upload_path = self.get_upload_path(upload_id)
+        self._ensure_directory(upload_path)
+
+        for tipo_arquivo, (nome_original, conteudo) in arquivos.items():
+            extensao = Path(nome_original).suffix.lower() or ".xlsx"
+            with open(upload_path / f"{tipo_arquivo}{extensao}", 'wb') as f:
+                f.write(conteudo)
+
+        logger.info(f"Upload {upload_id} salvo: {', '.join(arquivos)}")
+
+    def load_upload_files(self, upload_id: str) -> Dict[str, Tuple[str, bytes]]:
+        """
+        Carrega as planilhas de um upload.
+
+        Returns:
+            tipo_arquivo -> (nome do arquivo, conteúdo); vazio se o upload não existe
+        """
+        upload_path = self.get_upload_path(upload_id)
+        if not upload_path.is_dir():
+            return {}
+        return {
+            file_path.stem: (file_path.name, file_path.read_bytes())
+            for file_path in sorted(upload_path.iterdir())
+            if file_path.is_file()
+        }
+
+    def delete_upload(self, upload_id: str) -> bool:
+        """Remove as planilhas de um upload. Retorna False se o upload não existe."""
+        upload_path = self.get_upload_path(upload_id)
+        if not upload_path.is_dir():
+            return False
+        shutil.rmtree(upload_path)
+        logger.info(f"Upload {upload_id} removido")
+        return True
+
+    def purge_uploads(self, max_age_hours: int) -> int:
+        """Remove uploads com mais de ``max_age_hours`` horas. Retorna quantos foram removidos."""
+        uploads_path = UPLOAD_BASE_DIR / "uploads"
+        if not uploads_path.is_dir():
+            return 0
+
+        limite = time.time() - max_age_hours * 3600
+        removidos = 0
+        for upload_path in uploads_path.iterdir():
+            try:
+                if upload_path.is_dir() and upload_path.stat().st_mtime < limite:
+                    shutil.rmtree(upload_path)
+                    removidos += 1
+            except OSError as e:
+                logger.warning(f"Erro ao remover upload {upload_path}: {e}")
+
+        if removidos:
+            logger.info(f"{removidos} uploads expirados removidos")
+        return removidos
+
+    def get_execution_path(self, execucao_id: str) -> Path:
+        """
+        Retorna o diretório de uma execução em modo resumo: {STORAGE_DIR}/execucoes/{execucao_id}/
+
+        Raises:
+            ValueError: Se o id não tem o formato gerado pela API (evita path traversal)
+        """
+        if not re.fullmatch(r"[0-9a-f]{32}", execucao_id or ""):
+            raise ValueError("execucao_id inválido")
+        return UPLOAD_BASE_DIR / "execucoes" / execucao_id
+
+    def save_execution_context(self, execucao_id: str, contexto: Any) -> None:
+        """
+        Salva o contexto de uma execução em modo resumo (pickle).
+
+        Gravado em um temporário e renomeado, como o resultado dos jobs.
+        """
+        execucao_path = self.get_execution_path(execucao_id)
+        self._ensure_directory(execucao_path)
+
+        file_path = execucao_path / "contexto.pkl"
+        tmp_path = execucao_path / "contexto.pkl.tmp"
+
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(contexto, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, file_path)
+
+        logger.info(f"Contexto da execução salvo: {file_path}")
+
+    def load_execution_context(self, execucao_id: str) -> Optional[Tuple[float, Any]]:
+        """
+        Carrega o contexto de uma execução em modo resumo.
+
+        Returns:
+            (mtime do arquivo, contexto); None se a execução não existe
+        """
+        try:
+            file_path = self.get_execution_path(execucao_id) / "contexto.pkl"
+        except ValueError:
+            return None
+        try:
+            with open(file_path, 'rb') as f:
+                gravado_em = os.fstat(f.fileno()).st_mtime
+                return gravado_em, pickle.load(f)
+        except FileNotFoundError:
+            return None
+
+    def purge_executions(self, max_age_minutes: int) -> int:
+        """Remove execuções com mais de ``max_age_minutes`` minutos. Retorna quantas foram removidas."""
+        execucoes_path = UPLOAD_BASE_DIR / "execucoes"
+        if not execucoes_path.is_dir():
+            return 0
+
+        limite = time.time() - max_age_minutes * 60
+        removidas = 0
+        for execucao_path in execucoes_path.iterdir():
+            try:
+                if execucao_path.is_dir() and execucao_path.stat().st_mtime < limite:
+                    shutil.rmtree(execucao_path)
+                    removidas += 1
+            except OSError as e:
+                logger.warning(f"Erro ao remover execução {execucao_path}: {e}")
+
+        if removidas:
+            logger.info(f"{removidas} execuções expiradas removidas")
+        return removidas
+
     def file_exists(self, file_path: str) -> bool:
         """Verifica se um arquivo existe."""
         return Path(file_path).exists()
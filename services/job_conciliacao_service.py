@@ -0,0 +1,232 @@
+"""
+Service para os jobs assíncronos de conciliação (contábil e bancária).
+
+Conciliações grandes estouram o timeout dos proxies quando executadas em
+request/response. O job é registrado no banco (status PENDENTE), submetido ao
+pool de conciliações (``core.executor``) e o cliente acompanha o status pelo id.
+
+O processo do pool atualiza status/progresso no banco e grava o relatório no
+volume do FileStorageService ({STORAGE_DIR}/jobs/{job_id}/resultado.json).
+Assim qualquer processo da API (vários workers do uvicorn, ou após um
+reinício) responde status e resultado.
+
+Um job que não termina e não recebe atualização por mais de
+``RECONCILIATION_JOB_STALE_MINUTES`` (ex.: servidor reiniciado no meio da
+execução) é dado como FALHOU na consulta. Status final não é sobrescrito: as
+atualizações do processo do pool só valem enquanto o job não terminou, então
+um job dado como FALHOU não passa depois a CONCLUIDO.
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional, Union
+
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.executor import executor_conciliacao
+from db import SessionLocal
+from models import JobConciliacao, StatusJob
+from schemas.conciliacao_bancaria_schema import RequestConciliacaoBancaria
+from schemas.conciliacao_schema import RequestConciliacao
+from services.conciliacao_bancaria_service import ConciliacaoBancariaService
+from services.conciliacao_service import ConciliacaoService
+from services.file_storage_service import FileStorageService
+
+logger = logging.getLogger(__name__)
+
+TIPO_JOB_CONTABIL = "contabil"
+TIPO_JOB_BANCARIA = "bancaria"
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class JobConciliacaoService:
+    """Service para submeter, acompanhar e executar jobs de conciliação."""
+
+    def __init__(self):
+        self.file_storage = FileStorageService()
+
+    # ==================================================
+    # PROCESSO DA API
+    # ==================================================
+    def submeter(
+        self,
+        db: Session,
+        tipo: str,
+        request: Union[RequestConciliacao, RequestConciliacaoBancaria],
+        usuario_id: Optional[int] = None,
+    ) -> JobConciliacao:
+        """
+        Registra o job e o submete ao pool de conciliações.
+
+        Deve ser chamado de dentro do event loop (endpoint ``async``).
+
+        Raises:
+            ExecutorSaturadoError: Se o pool não tiver vaga; o job é descartado
+        """
+        job = JobConciliacao(
+            id=uuid.uuid4().hex,
+            tipo=tipo,
+            status=StatusJob.PENDENTE,
+            progresso=0,
+            usuario_id=usuario_id,
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+
+        try:
+            futuro = executor_conciliacao.submeter(executar_job, job.id, tipo, request)
+        except Exception:
+            db.delete(job)
+            db.commit()
+            raise
+
+        futuro.add_done_callback(lambda f: self._verificar_termino(job.id, f))
+        logger.info("[JOB] Job %s (%s) submetido", job.id, tipo)
+        return job
+
+    def obter(self, db: Session, job_id: str) -> Optional[JobConciliacao]:
+        """Retorna o job, marcando como FALHOU se estiver parado há tempo demais."""
+        job = db.query(JobConciliacao).filter(JobConciliacao.id == job_id).first()
+        if job is None or job.status in StatusJob.FINAIS:
+            return job
+
+        atualizado_em = job.updated_at
+        if atualizado_em.tzinfo is None:
+            atualizado_em = atualizado_em.replace(tzinfo=timezone.utc)
+        limite = _now() - timedelta(minutes=settings.RECONCILIATION_JOB_STALE_MINUTES)
+        if atualizado_em < limite:
+            # Condicional: o processo do pool pode ter concluído entre a leitura e a escrita
+            marcados = (
+                db.query(JobConciliacao)
+                .filter(
+                    JobConciliacao.id == job_id,
+                    JobConciliacao.status.notin_(StatusJob.FINAIS),
+                    JobConciliacao.updated_at < limite,
+                )
+                .update(
+                    {
+                        "status": StatusJob.FALHOU,
+                        "mensagem_erro": "Execução interrompida (servidor reiniciado ou processo encerrado)",
+                        "concluido_em": _now(),
+                    },
+                    synchronize_session=False,
+                )
+            )
+            db.commit()
+            if marcados:
+                logger.warning("[JOB] Job %s sem atualização; marcado como interrompido", job_id)
+            db.refresh(job)
+        return job
+
+    def _verificar_termino(self, job_id: str, futuro: "asyncio.Future[Any]") -> None:
+        """Registra a falha de jobs que não chegaram a rodar (pool quebrado ou encerrado)."""
+        if futuro.cancelled():
+            self._atualizar(
+                job_id,
+                status=StatusJob.FALHOU,
+                mensagem_erro="Job cancelado (encerramento do servidor)",
+                concluido_em=_now(),
+            )
+        elif futuro.exception() is not None:
+            logger.error("[JOB] Job %s falhou fora da conciliação: %s", job_id, futuro.exception())
+            self._atualizar(
+                job_id,
+                status=StatusJob.FALHOU,
+                mensagem_erro=f"Erro interno ao executar o job: {futuro.exception()}",
+                concluido_em=_now(),
+            )
+
+    # ==================================================
+    # PROCESSO DO POOL
+    # ==================================================
+    def executar(
+        self,
+        job_id: str,
+        tipo: str,
+        request: Union[RequestConciliacao, RequestConciliacaoBancaria],
+    ) -> None:
+        """Executa a conciliação do job e persiste o resultado (no processo do pool)."""
+        if not self._atualizar(
+            job_id,
+            status=StatusJob.EM_EXECUCAO,
+            etapa="Iniciando",
+            iniciado_em=_now(),
+        ):
+            logger.warning("[JOB] Job %s já finalizado antes de iniciar; ignorado", job_id)
+            return
+
+        def informar(percentual: int, etapa: str) -> None:
+            self._atualizar(job_id, progresso=percentual, etapa=etapa)
+
+        try:
+            if tipo == TIPO_JOB_CONTABIL:
+                resultado, _ = ConciliacaoService().processar(request, progresso=informar)
+            elif tipo == TIPO_JOB_BANCARIA:
+                resultado = ConciliacaoBancariaService().executar(request, progresso=informar)
+            else:
+                raise ValueError(f"Tipo de job desconhecido: {tipo}")
+
+            informar(95, "Salvando resultado")
+            caminho = self.file_storage.save_job_result(job_id, resultado)
+        except Exception as e:
+            logger.error("[JOB] Job %s falhou: %s", job_id, e, exc_info=True)
+            self._atualizar(
+                job_id,
+                status=StatusJob.FALHOU,
+                mensagem_erro=str(e),
+                concluido_em=_now(),
+            )
+            return
+
+        if self._atualizar(
+            job_id,
+            status=StatusJob.CONCLUIDO,
+            progresso=100,
+            etapa="Concluído",
+            caminho_resultado=caminho,
+            concluido_em=_now(),
+        ):
+            logger.info("[JOB] Job %s concluído", job_id)
+        else:
+            logger.warning("[JOB] Job %s já finalizado durante a execução; resultado não registrado", job_id)
+
+    def _atualizar(self, job_id: str, **campos: Any) -> bool:
+        """
+        Atualiza o job em uma sessão própria (fora de uma requisição).
+
+        Só atualiza jobs ainda não finalizados; retorna False se o job já
+        estava em status final (ou não existe) ou se a atualização falhou.
+        """
+        db = SessionLocal()
+        try:
+            atualizados = (
+                db.query(JobConciliacao)
+                .filter(
+                    JobConciliacao.id == job_id,
+                    JobConciliacao.status.notin_(StatusJob.FINAIS),
+                )
+                .update(campos, synchronize_session=False)
+            )
+            db.commit()
+            return atualizados > 0
+        except Exception as e:
+            db.rollback()
+            logger.error("[JOB] Falha ao atualizar job %s: %s", job_id, e)
+            return False
+        finally:
+            db.close()
+
+
+def executar_job(
+    job_id: str,
+    tipo: str,
+    request: Union[RequestConciliacao, RequestConciliacaoBancaria],
+) -> None:
+    """Ponto de entrada no pool de conciliações (ver ``core.executor``)."""
+    JobConciliacaoService().executar(job_id, tipo, request)
@@ -0,0 +1,85 @@
+"""
+Service para as planilhas enviadas direto para a conciliação (multipart).
+
+Em vez de o frontend converter as planilhas em ``registros`` JSON (e enviar
+os mesmos arquivos de novo na efetivação), os arquivos originais são enviados
+uma vez: a leitura e a normalização rodam no pool de conciliações e as
+planilhas da conciliação contábil ficam guardadas sob um ``upload_id``
+(ver ``FileStorageService.save_upload_files``), que a efetivação aceita no
+lugar dos arquivos.
+
+Uploads mais antigos que ``RECONCILIATION_UPLOAD_TTL_HOURS`` são removidos a
+cada novo upload.
+"""
+import logging
+import uuid
+from typing import Dict, Tuple
+
+from fastapi import UploadFile
+
+from core.config import settings
+from services.file_storage_service import FileStorageService
+from tools.planilhas import extensao_planilha
+
+logger = logging.getLogger(__name__)
+
+# Planilhas da conciliação contábil (mesmos nomes da efetivação)
+ARQUIVO_ORIGEM = "origem"
+ARQUIVO_CONTABIL_FILTRADO = "contabil_filtrado"
+ARQUIVO_CONTABIL_GERAL = "contabil_geral"
+
+
+class UploadPlanilhaService:
+    """Service para receber, guardar e recuperar planilhas enviadas para conciliação."""
+
+    def __init__(self):
+        self.file_storage = FileStorageService()
+
+    async def ler(self, arquivo: UploadFile) -> Tuple[str, bytes]:
+        """
+        Lê o arquivo enviado, validando extensão e tamanho.
+
+        Returns:
+            (nome do arquivo, conteúdo)
+
+        Raises:
+            ValueError: Extensão não suportada ou arquivo acima do limite
+        """
+        nome = arquivo.filename or ""
+        extensao_planilha(nome)
+
+        limite = settings.RECONCILIATION_UPLOAD_MAX_MB * 1024 * 1024
+        conteudo = await arquivo.read(limite + 1)
+        if len(conteudo) > limite:
+            raise ValueError(
+                f"Arquivo '{nome}' maior que {settings.RECONCILIATION_UPLOAD_MAX_MB} MB"
+            )
+        if not conteudo:
+            raise ValueError(f"Arquivo '{nome}' vazio")
+        return nome, conteudo
+
+    def guardar(self, arquivos: Dict[str, Tuple[str, bytes]]) -> str:
+        """Guarda as planilhas e retorna o ``upload_id``."""
+        self.file_storage.purge_uploads(settings.RECONCILIATION_UPLOAD_TTL_HOURS)
+        upload_id = uuid.uuid4().hex
+        self.file_storage.save_upload_files(upload_id, arquivos)
+        return upload_id
+
+    def descartar(self, upload_id: str) -> None:
+        """Remove um upload cuja conciliação não chegou a ser devolvida ao cliente."""
+        try:
+            self.file_storage.delete_upload(upload_id)
+        except OSError as e:
+            logger.warning("Erro ao remover upload %s: %s", upload_id, e)
+
+    def carregar(self, upload_id: str) -> Dict[str, Tuple[str, bytes]]:
+        """
+        Planilhas de um upload (tipo_arquivo -> (nome, conteúdo)).
+
+        Raises:
+            ValueError: Upload inexistente ou expirado
+        """
+        arquivos = self.file_storage.load_upload_files(upload_id)
+        if not arquivos:
+            raise ValueError("Upload não encontrado (pode ter expirado); envie as planilhas novamente")
+        return arquivos
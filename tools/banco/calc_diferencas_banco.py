@@ -14,16 +14,53 @@ Regras contabeis (conta bancaria = ATIVO):
 
 import pandas as pd
 import logging
-import re
 from typing import Dict, List, Any, Tuple
 from datetime import datetime
 
+from tools.valores_centavos import MulticonjuntoCentavos
+
 logger = logging.getLogger(__name__)
 
 # Threshold para considerar valores iguais (R$ 0,01)
 THRESHOLD_CONCILIACAO = 0.01
 
 
+def _registros_para_dicts(
+    df: pd.DataFrame,
+    campos: List[str],
+    tipo: str,
+) -> List[Dict]:
+    """
+    Converte os registros em dicts de forma colunar (sem iterrows).
+
+    Colunas ausentes viram "", o valor vem da coluna ``tipo`` (entrada, saida,
+    debito ou credito) arredondado em 2 casas e ``tipo`` e repetido em maiusculas.
+    """
+    if df.empty:
+        return []
+    saida = pd.DataFrame(
+        {campo: df[campo] if campo in df.columns else "" for campo in campos},
+        index=df.index,
+    )
+    saida["valor"] = df[tipo].astype(float).round(2)
+    saida["tipo"] = tipo.upper()
+    return saida.to_dict("records")
+
+
+def _normalizar_numeros_documento(documentos: pd.Series) -> pd.Series:
+    """
+    Chave numerica de cada documento: todos os digitos concatenados (ex:
+    "63616-055" -> "63616055"), sem zeros a esquerda; "" sem digitos.
+
+    Calculada uma vez por documento distinto.
+    """
+    codigos, unicos = pd.factorize(documentos.fillna("").astype(str))
+    # Re do Python: \d/\D com a mesma definicao de digito do re.findall
+    digitos = pd.Series(unicos, dtype=object).str.replace(r"\D+", "", regex=True)
+    chaves = digitos.str.lstrip("0").mask(digitos.str.fullmatch("0+"), "0")
+    return pd.Series(chaves.to_numpy(dtype=object)[codigos], index=documentos.index, dtype=object)
+
+
 def _fazer_matching_registros(
     df_extrato: pd.DataFrame,
     df_razao: pd.DataFrame,
@@ -58,43 +95,45 @@ def _fazer_matching_registros(
     debitos_raz["matched"] = False
     creditos_raz["matched"] = False
 
-    def _normalizar_numero_documento(valor: Any) -> str:
-        """Extrai e concatena todos os digitos do documento, removendo zeros a esquerda."""
-        if pd.isna(valor):
-            return ""
-        s = str(valor)
-        # Concatenar TODOS os grupos de digitos (ex: "63616-055" -> "63616055")
-        numeros = re.findall(r"\d+", s)
-        if not numeros:
-            return ""
-        concatenado = "".join(numeros)
-        # Remover zeros a esquerda para normalizar
-        return concatenado.lstrip("0") or "0"
-
     def _key_documento(df: pd.DataFrame) -> pd.Series:
         if "numero" in df.columns:
-            return df["numero"].fillna("").astype(str).apply(_normalizar_numero_documento)
+            return _normalizar_numeros_documento(df["numero"])
         if "documento_extraido" in df.columns:
-            return df["documento_extraido"].fillna("").astype(str).apply(_normalizar_numero_documento)
+            return _normalizar_numeros_documento(df["documento_extraido"])
         if "chave_documento" in df.columns:
-            return df["chave_documento"].fillna("").astype(str).apply(_normalizar_numero_documento)
+            return _normalizar_numeros_documento(df["chave_documento"])
         return pd.Series([""] * len(df), index=df.index)
 
-    def _match_exato_doc_valor(df_ext: pd.DataFrame, df_raz: pd.DataFrame, col_ext: str, col_raz: str) -> None:
-        for idx_ext in df_ext.index:
-            if df_ext.loc[idx_ext, "matched"]:
-                continue
-            chave = df_ext.loc[idx_ext, "_doc_key"]
-            if not chave:
-                continue
-            valor_ext = df_ext.loc[idx_ext, col_ext]
-            candidatos = df_raz[~df_raz["matched"] & (df_raz["_doc_key"] == chave)]
-            for idx_raz in candidatos.index:
-                valor_raz = df_raz.loc[idx_raz, col_raz]
-                if abs(valor_ext - valor_raz) <= THRESHOLD_CONCILIACAO:
-                    df_ext.loc[idx_ext, "matched"] = True
-                    df_raz.loc[idx_raz, "matched"] = True
-                    break
+    def _casar_por_valor(df_ext: pd.DataFrame, df_raz: pd.DataFrame, col_ext: str, col_raz: str, col_chave: str = "") -> None:
+        """
+        Casa registros pendentes de mesmo valor (tolerancia de R$ 0,01), opcionalmente
+        restritos a mesma chave. Cada registro do razao e consumido uma unica vez.
+        """
+        pend_ext = df_ext[~df_ext["matched"]]
+        pend_raz = df_raz[~df_raz["matched"]]
+        if col_chave:
+            pend_ext = pend_ext[pend_ext[col_chave].str.len() > 0]
+            pend_raz = pend_raz[pend_raz[col_chave].str.len() > 0]
+        if pend_ext.empty or pend_raz.empty:
+            return
+
+        def _chaves(df: pd.DataFrame) -> List[Any]:
+            return df[col_chave].tolist() if col_chave else [None] * len(df)
+
+        disponiveis = MulticonjuntoCentavos()
+        for idx_raz, chave, valor_raz in zip(pend_raz.index, _chaves(pend_raz), pend_raz[col_raz].tolist()):
+            disponiveis.adicionar(chave, valor_raz, idx_raz)
+
+        casados_ext = []
+        casados_raz = []
+        for idx_ext, chave, valor_ext in zip(pend_ext.index, _chaves(pend_ext), pend_ext[col_ext].tolist()):
+            idx_raz = disponiveis.retirar(chave, valor_ext)
+            if idx_raz is not None:
+                casados_ext.append(idx_ext)
+                casados_raz.append(idx_raz)
+
+        df_ext.loc[casados_ext, "matched"] = True
+        df_raz.loc[casados_raz, "matched"] = True
 
     def _match_soma_por_documento(df_ext: pd.DataFrame, df_raz: pd.DataFrame, col_ext: str, col_raz: str) -> None:
         pend_ext = df_ext[~df_ext["matched"] & (df_ext["_doc_key"].str.len() > 0)]
@@ -151,8 +190,8 @@ def _fazer_matching_registros(
     creditos_raz["_doc_key"] = _key_documento(creditos_raz)
 
     # FASE 1: DATA + DOCUMENTO + VALOR
-    _match_exato_doc_valor(entradas_ext, debitos_raz, "entrada", "debito")
-    _match_exato_doc_valor(saidas_ext, creditos_raz, "saida", "credito")
+    _casar_por_valor(entradas_ext, debitos_raz, "entrada", "debito", "_doc_key")
+    _casar_por_valor(saidas_ext, creditos_raz, "saida", "credito", "_doc_key")
 
     # FASE 2: DATA + DOCUMENTO (soma)
     _match_soma_por_documento(entradas_ext, debitos_raz, "entrada", "debito")
@@ -163,35 +202,8 @@ def _fazer_matching_registros(
     _match_soma_documentos_relacionados(entradas_ext, debitos_raz, "entrada", "debito")
 
     # FASE 3: DATA + VALOR (fallback)
-    for idx_ext in entradas_ext.index:
-        if entradas_ext.loc[idx_ext, "matched"]:
-            continue
-        valor_ext = entradas_ext.loc[idx_ext, "entrada"]
-
-        for idx_raz in debitos_raz.index:
-            if debitos_raz.loc[idx_raz, "matched"]:
-                continue
-            valor_raz = debitos_raz.loc[idx_raz, "debito"]
-
-            if abs(valor_ext - valor_raz) <= THRESHOLD_CONCILIACAO:
-                entradas_ext.loc[idx_ext, "matched"] = True
-                debitos_raz.loc[idx_raz, "matched"] = True
-                break
-
-    for idx_ext in saidas_ext.index:
-        if saidas_ext.loc[idx_ext, "matched"]:
-            continue
-        valor_ext = saidas_ext.loc[idx_ext, "saida"]
-
-        for idx_raz in creditos_raz.index:
-            if creditos_raz.loc[idx_raz, "matched"]:
-                continue
-            valor_raz = creditos_raz.loc[idx_raz, "credito"]
-
-            if abs(valor_ext - valor_raz) <= THRESHOLD_CONCILIACAO:
-                saidas_ext.loc[idx_ext, "matched"] = True
-                creditos_raz.loc[idx_raz, "matched"] = True
-                break
+    _casar_por_valor(entradas_ext, debitos_raz, "entrada", "debito")
+    _casar_por_valor(saidas_ext, creditos_raz, "saida", "credito")
 
     # ==========================
     # NOTA: Validacao final removida - registros sem match devem permanecer visiveis
@@ -200,66 +212,36 @@ def _fazer_matching_registros(
     validacao_final_saidas = False
 
     # Coletar registros nao matched
-    def _formatar_extrato(row, tipo: str) -> Dict:
-        valor = row.get("entrada", 0) if tipo == "entrada" else row.get("saida", 0)
-        return {
-            "data": row.get("data", ""),
-            "documento": row.get("documento", ""),
-            "prefixo": row.get("prefixo", ""),
-            "numero": row.get("numero", ""),
-            "descricao": row.get("descricao", ""),
-            "valor": round(float(valor), 2),
-            "tipo": tipo.upper(),
-        }
-
-    def _formatar_razao(row, tipo: str) -> Dict:
-        valor = row.get("debito", 0) if tipo == "debito" else row.get("credito", 0)
-        return {
-            "data": row.get("data", ""),
-            "lote_doc": row.get("lote_doc", ""),
-            "historico": row.get("historico", ""),
-            "documento_extraido": row.get("documento_extraido", ""),
-            "prefixo": row.get("prefixo", ""),
-            "numero": row.get("numero", ""),
-            "valor": round(float(valor), 2),
-            "tipo": tipo.upper(),
-        }
+    campos_extrato = ["data", "documento", "prefixo", "numero", "descricao"]
+    campos_razao = ["data", "lote_doc", "historico", "documento_extraido", "prefixo", "numero"]
 
     # Registros NAO conciliados (pendentes)
-    so_extrato_entradas = [
-        _formatar_extrato(row, "entrada")
-        for _, row in entradas_ext[~entradas_ext["matched"]].iterrows()
-    ]
-    so_extrato_saidas = [
-        _formatar_extrato(row, "saida")
-        for _, row in saidas_ext[~saidas_ext["matched"]].iterrows()
-    ]
-    so_razao_debitos = [
-        _formatar_razao(row, "debito")
-        for _, row in debitos_raz[~debitos_raz["matched"]].iterrows()
-    ]
-    so_razao_creditos = [
-        _formatar_razao(row, "credito")
-        for _, row in creditos_raz[~creditos_raz["matched"]].iterrows()
-    ]
+    so_extrato_entradas = _registros_para_dicts(
+        entradas_ext[~entradas_ext["matched"]], campos_extrato, "entrada"
+    )
+    so_extrato_saidas = _registros_para_dicts(
+        saidas_ext[~saidas_ext["matched"]], campos_extrato, "saida"
+    )
+    so_razao_debitos = _registros_para_dicts(
+        debitos_raz[~debitos_raz["matched"]], campos_razao, "debito"
+    )
+    so_razao_creditos = _registros_para_dicts(
+        creditos_raz[~creditos_raz["matched"]], campos_razao, "credito"
+    )
 
     # Registros CONCILIADOS (matched) - para mostrar em verde
-    conciliados_extrato_entradas = [
-        _formatar_extrato(row, "entrada")
-        for _, row in entradas_ext[entradas_ext["matched"]].iterrows()
-    ]
-    conciliados_extrato_saidas = [
-        _formatar_extrato(row, "saida")
-        for _, row in saidas_ext[saidas_ext["matched"]].iterrows()
-    ]
-    conciliados_razao_debitos = [
-        _formatar_razao(row, "debito")
-        for _, row in debitos_raz[debitos_raz["matched"]].iterrows()
-    ]
-    conciliados_razao_creditos = [
-        _formatar_razao(row, "credito")
-        for _, row in creditos_raz[creditos_raz["matched"]].iterrows()
-    ]
+    conciliados_extrato_entradas = _registros_para_dicts(
+        entradas_ext[entradas_ext["matched"]], campos_extrato, "entrada"
+    )
+    conciliados_extrato_saidas = _registros_para_dicts(
+        saidas_ext[saidas_ext["matched"]], campos_extrato, "saida"
+    )
+    conciliados_razao_debitos = _registros_para_dicts(
+        debitos_raz[debitos_raz["matched"]], campos_razao, "debito"
+    )
+    conciliados_razao_creditos = _registros_para_dicts(
+        creditos_raz[creditos_raz["matched"]], campos_razao, "credito"
+    )
 
     return (
         so_extrato_entradas,
@@ -12,10 +12,17 @@ BANCO,AGENCIA,CONTA,SALDO INICIAL,DATA,OPERACAO,DOCUMENTO,PREFIXO/TITULO,
 ENTRADAS,SAIDAS,SALDO ATUAL,CONCILIADOS,DESCRICAO,NAO CONCILIADOS,CONCILIADOS,TOTAL
 """
 
+import numpy as np
 import pandas as pd
 import re
 import logging
-from typing import Any, Optional, Tuple
+from functools import lru_cache
+from typing import Any, List, Optional, Tuple
+
+from tools.datas import formatar_datas
+from tools.layouts import LAYOUT_EXTRATO_BANCARIO, resolver_layout
+from tools.numeros import converter_numeros
+from tools.planilhas import ler_excel
 
 logger = logging.getLogger(__name__)
 
@@ -35,8 +42,15 @@ def normalizar_nome_colunas(df: pd.DataFrame) -> pd.DataFrame:
     - Substitui caracteres especiais por underscore
     - Remove underscores duplicados e nas extremidades
     """
-    import unicodedata
     df = df.copy()
+    df.columns = _normalizar_cabecalho(tuple(df.columns))
+    return df
+
+
+@lru_cache(maxsize=256)
+def _normalizar_cabecalho(colunas: Tuple[Any, ...]) -> List[str]:
+    """Normaliza um cabecalho; memoizado porque o ERP repete os mesmos layouts."""
+    import unicodedata
 
     # Primeiro, remover acentos
     def remove_acentos(s):
@@ -45,10 +59,8 @@ def normalizar_nome_colunas(df: pd.DataFrame) -> pd.DataFrame:
             if unicodedata.category(c) != 'Mn'
         )
 
-    df.columns = [remove_acentos(col) for col in df.columns]
-
-    df.columns = (
-        df.columns
+    return list(
+        pd.Index([remove_acentos(col) for col in colunas], dtype=object)
         .astype(str)
         .str.strip()
         .str.lower()
@@ -59,78 +71,11 @@ def normalizar_nome_colunas(df: pd.DataFrame) -> pd.DataFrame:
         .str.replace(r"_+", "_", regex=True)
         .str.strip("_")
     )
-    return df
-
 
-def parse_numero_brasileiro(valor: Any) -> float:
-    """
-    Converte numeros em formato brasileiro para float.
-
-    Formatos suportados:
-    - 1.234.567,89 (BR com milhar)
-    - 1234,89 (BR sem milhar)
-    - (1.234,89) (negativo por parenteses)
-    - 1234,89- (negativo por sufixo)
-    - -1234,89 (negativo por prefixo)
-    - R$ 1.234,89 (com simbolo de moeda)
-    """
-    if pd.isna(valor):
-        return 0.0
-
-    if isinstance(valor, (int, float)):
-        return float(valor)
-
-    s = str(valor).strip()
-    if not s:
-        return 0.0
-
-    # Remover espacos e simbolos comuns
-    s = s.replace("\u00a0", "").replace(" ", "")
-
-    # Remover R$ e outros prefixos de moeda
-    s = s.replace("R$", "").replace("r$", "").strip()
-
-    # Detectar negativo
-    negativo = False
-    if s.startswith("(") and s.endswith(")"):
-        negativo = True
-        s = s[1:-1]
-    if s.endswith("-"):
-        negativo = True
-        s = s[:-1]
-    if s.startswith("-"):
-        negativo = True
-        s = s[1:]
-
-    # Remover caracteres nao numericos (exceto , . -)
-    s = re.sub(r"[^0-9,\.\-]", "", s)
-
-    if not s:
-        return 0.0
-
-    # Converter formato BR para formato internacional
-    # Detectar se e formato brasileiro (1.234,56) ou internacional (1,234.56)
-    if "," in s and "." in s:
-        # Se a virgula vem depois do ponto, e formato BR
-        if s.rfind(",") > s.rfind("."):
-            s = s.replace(".", "").replace(",", ".")
-        else:
-            # Formato internacional
-            s = s.replace(",", "")
-    elif "," in s:
-        # Apenas virgula - formato BR (1234,56)
-        s = s.replace(",", ".")
-    elif s.count(".") > 1:
-        # Multiplos pontos - separador de milhar
-        s = s.replace(".", "")
 
-    try:
-        valor_float = float(s)
-        if negativo:
-            valor_float = -valor_float
-        return valor_float
-    except Exception:
-        return 0.0
+# PREFIXO/TITULO sem espacos e com "/" trocado por "-": separado no primeiro
+# hifen (RA-01120253), ou letras seguidas de digitos (BOL501819069), ou so numero
+_PADRAO_PREFIXO_NUMERO = re.compile(r"^(?:([^-]*)-(.*)|([A-Z]+)(\d+)|(.*))$", re.DOTALL)
 
 
 def extrair_prefixo_numero(prefixo_titulo: str) -> Tuple[str, str]:
@@ -144,37 +89,47 @@ def extrair_prefixo_numero(prefixo_titulo: str) -> Tuple[str, str]:
     - BOL-501819069
     - NF9-000034395
 
+    Para a coluna inteira use ``extrair_prefixos_numeros``.
+
     Returns:
         Tupla (prefixo, numero) normalizados
     """
-    if pd.isna(prefixo_titulo) or not str(prefixo_titulo).strip():
-        return "", ""
+    prefixos_numeros = extrair_prefixos_numeros(pd.Series([prefixo_titulo], dtype=object))
+    return tuple(prefixos_numeros.iloc[0])
 
-    texto = str(prefixo_titulo).strip().upper()
 
-    # Remover espacos extras e normalizar separadores
-    texto = re.sub(r"\s+", "", texto)  # Remove todos os espacos
-    texto = texto.replace("/", "-")
+def extrair_prefixos_numeros(prefixos_titulos: pd.Series) -> pd.DataFrame:
+    """
+    Extrai prefixo e numero de cada PREFIXO/TITULO (ver ``extrair_prefixo_numero``)
+    de uma vez, uma vez por texto distinto.
 
-    # Tentar separar por hifen
-    if "-" in texto:
-        partes = texto.split("-", 1)
-        prefixo = partes[0].strip()
-        numero_raw = partes[1].strip() if len(partes) > 1 else ""
-    else:
-        # Tenta extrair letras iniciais como prefixo
-        match = re.match(r"^([A-Z]+)(\d+)$", texto)
-        if match:
-            prefixo = match.group(1)
-            numero_raw = match.group(2)
-        else:
-            prefixo = ""
-            numero_raw = texto
+    Returns:
+        DataFrame com prefixo e numero, no indice de ``prefixos_titulos``
+    """
+    codigos, unicos = pd.factorize(prefixos_titulos.astype(object))
+    textos = (
+        pd.Series(unicos, dtype=object)
+        .astype(str)
+        .str.strip()
+        .str.upper()
+        .str.replace(r"\s+", "", regex=True)
+        .str.replace("/", "-", regex=False)
+        .astype(object)
+    )
 
+    grupos = textos.str.extract(_PADRAO_PREFIXO_NUMERO)
+    prefixo = grupos[0].fillna(grupos[2]).fillna("")
+    numero_raw = grupos[1].fillna(grupos[3]).fillna(grupos[4])
     # Normalizar numero: remover zeros a esquerda
-    numero = re.sub(r"^0+", "", numero_raw) or "0"
+    numero = numero_raw.str.lstrip("0").replace("", "0")
 
-    return prefixo, numero
+    # Vazios e ausentes (codigo -1, a ultima linha) ficam sem prefixo e numero
+    vazio = textos.eq("")
+    resultado = np.empty((len(textos) + 1, 2), dtype=object)
+    resultado[:] = ""
+    resultado[:-1, 0] = prefixo.where(~vazio, "").to_numpy(dtype=object)
+    resultado[:-1, 1] = numero.where(~vazio, "").to_numpy(dtype=object)
+    return pd.DataFrame(resultado[codigos], index=prefixos_titulos.index, columns=["prefixo", "numero"])
 
 
 def formatar_data(data: Any) -> str:
@@ -273,7 +228,7 @@ def normalizar_extrato_bancario(entrada: Any) -> pd.DataFrame:
     if isinstance(entrada, pd.DataFrame):
         df = entrada.copy()
     elif isinstance(entrada, str):
-        df = pd.read_excel(entrada)
+        df = ler_excel(entrada)
     else:
         raise ValueError("entrada deve ser DataFrame ou caminho de arquivo")
 
@@ -283,19 +238,34 @@ def normalizar_extrato_bancario(entrada: Any) -> pd.DataFrame:
     # ==========================
     # 2. NORMALIZAR COLUNAS
     # ==========================
+    colunas_originais = list(df.columns)
     df = normalizar_nome_colunas(df)
     logger.info(f"[EXTRATO BANCARIO] Colunas normalizadas: {list(df.columns)}")
 
     # ==========================
     # 3. MAPEAR COLUNAS
     # ==========================
-    col_data = obter_coluna(df, ["data", "dt", "data_movimento"])
-    col_documento = obter_coluna(df, ["documento", "doc", "num_documento"])
-    col_prefixo_titulo = obter_coluna(df, ["prefixo_titulo", "prefixo", "titulo"])
-    col_entradas = obter_coluna(df, ["entradas", "entrada", "credito", "creditos"])
-    col_saidas = obter_coluna(df, ["saidas", "saida", "debito", "debitos"])
-    col_saldo = obter_coluna(df, ["saldo_atual", "saldo", "saldo_final"])
-    col_descricao = obter_coluna(df, ["descricao", "historico", "desc"])
+    # Resolvido uma vez por layout (cache pela impressao digital do cabecalho)
+    layout = resolver_layout(
+        LAYOUT_EXTRATO_BANCARIO,
+        colunas_originais,
+        lambda: {
+            "data": obter_coluna(df, ["data", "dt", "data_movimento"]),
+            "documento": obter_coluna(df, ["documento", "doc", "num_documento"]),
+            "prefixo_titulo": obter_coluna(df, ["prefixo_titulo", "prefixo", "titulo"]),
+            "entradas": obter_coluna(df, ["entradas", "entrada", "credito", "creditos"]),
+            "saidas": obter_coluna(df, ["saidas", "saida", "debito", "debitos"]),
+            "saldo": obter_coluna(df, ["saldo_atual", "saldo", "saldo_final"]),
+            "descricao": obter_coluna(df, ["descricao", "historico", "desc"]),
+        },
+    )
+    col_data = layout["data"]
+    col_documento = layout["documento"]
+    col_prefixo_titulo = layout["prefixo_titulo"]
+    col_entradas = layout["entradas"]
+    col_saidas = layout["saidas"]
+    col_saldo = layout["saldo"]
+    col_descricao = layout["descricao"]
 
     # Log das colunas encontradas
     logger.info(f"[EXTRATO BANCARIO] Coluna DATA: {col_data}")
@@ -322,7 +292,7 @@ def normalizar_extrato_bancario(entrada: Any) -> pd.DataFrame:
     df_norm = pd.DataFrame()
 
     # Data
-    df_norm["data"] = df[col_data].apply(formatar_data)
+    df_norm["data"] = formatar_datas(df[col_data], fallback=formatar_data, serial_minimo=1000)
 
     # Documento original
     if col_documento:
@@ -332,14 +302,12 @@ def normalizar_extrato_bancario(entrada: Any) -> pd.DataFrame:
 
     # Prefixo e numero do PREFIXO/TITULO
     if col_prefixo_titulo:
-        prefixo_numero = df[col_prefixo_titulo].apply(extrair_prefixo_numero)
-        df_norm["prefixo"] = prefixo_numero.apply(lambda x: x[0])
-        df_norm["numero"] = prefixo_numero.apply(lambda x: x[1])
+        prefixo_numero = extrair_prefixos_numeros(df[col_prefixo_titulo])
     else:
         # Tentar extrair do documento
-        prefixo_numero = df_norm["documento"].apply(extrair_prefixo_numero)
-        df_norm["prefixo"] = prefixo_numero.apply(lambda x: x[0])
-        df_norm["numero"] = prefixo_numero.apply(lambda x: x[1])
+        prefixo_numero = extrair_prefixos_numeros(df_norm["documento"])
+    df_norm["prefixo"] = prefixo_numero["prefixo"]
+    df_norm["numero"] = prefixo_numero["numero"]
 
     # Chave de documento normalizada para matching
     df_norm["chave_documento"] = df_norm["prefixo"] + "_" + df_norm["numero"]
@@ -352,12 +320,12 @@ def normalizar_extrato_bancario(entrada: Any) -> pd.DataFrame:
 
     # Valores de entrada e saida
     if col_entradas:
-        df_norm["entrada"] = df[col_entradas].apply(parse_numero_brasileiro)
+        df_norm["entrada"] = converter_numeros(df[col_entradas], padrao=0.0, sufixo_dc=False)
     else:
         df_norm["entrada"] = 0.0
 
     if col_saidas:
-        df_norm["saida"] = df[col_saidas].apply(parse_numero_brasileiro)
+        df_norm["saida"] = converter_numeros(df[col_saidas], padrao=0.0, sufixo_dc=False)
     else:
         df_norm["saida"] = 0.0
 
@@ -372,7 +340,7 @@ def normalizar_extrato_bancario(entrada: Any) -> pd.DataFrame:
 
     # Saldo atual
     if col_saldo:
-        df_norm["saldo_atual"] = df[col_saldo].apply(parse_numero_brasileiro)
+        df_norm["saldo_atual"] = converter_numeros(df[col_saldo], padrao=0.0, sufixo_dc=False)
     else:
         df_norm["saldo_atual"] = 0.0
 
@@ -17,11 +17,18 @@ Extracao de documentos do HISTORICO:
 - CFOP: 6501 NF 000003941 - DASSOLER AGRO
 """
 
+import numpy as np
 import pandas as pd
 import re
 import logging
+from functools import lru_cache
 from typing import Any, Optional, Tuple, List
 
+from tools.datas import formatar_datas
+from tools.layouts import LAYOUT_RAZAO_BANCO, resolver_layout
+from tools.numeros import converter_numeros
+from tools.planilhas import ler_excel
+
 logger = logging.getLogger(__name__)
 
 
@@ -31,8 +38,15 @@ logger = logging.getLogger(__name__)
 
 def normalizar_nome_colunas(df: pd.DataFrame) -> pd.DataFrame:
     """Normaliza os nomes das colunas de um DataFrame."""
-    import unicodedata
     df = df.copy()
+    df.columns = _normalizar_cabecalho(tuple(df.columns))
+    return df
+
+
+@lru_cache(maxsize=256)
+def _normalizar_cabecalho(colunas: Tuple[Any, ...]) -> List[str]:
+    """Normaliza um cabecalho; memoizado porque o ERP repete os mesmos layouts."""
+    import unicodedata
 
     # Primeiro, remover acentos
     def remove_acentos(s):
@@ -41,10 +55,8 @@ def normalizar_nome_colunas(df: pd.DataFrame) -> pd.DataFrame:
             if unicodedata.category(c) != 'Mn'
         )
 
-    df.columns = [remove_acentos(col) for col in df.columns]
-
-    df.columns = (
-        df.columns
+    return list(
+        pd.Index([remove_acentos(col) for col in colunas], dtype=object)
         .astype(str)
         .str.strip()
         .str.lower()
@@ -55,75 +67,24 @@ def normalizar_nome_colunas(df: pd.DataFrame) -> pd.DataFrame:
         .str.replace(r"_+", "_", regex=True)
         .str.strip("_")
     )
-    return df
 
 
-def parse_numero_brasileiro(valor: Any) -> float:
-    """Converte numeros em formato brasileiro para float."""
-    if pd.isna(valor):
-        return 0.0
-
-    if isinstance(valor, (int, float)):
-        return float(valor)
-
-    s = str(valor).strip()
-    if not s:
-        return 0.0
-
-    # Remover espacos e simbolos comuns
-    s = s.replace("\u00a0", "").replace(" ", "")
-
-    # Remover R$ e outros prefixos de moeda
-    s = s.replace("R$", "").replace("r$", "").strip()
-
-    # Detectar sufixo D/C
-    credito = False
-    if s.upper().endswith("C"):
-        credito = True
-        s = s[:-1]
-    elif s.upper().endswith("D"):
-        s = s[:-1]
-
-    # Remover caracteres nao numericos (exceto , . - ())
-    s = re.sub(r"[^0-9,\.\-()]", "", s)
-
-    if not s:
-        return 0.0
-
-    # Detectar negativo
-    negativo = False
-    if s.startswith("(") and s.endswith(")"):
-        negativo = True
-        s = s[1:-1]
-    if s.endswith("-"):
-        negativo = True
-        s = s[:-1]
-    if s.startswith("-"):
-        negativo = True
-        s = s[1:]
-
-    # Converter formato BR para formato internacional
-    # Detectar se e formato brasileiro (1.234,56) ou internacional (1,234.56)
-    if "," in s and "." in s:
-        # Se a virgula vem depois do ponto, e formato BR
-        if s.rfind(",") > s.rfind("."):
-            s = s.replace(".", "").replace(",", ".")
-        else:
-            # Formato internacional
-            s = s.replace(",", "")
-    elif "," in s:
-        # Apenas virgula - formato BR (1234,56)
-        s = s.replace(",", ".")
-    elif s.count(".") > 1:
-            s = s.replace(".", "")
+# Prefixos conhecidos, em ordem de prioridade (NF9 antes de NF)
+PREFIXOS_DOCUMENTO = (
+    "NF9", "NF", "RA", "PA", "DV", "FT", "BOL", "DUP", "FAT",
+    "REC", "PAG", "DEP", "TED", "DOC", "PIX", "CHQ", "CHEQUE"
+)
 
-    try:
-        valor_float = float(s)
-        if negativo or credito:
-            valor_float = -valor_float
-        return valor_float
-    except Exception:
-        return 0.0
+# Candidatos em ordem de prioridade, numa unica alternancia: BOL especial
+# (BOL NF501816337 / BOL501816337), um por prefixo conhecido (PREFIXO 000034619,
+# PREFIXO/000034619, PREFIXO-000034619) e o generico (sigla de 2 a 4 letras
+# seguida de 4+ digitos). Na mesma posicao vence o primeiro da alternancia.
+_CANDIDATOS_DOCUMENTO = [r"\bBOL\s*(?:NF)?\s*(\d+)"] + [
+    rf"\b{prefixo}[\s/\-]*(\d+)" for prefixo in PREFIXOS_DOCUMENTO
+] + [r"\b([A-Z]{2,4})[\s/\-]*(\d{4,})"]
+_PADRAO_DOCUMENTO = re.compile("|".join(_CANDIDATOS_DOCUMENTO))
+_PREFIXOS_CANDIDATOS = ("BOL",) + PREFIXOS_DOCUMENTO
+_DOCUMENTO_VAZIO = ("", "", "")
 
 
 def extrair_documento_historico(historico: str) -> Tuple[str, str, str]:
@@ -138,50 +99,66 @@ def extrair_documento_historico(historico: str) -> Tuple[str, str, str]:
     - RA 01120253
     - BOL 501819069
 
+    Para a coluna inteira use ``extrair_documentos_historico``.
+
     Returns:
         Tupla (documento_extraido, prefixo, numero)
     """
-    if pd.isna(historico) or not str(historico).strip():
-        return "", "", ""
-
-    texto = str(historico).strip().upper()
-
-    # Padrao especial: BOL NF501816337 / BOL501816337
-    match = re.search(r'\bBOL\s*(?:NF)?\s*(\d+)', texto)
-    if match:
-        numero_raw = match.group(1)
-        numero = re.sub(r"^0+", "", numero_raw) or "0"
-        documento = f"BOL {numero_raw}"
-        return documento, "BOL", numero
-
-    # Lista de prefixos conhecidos
-    prefixos_conhecidos = [
-        "NF9", "NF", "RA", "PA", "DV", "FT", "BOL", "DUP", "FAT",
-        "REC", "PAG", "DEP", "TED", "DOC", "PIX", "CHQ", "CHEQUE"
-    ]
-
-    # Tentar encontrar padrao: PREFIXO + NUMERO
-    for prefixo in prefixos_conhecidos:
-        # Padrao: PREFIXO 000034619 ou PREFIXO/000034619 ou PREFIXO-000034619
-        pattern = rf'\b{prefixo}[\s/\-]*(\d+)'
-        match = re.search(pattern, texto)
-        if match:
-            numero_raw = match.group(1)
-            # Remover zeros a esquerda
-            numero = re.sub(r"^0+", "", numero_raw) or "0"
-            documento = f"{prefixo} {numero_raw}"
-            return documento, prefixo, numero
-
-    # Tentar padrao generico: qualquer sequencia de letras seguida de numeros
-    match = re.search(r'\b([A-Z]{2,4})[\s/\-]*(\d{4,})', texto)
-    if match:
-        prefixo = match.group(1)
-        numero_raw = match.group(2)
-        numero = re.sub(r"^0+", "", numero_raw) or "0"
-        documento = f"{prefixo} {numero_raw}"
-        return documento, prefixo, numero
-
-    return "", "", ""
+    documentos = extrair_documentos_historico(pd.Series([historico], dtype=object))
+    return tuple(documentos.iloc[0])
+
+
+def extrair_documentos_historico(historicos: pd.Series) -> pd.DataFrame:
+    """
+    Extrai documento, prefixo e numero de cada HISTORICO (ver
+    ``extrair_documento_historico``) de uma vez.
+
+    O padrao percorre cada texto uma vez (``str.extractall``) e, entre os
+    documentos encontrados, fica o de prefixo mais prioritario (o primeiro no
+    texto, em caso de empate). Os historicos do CTBR400 se repetem muito: o
+    padrao roda uma vez por texto distinto e o resultado e espalhado para as
+    linhas.
+
+    Returns:
+        DataFrame com documento_extraido, prefixo e numero, no indice de ``historicos``
+    """
+    codigos, unicos = pd.factorize(historicos.astype(object))
+    textos = pd.Series(unicos, dtype=object).astype(str).str.strip().str.upper().astype(object)
+    resultado = np.empty((len(textos) + 1, 3), dtype=object)
+    resultado[:] = _DOCUMENTO_VAZIO
+
+    encontrados = textos.str.extractall(_PADRAO_DOCUMENTO)
+    if len(encontrados):
+        grupos = encontrados.to_numpy(dtype=object)
+        total_conhecidos = len(_PREFIXOS_CANDIDATOS)
+        # Grupo preenchido = candidato; os dois ultimos grupos sao o generico
+        candidato = np.minimum(pd.notna(grupos).argmax(axis=1), total_conhecidos)
+        generico = candidato == total_conhecidos
+        linhas = np.arange(len(grupos))
+        prefixo = np.where(
+            generico, grupos[:, -2], np.append(_PREFIXOS_CANDIDATOS, "")[candidato]
+        )
+        numero_raw = np.where(generico, grupos[:, -1], grupos[linhas, candidato])
+
+        escolhidos = pd.DataFrame({
+            "texto": encontrados.index.get_level_values(0),
+            "candidato": candidato,
+            "prefixo": prefixo,
+            "numero_raw": numero_raw,
+        }).sort_values(["texto", "candidato"], kind="stable").drop_duplicates("texto")
+
+        numero_raw = escolhidos["numero_raw"].astype(object)
+        resultado[escolhidos["texto"].to_numpy(), 0] = escolhidos["prefixo"] + " " + numero_raw
+        resultado[escolhidos["texto"].to_numpy(), 1] = escolhidos["prefixo"]
+        # Remover zeros a esquerda
+        resultado[escolhidos["texto"].to_numpy(), 2] = numero_raw.str.lstrip("0").replace("", "0")
+
+    # Codigo -1 (ausente) aponta para a ultima linha: vazia
+    return pd.DataFrame(
+        resultado[codigos],
+        index=historicos.index,
+        columns=["documento_extraido", "prefixo", "numero"],
+    )
 
 
 def formatar_data(data: Any) -> str:
@@ -297,7 +274,7 @@ def normalizar_razao_banco(entrada: Any) -> pd.DataFrame:
     if isinstance(entrada, pd.DataFrame):
         df = entrada.copy()
     elif isinstance(entrada, str):
-        df = pd.read_excel(entrada)
+        df = ler_excel(entrada)
     else:
         raise ValueError("entrada deve ser DataFrame ou caminho de arquivo")
 
@@ -307,24 +284,35 @@ def normalizar_razao_banco(entrada: Any) -> pd.DataFrame:
     # ==========================
     # 2. NORMALIZAR COLUNAS
     # ==========================
+    colunas_originais = list(df.columns)
     df = normalizar_nome_colunas(df)
     logger.info(f"[RAZAO BANCO] Colunas normalizadas: {list(df.columns)}")
 
     # ==========================
     # 3. MAPEAR COLUNAS
     # ==========================
-    col_data = obter_coluna(df, ["data", "dt", "data_lancamento", "data_lanc"])
-    col_lote_doc = obter_coluna(df, ["lote_sub_doc_linha", "lote", "documento", "doc"])
-
-    # Historico pode ter varios nomes
-    col_historico = obter_coluna(df, ["historico", "hist", "descricao"])
-
-    # Debito e credito
-    col_debito = obter_coluna(df, ["debito", "deb", "valor_debito"])
-    col_credito = obter_coluna(df, ["credito", "cred", "valor_credito"])
-
-    # Saldo
-    col_saldo = obter_coluna(df, ["saldo_atual", "saldo", "saldo_final"])
+    # Resolvido uma vez por layout (cache pela impressao digital do cabecalho)
+    layout = resolver_layout(
+        LAYOUT_RAZAO_BANCO,
+        colunas_originais,
+        lambda: {
+            "data": obter_coluna(df, ["data", "dt", "data_lancamento", "data_lanc"]),
+            "lote_doc": obter_coluna(df, ["lote_sub_doc_linha", "lote", "documento", "doc"]),
+            # Historico pode ter varios nomes
+            "historico": obter_coluna(df, ["historico", "hist", "descricao"]),
+            # Debito e credito
+            "debito": obter_coluna(df, ["debito", "deb", "valor_debito"]),
+            "credito": obter_coluna(df, ["credito", "cred", "valor_credito"]),
+            # Saldo
+            "saldo": obter_coluna(df, ["saldo_atual", "saldo", "saldo_final"]),
+        },
+    )
+    col_data = layout["data"]
+    col_lote_doc = layout["lote_doc"]
+    col_historico = layout["historico"]
+    col_debito = layout["debito"]
+    col_credito = layout["credito"]
+    col_saldo = layout["saldo"]
 
     # Log das colunas encontradas
     logger.info(f"[RAZAO BANCO] Coluna DATA: {col_data}")
@@ -354,7 +342,7 @@ def normalizar_razao_banco(entrada: Any) -> pd.DataFrame:
     df_norm = pd.DataFrame()
 
     # Data
-    df_norm["data"] = df[col_data].apply(formatar_data)
+    df_norm["data"] = formatar_datas(df[col_data], fallback=formatar_data, serial_minimo=1000)
 
     # Lote/Documento original
     if col_lote_doc:
@@ -366,10 +354,10 @@ def normalizar_razao_banco(entrada: Any) -> pd.DataFrame:
     df_norm["historico"] = df[col_historico].astype(str).str.strip()
 
     # Extrair documento do historico
-    doc_extraido = df_norm["historico"].apply(extrair_documento_historico)
-    df_norm["documento_extraido"] = doc_extraido.apply(lambda x: x[0])
-    df_norm["prefixo"] = doc_extraido.apply(lambda x: x[1])
-    df_norm["numero"] = doc_extraido.apply(lambda x: x[2])
+    doc_extraido = extrair_documentos_historico(df_norm["historico"])
+    df_norm["documento_extraido"] = doc_extraido["documento_extraido"]
+    df_norm["prefixo"] = doc_extraido["prefixo"]
+    df_norm["numero"] = doc_extraido["numero"]
 
     # Chave de documento normalizada para matching
     df_norm["chave_documento"] = df_norm["prefixo"] + "_" + df_norm["numero"]
@@ -379,7 +367,7 @@ def normalizar_razao_banco(entrada: Any) -> pd.DataFrame:
         # Log amostra dos valores originais
         amostra_deb = df[col_debito].head(5).tolist()
         logger.info(f"[RAZAO BANCO] Amostra DEBITO original: {amostra_deb}")
-        df_norm["debito"] = df[col_debito].apply(parse_numero_brasileiro).abs()
+        df_norm["debito"] = converter_numeros(df[col_debito], padrao=0.0).abs()
         logger.info(f"[RAZAO BANCO] Amostra DEBITO convertido: {df_norm['debito'].head(5).tolist()}")
     else:
         df_norm["debito"] = 0.0
@@ -388,7 +376,7 @@ def normalizar_razao_banco(entrada: Any) -> pd.DataFrame:
         # Log amostra dos valores originais
         amostra_cred = df[col_credito].head(5).tolist()
         logger.info(f"[RAZAO BANCO] Amostra CREDITO original: {amostra_cred}")
-        df_norm["credito"] = df[col_credito].apply(parse_numero_brasileiro).abs()
+        df_norm["credito"] = converter_numeros(df[col_credito], padrao=0.0).abs()
         logger.info(f"[RAZAO BANCO] Amostra CREDITO convertido: {df_norm['credito'].head(5).tolist()}")
     else:
         df_norm["credito"] = 0.0
@@ -408,7 +396,7 @@ def normalizar_razao_banco(entrada: Any) -> pd.DataFrame:
 
     # Saldo atual
     if col_saldo:
-        df_norm["saldo_atual"] = df[col_saldo].apply(parse_numero_brasileiro)
+        df_norm["saldo_atual"] = converter_numeros(df[col_saldo], padrao=0.0)
     else:
         df_norm["saldo_atual"] = 0.0
 
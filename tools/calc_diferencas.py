@@ -29,9 +29,9 @@ def calcular_diferencas(df_financeiro: pd.DataFrame, df_contabilidade: pd.DataFr
     
     print("[INFO] Calculando diferencas...")
     
-    # Padronizar nomes das colunas
-    df_fin = df_financeiro.copy()
-    df_cont = df_contabilidade.copy()
+    # Bases apenas lidas: o merge abaixo já monta um DataFrame novo
+    df_fin = df_financeiro
+    df_cont = df_contabilidade
     
     # Garantir que as colunas existem
     if 'codigo' not in df_fin.columns or 'valor' not in df_fin.columns:
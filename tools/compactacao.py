@@ -0,0 +1,33 @@
+"""
+Tipos compactos para as colunas derivadas das bases da conciliacao.
+
+Em dtype object cada celula de texto e um ``str`` Python (cerca de 50 bytes
+alem do proprio texto). Nas colunas montadas a partir do razao geral:
+
+- textos com poucos valores distintos (contas, datas ja formatadas, tipo D/C)
+  viram ``category``: um codigo inteiro por linha e cada texto uma unica vez;
+- textos livres (historico, documento) viram string do Arrow: um unico
+  buffer contiguo, sem um objeto por celula.
+
+Os valores lidos de volta (``tolist``, iteracao, ``itertuples``) sao os
+mesmos ``str``; a saida dos relatorios nao muda.
+"""
+
+import pandas as pd
+
+TEXTO_ARROW = pd.StringDtype("pyarrow")
+
+# Acima desta proporcao de valores distintos a categoria nao compensa
+PROPORCAO_MAXIMA_CATEGORIA = 0.5
+
+
+def categorizar(serie: pd.Series) -> pd.Series:
+    """Coluna como ``category`` se tiver poucos valores distintos; senao, como esta."""
+    if len(serie) and serie.nunique(dropna=False) <= len(serie) * PROPORCAO_MAXIMA_CATEGORIA:
+        return serie.astype("category")
+    return serie
+
+
+def texto_compacto(serie: pd.Series) -> pd.Series:
+    """Coluna de textos (``str``, sem ausentes) como string do Arrow."""
+    return serie.astype(TEXTO_ARROW)
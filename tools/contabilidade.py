@@ -1,6 +1,10 @@
 ﻿import pandas as pd
 import re
 
+from tools.layouts import LAYOUT_BALANCETE, resolver_layout
+from tools.numeros import DECIMAL_VIRGULA, converter_numeros
+from tools.planilhas import ler_excel
+
 
 def normalizar_planilha_contabilidade(entrada):
     """
@@ -17,9 +21,9 @@ def normalizar_planilha_contabilidade(entrada):
     # 1️⃣ CARREGAR DATAFRAME
     # ==========================
     if isinstance(entrada, pd.DataFrame):
-        df = entrada.copy()
+        df = entrada  # apenas lido; o resultado é montado em df_norm
     elif isinstance(entrada, str):
-        df = pd.read_excel(entrada)
+        df = ler_excel(entrada)
     else:
         raise ValueError("entrada deve ser DataFrame ou caminho de arquivo")
 
@@ -29,20 +33,29 @@ def normalizar_planilha_contabilidade(entrada):
     def normalizar_nome(col: str) -> str:
         return re.sub(r"[^a-z0-9]+", "_", str(col).strip().lower()).strip("_")
 
-    colunas_norm = [(col, normalizar_nome(col)) for col in df.columns]
-
-    codigo_cols = [col for col, norm in colunas_norm if norm.startswith("codigo")]
-    descricao_cols = [col for col, norm in colunas_norm if norm.startswith("descricao")]
-    saldo_cols = [
-        col
-        for col, norm in colunas_norm
-        if norm == "saldo_atual" or norm.startswith("saldo_atual")
-    ]
-
-    # Quando há duplicidade de Codigo/Descricao, a primeira costuma ser a conta contábil.
-    col_codigo = codigo_cols[1] if len(codigo_cols) > 1 else (codigo_cols[0] if codigo_cols else None)
-    col_cliente = descricao_cols[1] if len(descricao_cols) > 1 else (descricao_cols[0] if descricao_cols else None)
-    col_valor = saldo_cols[0] if saldo_cols else None
+    def resolver_colunas():
+        colunas_norm = [(col, normalizar_nome(col)) for col in df.columns]
+
+        codigo_cols = [col for col, norm in colunas_norm if norm.startswith("codigo")]
+        descricao_cols = [col for col, norm in colunas_norm if norm.startswith("descricao")]
+        saldo_cols = [
+            col
+            for col, norm in colunas_norm
+            if norm == "saldo_atual" or norm.startswith("saldo_atual")
+        ]
+
+        # Quando há duplicidade de Codigo/Descricao, a primeira costuma ser a conta contábil.
+        return {
+            "codigo": codigo_cols[1] if len(codigo_cols) > 1 else (codigo_cols[0] if codigo_cols else None),
+            "cliente": descricao_cols[1] if len(descricao_cols) > 1 else (descricao_cols[0] if descricao_cols else None),
+            "valor": saldo_cols[0] if saldo_cols else None,
+        }
+
+    # Resolvido uma vez por layout (cache pela impressão digital do cabeçalho)
+    layout = resolver_layout(LAYOUT_BALANCETE, df.columns, resolver_colunas)
+    col_codigo = layout["codigo"]
+    col_cliente = layout["cliente"]
+    col_valor = layout["valor"]
 
     if not col_codigo or not col_valor:
         raise ValueError(
@@ -65,45 +78,8 @@ def normalizar_planilha_contabilidade(entrada):
     # ==========================
     # 5️⃣ CONVERTER VALOR
     # ==========================
-    def converter_valor(v: object) -> float:
-        if pd.isna(v):
-            return 0.0
-        if isinstance(v, (int, float)):
-            return float(v)
-
-        s = str(v).strip()
-        if not s:
-            return 0.0
-
-        negativo = False
-        if s.startswith("(") and s.endswith(")"):
-            negativo = True
-            s = s[1:-1]
-        if s.endswith("-"):
-            negativo = True
-            s = s[:-1]
-
-        s_upper = s.upper()
-        if s_upper.endswith("D") or s_upper.endswith("C"):
-            sufixo = s_upper[-1]
-            s = s[:-1]
-            if sufixo == "C":
-                negativo = True
-
-        s = (
-            s.replace("\u00a0", "")
-            .replace(" ", "")
-            .replace(".", "")
-            .replace(",", ".")
-        )
-
-        try:
-            valor = float(s)
-            return -valor if negativo else valor
-        except Exception:
-            return 0.0
-
-    df_norm["valor"] = df[col_valor].apply(converter_valor)
+    # Saldo do balancete: ponto é sempre milhar; sufixo C = credor (negativo)
+    df_norm["valor"] = converter_numeros(df[col_valor], padrao=0.0, decimal=DECIMAL_VIRGULA)
 
     # ==========================
     # 6️⃣ LIMPAR E AGRUPAR
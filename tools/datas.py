@@ -0,0 +1,115 @@
+"""
+Normalizacao vetorizada de datas para o formato DD/MM/YYYY.
+
+Os relatorios trazem datas em formatos misturados na mesma coluna: datetime do
+Excel/pandas, serial do Excel (numero ou texto), ISO (YYYY-MM-DD) e DD/MM/YYYY.
+``formatar_datas`` trabalha sobre os valores distintos da coluna, separa-os por
+classe de formato e converte cada classe com uma unica chamada vetorizada do
+pandas. O que nao se encaixa em nenhuma classe vai para a funcao escalar de
+fallback do chamador (tambem uma unica vez por valor distinto).
+"""
+
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+FORMATO_SAIDA = "%d/%m/%Y"
+
+# Excel usa epoch 30/12/1899; maior serial valido = 31/12/9999
+ORIGEM_EXCEL = "1899-12-30"
+SERIAL_MAXIMO = 2958465
+
+_PADRAO_SERIAL_TEXTO = r"\d+(?:\.\d+)?"
+_PADRAO_DD_MM_YYYY = r"\d{1,2}/\d{1,2}/\d{4}"
+_PADRAO_ISO = r"\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?"
+
+
+def formatar_datas(
+    valores: pd.Series,
+    fallback: Callable[[Any], str],
+    serial_minimo: float = 0,
+) -> pd.Series:
+    """
+    Formata uma coluna de datas em DD/MM/YYYY de forma vetorizada.
+
+    Parametros:
+    -----------
+    valores : pd.Series
+        Coluna com datas em qualquer dos formatos suportados
+    fallback : Callable
+        Formatador escalar aplicado aos valores que nao se encaixam nas classes
+        vetorizadas (e aos ausentes, para manter a semantica do chamador)
+    serial_minimo : float
+        Numeros (ou textos numericos) acima deste valor sao seriais do Excel;
+        os demais seguem para o fallback
+
+    Retorna:
+    --------
+    pd.Series de strings, com o mesmo indice de ``valores``
+    """
+    codigos, unicos = pd.factorize(valores.astype(object), use_na_sentinel=False)
+    unicos = pd.Series(unicos, dtype=object)
+    formatados = pd.Series(None, index=unicos.index, dtype=object)
+
+    # Classe 1: datetime (Timestamp, datetime, date, datetime64)
+    eh_data = unicos.map(_eh_data_nativa).astype(bool)
+    if eh_data.any():
+        formatados[eh_data] = _formatar_timestamps(
+            pd.to_datetime(unicos[eh_data], errors="coerce")
+        )
+
+    # Classe 2: serial do Excel (numero ou texto numerico)
+    seriais = pd.Series(np.nan, index=unicos.index)
+    eh_numero = unicos.map(_eh_numero).astype(bool)
+    if eh_numero.any():
+        seriais[eh_numero] = unicos[eh_numero].astype(float)
+    eh_texto = unicos.map(lambda v: isinstance(v, str)).astype(bool)
+    textos = unicos.where(eh_texto, "").astype(str)
+    eh_serial_texto = eh_texto & textos.str.fullmatch(_PADRAO_SERIAL_TEXTO)
+    if eh_serial_texto.any():
+        seriais[eh_serial_texto] = textos[eh_serial_texto].astype(float)
+    eh_serial = (seriais > max(serial_minimo, 0)) & (seriais <= SERIAL_MAXIMO)
+    if eh_serial.any():
+        formatados[eh_serial] = _formatar_timestamps(
+            pd.to_datetime(
+                np.floor(seriais[eh_serial]), unit="D", origin=ORIGEM_EXCEL
+            )
+        )
+
+    # Classes 3 e 4: textos DD/MM/YYYY e ISO
+    eh_br = eh_texto & textos.str.fullmatch(_PADRAO_DD_MM_YYYY)
+    if eh_br.any():
+        formatados[eh_br] = _formatar_timestamps(
+            pd.to_datetime(textos[eh_br], format="%d/%m/%Y", errors="coerce")
+        )
+    eh_iso = eh_texto & textos.str.fullmatch(_PADRAO_ISO)
+    if eh_iso.any():
+        formatados[eh_iso] = _formatar_timestamps(
+            pd.to_datetime(textos[eh_iso], format="ISO8601", errors="coerce")
+        )
+
+    # Restante (inclusive datas invalidas nas classes acima): formatador escalar
+    pendentes = formatados.isna()
+    if pendentes.any():
+        formatados[pendentes] = [fallback(v) for v in unicos[pendentes]]
+
+    return pd.Series(formatados.to_numpy()[codigos], index=valores.index, dtype=object)
+
+
+def _eh_data_nativa(valor: Any) -> bool:
+    if isinstance(valor, (pd.Timestamp, np.datetime64)):
+        return not pd.isna(valor)
+    return hasattr(valor, "strftime") and hasattr(valor, "year")
+
+
+def _eh_numero(valor: Any) -> bool:
+    if isinstance(valor, (bool, np.bool_)):
+        return False
+    return isinstance(valor, (int, float, np.integer, np.floating)) and not pd.isna(valor)
+
+
+def _formatar_timestamps(datas: pd.Series) -> pd.Series:
+    """strftime vetorizado; datas invalidas (NaT) ficam ausentes para o fallback."""
+    texto = pd.Series(pd.DatetimeIndex(datas).strftime(FORMATO_SAIDA), index=datas.index)
+    return texto.astype(object).where(pd.notna(texto), None)
@@ -26,6 +26,7 @@ from .base import (
     ConfiguracaoColunas,
     ProcessadorFinanceiroBase,
     ResultadoValidacaoLayout,
+    ResultadoNormalizacao,
 )
 
 # Processadores específicos
@@ -49,6 +50,7 @@ from .factory import (
     listar_tipos_disponiveis,
     normalizar_planilha,
     normalizar_planilha_detalhada,
+    normalizar_planilha_completa,
     validar_layout_planilha,
 )
 
@@ -75,6 +77,7 @@ __all__ = [
     "ConfiguracaoColunas",
     "ProcessadorFinanceiroBase",
     "ResultadoValidacaoLayout",
+    "ResultadoNormalizacao",
 
     # Processadores
     "ProcessadorContasReceber",
@@ -95,6 +98,7 @@ __all__ = [
     "listar_tipos_disponiveis",
     "normalizar_planilha",
     "normalizar_planilha_detalhada",
+    "normalizar_planilha_completa",
     "validar_layout_planilha",
 
     # Utilitários
@@ -13,10 +13,15 @@ import re
 import logging
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Optional, List, Tuple, Any
+from functools import lru_cache
+from typing import Optional, List, Tuple, Any, Dict
 from datetime import datetime
 from enum import Enum
 
+from tools.layouts import resolver_layout
+from tools.numeros import converter_numeros
+from tools.planilhas import ler_excel
+
 logger = logging.getLogger(__name__)
 
 
@@ -73,6 +78,14 @@ class ResultadoValidacaoLayout:
     avisos: List[str]
 
 
+@dataclass
+class ResultadoNormalizacao:
+    """Resultado da normalização em passada única (validação + detalhado + agregado)."""
+    validacao: ResultadoValidacaoLayout
+    detalhado: Optional[pd.DataFrame] = None  # None se o layout for inválido
+    agregado: Optional[pd.DataFrame] = None  # None se o layout for inválido
+
+
 # =============================================================================
 # FUNÇÕES DE NORMALIZAÇÃO DE COLUNAS
 # =============================================================================
@@ -94,8 +107,15 @@ def normalizar_nome_colunas(df: pd.DataFrame) -> pd.DataFrame:
         DataFrame com colunas normalizadas
     """
     df = df.copy()
-    df.columns = (
-        df.columns
+    df.columns = _normalizar_cabecalho(tuple(df.columns))
+    return df
+
+
+@lru_cache(maxsize=256)
+def _normalizar_cabecalho(colunas: Tuple[Any, ...]) -> List[str]:
+    """Normaliza um cabeçalho; memoizado porque o ERP repete os mesmos layouts."""
+    return list(
+        pd.Index(colunas, dtype=object, tupleize_cols=False)
         .astype(str)
         .str.strip()
         .str.lower()
@@ -106,7 +126,6 @@ def normalizar_nome_colunas(df: pd.DataFrame) -> pd.DataFrame:
         .str.replace(r"_+", "_", regex=True)
         .str.strip("_")
     )
-    return df
 
 
 def obter_coluna(df: pd.DataFrame, possiveis: List[str]) -> str:
@@ -205,61 +224,15 @@ def parse_numero_brasileiro(valor: Any) -> float:
     - 1234,89- (negativo por sufixo)
     - 1000D / 1000C (débito/crédito)
 
+    Para colunas inteiras use ``serie_para_numerico`` (vetorizado).
+
     Args:
         valor: Valor a converter (pode ser string, int, float ou None)
 
     Returns:
         Valor numérico como float (NaN se não puder converter)
     """
-    if pd.isna(valor):
-        return float("nan")
-
-    if isinstance(valor, (int, float)):
-        return float(valor)
-
-    s = str(valor).strip()
-    if not s:
-        return float("nan")
-
-    # Remover espaços e símbolos comuns
-    s = s.replace("\u00a0", "").replace(" ", "")
-
-    # Detectar sufixo D/C (Débito/Crédito)
-    credito = False
-    if s.upper().endswith("C"):
-        credito = True
-        s = s[:-1]
-    elif s.upper().endswith("D"):
-        s = s[:-1]
-
-    # Remover caracteres não numéricos (exceto , . - ())
-    s = re.sub(r"[^0-9,\.\-()]", "", s)
-
-    # Detectar negativo por parênteses ou sufixo
-    negativo = False
-    if s.startswith("(") and s.endswith(")"):
-        negativo = True
-        s = s[1:-1]
-    if s.endswith("-"):
-        negativo = True
-        s = s[:-1]
-
-    # Converter formato BR para padrão
-    if "," in s:
-        # Formato BR: 1.234.567,89
-        s = s.replace(".", "").replace(",", ".")
-    else:
-        # Sem vírgula: pode ser decimal com ponto ou milhar com vários pontos
-        if s.count(".") > 1:
-            s = s.replace(".", "")
-
-    try:
-        valor_float = float(s)
-        if negativo or credito:
-            valor_float = -valor_float
-        return valor_float
-    except Exception:
-        return float("nan")
+    return float(converter_numeros(pd.Series([valor], dtype=object)).iloc[0])
 
 
 def serie_para_numerico(df: pd.DataFrame, coluna: str) -> pd.Series:
@@ -271,9 +244,9 @@ def serie_para_numerico(df: pd.DataFrame, coluna: str) -> pd.Series:
         coluna: Nome da coluna a converter
 
     Returns:
-        Series com valores numéricos
+        Series com valores numéricos (NaN onde não houver número)
     """
-    return df[coluna].apply(parse_numero_brasileiro)
+    return converter_numeros(df[coluna])
 
 
 # =============================================================================
@@ -441,6 +414,48 @@ class ProcessadorFinanceiroBase(ABC):
         """Retorna o prefixo para códigos (C=cliente, F=fornecedor)."""
         pass
 
+    def _resolver_layout(self, df: pd.DataFrame) -> Dict[str, Optional[str]]:
+        """
+        Resolve as colunas do layout (já com nomes normalizados).
+
+        O mapa é guardado em cache pela impressão digital do cabeçalho e pelo
+        tipo do relatório, sendo compartilhado entre validação e normalizações.
+
+        Args:
+            df: DataFrame com colunas normalizadas
+
+        Returns:
+            Mapa coluna lógica -> coluna do arquivo (None se ausente)
+        """
+        def _resolver() -> Dict[str, Optional[str]]:
+            config = self.config
+            return {
+                "cliente": obter_coluna_opcional(df, config.codigo_cliente),
+                "vencido": obter_coluna_opcional(df, config.valor_vencido)
+                or buscar_coluna_flexivel(df, config.substrings_vencido),
+                "a_vencer": obter_coluna_opcional(df, config.valor_a_vencer)
+                or buscar_coluna_flexivel(df, config.substrings_a_vencer),
+                "valor_unico": obter_coluna_opcional(df, config.valor_unico),
+                "valor_generico": next((c for c in df.columns if "valor" in c), None),
+                "vencimento": obter_coluna_opcional(df, config.data_vencimento),
+                "emissao": obter_coluna_opcional(df, config.data_emissao),
+                "emissao_flexivel": buscar_coluna_flexivel(df, [
+                    ["data", "emissao"],
+                    ["data", "de", "emissao"],
+                    ["dt", "emissao"],
+                ]),
+                "documento": obter_coluna_opcional(df, config.numero_documento),
+                "documento_flexivel": buscar_coluna_flexivel(df, [
+                    ["prf", "numero"],
+                    ["prf", "num"],
+                    ["numero", "documento"],
+                    ["num", "doc"],
+                ]),
+                "parcela": obter_coluna_opcional(df, config.parcela),
+            }
+
+        return resolver_layout(self.get_tipo().value, df.columns, _resolver)
+
     def carregar_dados(self, entrada: Any) -> pd.DataFrame:
         """
         Carrega dados de entrada (DataFrame ou arquivo Excel).
@@ -452,9 +467,10 @@ class ProcessadorFinanceiroBase(ABC):
             DataFrame carregado
         """
         if isinstance(entrada, pd.DataFrame):
-            df = entrada.copy()
+            # Sem cópia: normalizar_nome_colunas já devolve um DataFrame novo
+            df = entrada
         else:
-            df = pd.read_excel(entrada)
+            df = ler_excel(entrada)
 
         self.logger.info(f"Total de registros lidos: {len(df)}")
         return df
@@ -472,11 +488,28 @@ class ProcessadorFinanceiroBase(ABC):
         df = self.carregar_dados(entrada)
         df = normalizar_nome_colunas(df)
 
-        # Encontrar coluna de código/cliente
-        col_cliente = obter_coluna(df, self.config.codigo_cliente)
+        # Layout resolvido uma vez sobre o cabeçalho original e reaproveitado nas etapas
+        layout = self._resolver_layout(df)
+        return self._normalizar_base_colunas(df, layout)
+
+    def _normalizar_base_colunas(
+        self, df: pd.DataFrame, layout: Dict[str, Optional[str]]
+    ) -> pd.DataFrame:
+        """
+        Normalização base sobre um DataFrame já carregado e com colunas normalizadas.
+
+        Args:
+            df: DataFrame com colunas normalizadas (alterado no lugar)
+            layout: Mapa de colunas já resolvido
+
+        Returns:
+            DataFrame normalizado com colunas padrão
+        """
+        # Encontrar coluna de código/cliente (obter_coluna gera o erro se faltar)
+        col_cliente = layout["cliente"] or obter_coluna(df, self.config.codigo_cliente)
 
         # Calcular valor
-        df = self._calcular_valor(df)
+        df = self._calcular_valor(df, layout)
 
         # Normalizar código
         codigo_df = normalizar_codigo_cliente(
@@ -487,36 +520,32 @@ class ProcessadorFinanceiroBase(ABC):
         df["cliente"] = codigo_df["cliente"]
 
         # Processar datas
-        df = self._processar_datas(df)
+        df = self._processar_datas(df, layout)
 
         # Processar campos auxiliares
-        df = self._processar_campos_auxiliares(df)
+        df = self._processar_campos_auxiliares(df, layout)
 
         # Limpar registros sem valor
         df = df[df["valor"].notna()].copy()
 
         return df
 
-    def _calcular_valor(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _calcular_valor(
+        self, df: pd.DataFrame, layout: Optional[Dict[str, Optional[str]]] = None
+    ) -> pd.DataFrame:
         """
         Calcula o valor total (vencido + a vencer ou valor único).
 
         Args:
             df: DataFrame com dados
+            layout: Mapa de colunas já resolvido (resolve se omitido)
 
         Returns:
             DataFrame com coluna 'valor' adicionada
         """
-        # Tentar encontrar colunas exatas primeiro
-        col_vencido = obter_coluna_opcional(df, self.config.valor_vencido)
-        col_a_vencer = obter_coluna_opcional(df, self.config.valor_a_vencer)
-
-        # Se não encontrou, tentar busca flexível
-        if not col_vencido:
-            col_vencido = buscar_coluna_flexivel(df, self.config.substrings_vencido)
-
-        if not col_a_vencer:
-            col_a_vencer = buscar_coluna_flexivel(df, self.config.substrings_a_vencer)
+        layout = layout or self._resolver_layout(df)
+        col_vencido = layout["vencido"]
+        col_a_vencer = layout["a_vencer"]
 
         # Se temos ambas colunas, somar
         if col_vencido and col_a_vencer:
@@ -531,9 +560,7 @@ class ProcessadorFinanceiroBase(ABC):
             )
         else:
             # Usar coluna única de valor
-            col_valor = obter_coluna_opcional(df, self.config.valor_unico)
-            if not col_valor:
-                col_valor = next((c for c in df.columns if "valor" in c), None)
+            col_valor = layout["valor_unico"] or layout["valor_generico"]
 
             if not col_valor:
                 raise ValueError(
@@ -545,28 +572,29 @@ class ProcessadorFinanceiroBase(ABC):
 
         return df
 
-    def _processar_datas(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _processar_datas(
+        self, df: pd.DataFrame, layout: Optional[Dict[str, Optional[str]]] = None
+    ) -> pd.DataFrame:
         """
         Processa colunas de data e calcula dias vencidos.
 
         Args:
             df: DataFrame com dados
+            layout: Mapa de colunas já resolvido (resolve se omitido)
 
         Returns:
             DataFrame com colunas de data processadas
         """
+        layout = layout or self._resolver_layout(df)
+
         # Data de vencimento
-        col_vencimento = obter_coluna(df, self.config.data_vencimento)
+        col_vencimento = layout["vencimento"] or obter_coluna(
+            df, self.config.data_vencimento
+        )
         df["data_vencimento"] = pd.to_datetime(df[col_vencimento], errors="coerce")
 
         # Data de emissão (opcional)
-        col_emissao = obter_coluna_opcional(df, self.config.data_emissao)
-        if not col_emissao:
-            col_emissao = buscar_coluna_flexivel(df, [
-                ["data", "emissao"],
-                ["data", "de", "emissao"],
-                ["dt", "emissao"],
-            ])
+        col_emissao = layout["emissao"] or layout["emissao_flexivel"]
 
         if col_emissao:
             df["data_emissao"] = df[col_emissao]
@@ -578,29 +606,27 @@ class ProcessadorFinanceiroBase(ABC):
 
         return df
 
-    def _processar_campos_auxiliares(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _processar_campos_auxiliares(
+        self, df: pd.DataFrame, layout: Optional[Dict[str, Optional[str]]] = None
+    ) -> pd.DataFrame:
         """
         Processa campos auxiliares (número documento, parcela).
 
         Args:
             df: DataFrame com dados
+            layout: Mapa de colunas já resolvido (resolve se omitido)
 
         Returns:
             DataFrame com campos auxiliares
         """
+        layout = layout or self._resolver_layout(df)
+
         # Número do documento
-        col_doc = obter_coluna_opcional(df, self.config.numero_documento)
-        if not col_doc:
-            col_doc = buscar_coluna_flexivel(df, [
-                ["prf", "numero"],
-                ["prf", "num"],
-                ["numero", "documento"],
-                ["num", "doc"],
-            ])
+        col_doc = layout["documento"] or layout["documento_flexivel"]
         df["numero_documento"] = df[col_doc] if col_doc else None
 
         # Parcela
-        col_parcela = obter_coluna_opcional(df, self.config.parcela)
+        col_parcela = layout["parcela"]
         df["parcela"] = df[col_parcela] if col_parcela else None
 
         return df
@@ -620,29 +646,38 @@ class ProcessadorFinanceiroBase(ABC):
         """
         df = self.carregar_dados(entrada)
         df = normalizar_nome_colunas(df)
+        return self._validar_colunas(df, self._resolver_layout(df))
+
+    def _validar_colunas(
+        self, df: pd.DataFrame, layout: Dict[str, Optional[str]]
+    ) -> ResultadoValidacaoLayout:
+        """
+        Valida o layout a partir do mapa de colunas já resolvido.
+
+        Args:
+            df: DataFrame com colunas normalizadas
+            layout: Mapa de colunas já resolvido
 
+        Returns:
+            ResultadoValidacaoLayout com detalhes da validação
+        """
         colunas_arquivo = list(df.columns)
         colunas_encontradas = []
         colunas_faltando = []
         avisos = []
 
         # 1. Verificar coluna de código/cliente (OBRIGATÓRIA)
-        col_cliente = obter_coluna_opcional(df, self.config.codigo_cliente)
+        col_cliente = layout["cliente"]
         if col_cliente:
             colunas_encontradas.append(f"Código/Cliente: {col_cliente}")
         else:
             colunas_faltando.append("Código do Cliente/Fornecedor")
 
         # 2. Verificar colunas de valor (pelo menos uma forma de obter valor)
-        col_vencido = obter_coluna_opcional(df, self.config.valor_vencido)
-        col_a_vencer = obter_coluna_opcional(df, self.config.valor_a_vencer)
-        col_valor_unico = obter_coluna_opcional(df, self.config.valor_unico)
-
-        # Busca flexível
-        if not col_vencido:
-            col_vencido = buscar_coluna_flexivel(df, self.config.substrings_vencido)
-        if not col_a_vencer:
-            col_a_vencer = buscar_coluna_flexivel(df, self.config.substrings_a_vencer)
+        # (exatas primeiro, depois busca flexível)
+        col_vencido = layout["vencido"]
+        col_a_vencer = layout["a_vencer"]
+        col_valor_unico = layout["valor_unico"]
 
         tem_valor_duplo = col_vencido and col_a_vencer
         tem_valor_unico = col_valor_unico is not None
@@ -662,21 +697,21 @@ class ProcessadorFinanceiroBase(ABC):
             colunas_faltando.append("Valor (vencido/a vencer ou valor único)")
 
         # 3. Verificar data de vencimento (OBRIGATÓRIA)
-        col_vencimento = obter_coluna_opcional(df, self.config.data_vencimento)
+        col_vencimento = layout["vencimento"]
         if col_vencimento:
             colunas_encontradas.append(f"Data Vencimento: {col_vencimento}")
         else:
             colunas_faltando.append("Data de Vencimento")
 
         # 4. Verificar data de emissão (opcional - apenas aviso)
-        col_emissao = obter_coluna_opcional(df, self.config.data_emissao)
+        col_emissao = layout["emissao"]
         if col_emissao:
             colunas_encontradas.append(f"Data Emissão: {col_emissao}")
         else:
             avisos.append("Coluna de data de emissão não encontrada (opcional)")
 
         # 5. Verificar número do documento (opcional - apenas aviso)
-        col_doc = obter_coluna_opcional(df, self.config.numero_documento)
+        col_doc = layout["documento"]
         if col_doc:
             colunas_encontradas.append(f"Número Documento: {col_doc}")
         else:
@@ -719,8 +754,18 @@ class ProcessadorFinanceiroBase(ABC):
         Returns:
             DataFrame agrupado com colunas: codigo, cliente, valor, dias_vencidos, TIPO
         """
-        df = self.normalizar_base(entrada)
+        return self._agregar_por_codigo(self.normalizar_base(entrada))
+
+    def _agregar_por_codigo(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Agrupa a base normalizada por código.
+
+        Args:
+            df: DataFrame retornado pela normalização base
 
+        Returns:
+            DataFrame agrupado com colunas: codigo, cliente, valor, dias_vencidos, TIPO
+        """
         # Agrupar por código
         df_agrupado = (
             df.groupby("codigo", as_index=False)
@@ -751,9 +796,42 @@ class ProcessadorFinanceiroBase(ABC):
         Returns:
             DataFrame com todos os registros detalhados
         """
-        df = self.normalizar_base(entrada)
+        return self._selecionar_detalhado(self.normalizar_base(entrada))
+
+    def _selecionar_detalhado(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Colunas por registro da base normalizada (saída de ``normalizar_detalhado``)."""
         return df[[
             "codigo", "cliente", "valor",
             "data_emissao", "data_vencimento",
             "numero_documento", "parcela"
         ]].copy()
+
+    def normalizar_completo(self, entrada: Any) -> ResultadoNormalizacao:
+        """
+        Valida o layout e normaliza a planilha em uma única passada.
+
+        Carrega a planilha, normaliza o cabeçalho e resolve o layout uma vez;
+        a base normalizada (valores, códigos, datas, dias vencidos) é calculada
+        uma única vez e dela saem o detalhado e o agregado por código.
+
+        Args:
+            entrada: DataFrame ou caminho para arquivo
+
+        Returns:
+            ResultadoNormalizacao; com layout inválido, apenas a validação
+            (detalhado e agregado ficam None)
+        """
+        df = self.carregar_dados(entrada)
+        df = normalizar_nome_colunas(df)
+        layout = self._resolver_layout(df)
+
+        validacao = self._validar_colunas(df, layout)
+        if not validacao.valido:
+            return ResultadoNormalizacao(validacao=validacao)
+
+        df = self._normalizar_base_colunas(df, layout)
+        return ResultadoNormalizacao(
+            validacao=validacao,
+            detalhado=self._selecionar_detalhado(df),
+            agregado=self._agregar_por_codigo(df),
+        )
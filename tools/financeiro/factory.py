@@ -10,7 +10,12 @@ from typing import Any, Dict, Type
 
 import pandas as pd
 
-from .base import ProcessadorFinanceiroBase, TipoFinanceiro, ResultadoValidacaoLayout
+from .base import (
+    ProcessadorFinanceiroBase,
+    TipoFinanceiro,
+    ResultadoValidacaoLayout,
+    ResultadoNormalizacao,
+)
 from .contas_receber import ProcessadorContasReceber
 from .contas_pagar import ProcessadorContasPagar
 
@@ -198,3 +203,30 @@ def validar_layout_planilha(
         processador = get_processador(tipo)
 
     return processador.validar_layout(entrada)
+
+
+def normalizar_planilha_completa(
+    entrada: Any,
+    tipo: TipoFinanceiro | str
+) -> ResultadoNormalizacao:
+    """
+    Valida e normaliza uma planilha financeira em uma única passada.
+
+    Args:
+        entrada: DataFrame ou caminho para arquivo Excel
+        tipo: Tipo de processamento (enum ou string)
+
+    Returns:
+        ResultadoNormalizacao com validação, DataFrame detalhado e agregado
+
+    Exemplo:
+        >>> resultado = normalizar_planilha_completa(dados_excel, "contas_receber")
+        >>> if resultado.validacao.valido:
+        ...     df_agregado = resultado.agregado
+    """
+    if isinstance(tipo, str):
+        processador = get_processador_por_nome(tipo)
+    else:
+        processador = get_processador(tipo)
+
+    return processador.normalizar_completo(entrada)
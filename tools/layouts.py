@@ -0,0 +1,81 @@
+"""
+Cache de resolucao de layout dos relatorios do ERP.
+
+O ERP emite sempre os mesmos poucos layouts (CTBR400, FINR470, balancete,
+contas a receber/pagar). Resolver as colunas (mapa logico -> coluna fisica)
+percorrendo listas de candidatas a cada requisicao e desperdicio: o resultado
+depende apenas do cabecalho bruto e do tipo de relatorio.
+
+``resolver_layout`` guarda o mapa resolvido sob (tipo de relatorio, impressao
+digital do cabecalho). A primeira etapa de uma execucao resolve; as demais
+(validacao, normalizacao, analise detalhada) reaproveitam.
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Tipos de relatorio (chave do cache junto com a impressao digital)
+LAYOUT_RAZAO_GERAL = "ctbr400_geral"
+LAYOUT_RAZAO_BANCO = "ctbr400_banco"
+LAYOUT_EXTRATO_BANCARIO = "finr470"
+LAYOUT_BALANCETE = "balancete"
+
+# Quantidade maxima de layouts mantidos em memoria
+MAX_LAYOUTS = 256
+
+MapaColunas = Dict[str, Optional[str]]
+
+_cache: "OrderedDict[Tuple[str, str], MapaColunas]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def impressao_digital(colunas: Iterable[Any]) -> str:
+    """Impressao digital (SHA-1) da tupla de nomes de colunas, na ordem do arquivo."""
+    conteudo = "\x1f".join(str(col) for col in colunas)
+    return hashlib.sha1(conteudo.encode("utf-8")).hexdigest()
+
+
+def resolver_layout(
+    tipo_relatorio: str,
+    colunas: Iterable[Any],
+    resolver: Callable[[], MapaColunas],
+) -> MapaColunas:
+    """
+    Retorna o mapa coluna logica -> coluna fisica do layout.
+
+    Args:
+        tipo_relatorio: Tipo do relatorio (ex.: LAYOUT_EXTRATO_BANCARIO)
+        colunas: Cabecalho bruto do arquivo
+        resolver: Funcao que resolve o mapa quando o layout ainda nao esta no cache;
+            deve depender apenas do cabecalho
+
+    Returns:
+        Copia do mapa resolvido (None para colunas nao encontradas)
+    """
+    chave = (tipo_relatorio, impressao_digital(colunas))
+    with _lock:
+        mapa = _cache.get(chave)
+        if mapa is not None:
+            _cache.move_to_end(chave)
+            return dict(mapa)
+
+    mapa = resolver()
+    logger.info(f"[LAYOUT] Layout {tipo_relatorio} resolvido: {mapa}")
+
+    with _lock:
+        _cache[chave] = dict(mapa)
+        _cache.move_to_end(chave)
+        while len(_cache) > MAX_LAYOUTS:
+            _cache.popitem(last=False)
+    return dict(mapa)
+
+
+def limpar_cache_layouts() -> None:
+    """Descarta todos os layouts resolvidos."""
+    with _lock:
+        _cache.clear()
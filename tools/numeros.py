@@ -0,0 +1,130 @@
+"""
+Conversao vetorizada de valores em formato brasileiro para float.
+
+Os relatorios trazem valores como numero (celula numerica do Excel) ou texto:
+1.234.567,89 | 1234,89 | (1.234,89) | 1.234,89- | -1.234,89 | R$ 1.234,89 |
+1.234,89D / 1.234,89C. ``converter_numeros`` trabalha sobre os valores
+distintos da coluna (o mesmo valor se repete muito nos razoes) e converte os
+textos com operacoes de string do pandas sobre strings do Arrow (regex
+compiladas pelo pyarrow, sem funcao Python por celula).
+
+As diferencas entre relatorios (valor para vazio/invalido, sufixo D/C,
+ponto como separador de milhar) sao opcoes da funcao.
+"""
+
+import numpy as np
+import pandas as pd
+
+from tools.compactacao import TEXTO_ARROW
+
+# Separador decimal
+DECIMAL_AUTO = "auto"  # virgula ou ponto, o que vier por ultimo (1.234,56 / 1,234.56)
+DECIMAL_VIRGULA = ","  # ponto e sempre separador de milhar (1.234 = 1234)
+
+# Celulas numericas (Excel, DataFrame): mantidas como estao
+_TIPOS_NUMERICOS = {
+    int, float, bool,
+    np.int8, np.int16, np.int32, np.int64, np.uint8, np.uint16, np.uint32, np.uint64,
+    np.float16, np.float32, np.float64, np.bool_,
+}
+
+# Sufixo D/C: so no fim da celula (1.234,56 D); letras em outras posicoes sao descartadas
+_PADRAO_SUFIXO_DC = r"\s*[DdCc]$"
+_PADRAO_CREDITO = r"[Cc]$"
+# Tudo que nao faz parte do numero (espacos, "R$", "USD", letras...) e descartado
+_PADRAO_DESCARTE = r"[^0-9,.()\-]"
+# Sinais e parenteses so nas pontas: (1.234,56) | -1.234,56 | 1.234,56- | --5 | (5
+_PADRAO_NUMERO = r"^[(\-]*[0-9.,]+[)\-]*$"
+# Negativo: parenteses em par, "-" depois do numero ou quantidade impar de "-" antes
+_PADRAO_NEGATIVO = r"^\(.*\)$|-\)?$|^\(?-(?:--)*[0-9.,]"
+# Virgula depois do ultimo ponto: 1.234,56 / 1234,56
+_PADRAO_VIRGULA_DECIMAL = r",[0-9]*$"
+_PADRAO_VARIOS_PONTOS = r"\..*\."
+# Numero ja sem separador de milhar, como o float aceita
+_PADRAO_FLOAT = r"^(?:[0-9]+\.?[0-9]*|\.[0-9]+)$"
+
+
+def converter_numeros(
+    valores: pd.Series,
+    padrao: float = np.nan,
+    sufixo_dc: bool = True,
+    decimal: str = DECIMAL_AUTO,
+) -> pd.Series:
+    """
+    Converte uma coluna de valores em formato brasileiro para float.
+
+    Negativos: parenteses, "-" antes ou depois do numero e, com ``sufixo_dc``,
+    o sufixo C (credito) no fim da celula; o sufixo D e apenas removido.
+    Simbolos de moeda ("R$", "USD"), espacos e outros caracteres sao ignorados. Celulas ja numericas sao
+    mantidas como estao.
+
+    Parametros:
+    -----------
+    valores : pd.Series
+        Coluna com numeros e/ou textos
+    padrao : float
+        Valor para celulas vazias, ausentes ou que nao formam um numero
+    sufixo_dc : bool
+        Reconhece o sufixo D/C no fim da celula (sem ele, as letras sao so descartadas)
+    decimal : str
+        ``DECIMAL_AUTO`` ou ``DECIMAL_VIRGULA``
+
+    Retorna:
+    --------
+    pd.Series de float, com o mesmo indice de ``valores``
+    """
+    if pd.api.types.is_numeric_dtype(valores):
+        numeros = valores.astype(float)
+        return numeros if np.isnan(padrao) else numeros.fillna(padrao)
+
+    valores = valores.astype(object)
+    resultado = np.full(len(valores), np.nan)
+
+    if pd.api.types.infer_dtype(valores, skipna=True) == "string":
+        eh_texto = valores.notna().to_numpy()
+    else:
+        eh_numero = valores.map(type).isin(_TIPOS_NUMERICOS).to_numpy()
+        resultado[eh_numero] = valores[eh_numero].astype(float)
+        eh_texto = ~eh_numero & valores.notna().to_numpy()
+
+    if eh_texto.any():
+        # Cada texto distinto e convertido uma vez
+        codigos, unicos = pd.factorize(valores[eh_texto])
+        convertidos = _converter_textos(pd.Series(unicos, dtype=object).astype(str), sufixo_dc, decimal)
+        resultado[eh_texto] = convertidos[codigos]
+
+    if not np.isnan(padrao):
+        resultado[np.isnan(resultado)] = padrao
+    return pd.Series(resultado, index=valores.index, dtype=float)
+
+
+def _converter_textos(textos: pd.Series, sufixo_dc: bool, decimal: str) -> np.ndarray:
+    textos = textos.astype(TEXTO_ARROW).str.strip()
+    credito = None
+    if sufixo_dc:
+        credito = textos.str.contains(_PADRAO_CREDITO, regex=True)
+        textos = textos.str.replace(_PADRAO_SUFIXO_DC, "", regex=True)
+    textos = textos.str.replace(_PADRAO_DESCARTE, "", regex=True)
+
+    valido = textos.str.contains(_PADRAO_NUMERO, regex=True)
+    negativo = textos.str.contains(_PADRAO_NEGATIVO, regex=True)
+    if credito is not None:
+        negativo |= credito
+
+    numero = textos.str.replace(r"[^0-9.,]", "", regex=True)
+    if decimal == DECIMAL_VIRGULA:
+        numero = numero.str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+    else:
+        tem_virgula = numero.str.contains(",", regex=False)
+        brasileiro = numero.str.contains(_PADRAO_VIRGULA_DECIMAL, regex=True)
+        # Virgula antes do ultimo ponto (1,234.56): virgula e milhar
+        internacional = tem_virgula & ~brasileiro
+        milhar = brasileiro | (~tem_virgula & numero.str.contains(_PADRAO_VARIOS_PONTOS, regex=True))
+
+        numero = numero.mask(milhar, numero.str.replace(".", "", regex=False))
+        numero = numero.mask(brasileiro, numero.str.replace(",", ".", regex=False))
+        numero = numero.mask(internacional, numero.str.replace(",", "", regex=False))
+
+    valido &= numero.str.contains(_PADRAO_FLOAT, regex=True)
+    numeros = numero.where(valido).astype(float).to_numpy()
+    return np.where(negativo.to_numpy(dtype=bool), -numeros, numeros)
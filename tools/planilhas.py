@@ -0,0 +1,328 @@
+"""
+Leitura das planilhas enviadas diretamente para a conciliação (.xlsx/.csv)
+e das bases extraídas do ERP em Parquet ou Arrow IPC.
+
+O resultado é o mesmo DataFrame que o frontend enviaria como ``registros``:
+uma linha por registro, colunas com os nomes do cabeçalho. A normalização
+continua nos tools de cada base.
+
+Excel é lido em streaming (``iterar_excel``): linha a linha, sem montar o
+modelo de objetos da pasta de trabalho, em lotes de DataFrame já tipados.
+``iterar_planilha`` lê qualquer dos formatos em lotes, para bases grandes
+das quais só parte das linhas interessa (ex.: razão geral do ano inteiro).
+"""
+import codecs
+import csv
+import io
+from datetime import date, datetime
+from itertools import chain, islice
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Sequence
+
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+EXTENSOES_EXCEL = (".xlsx", ".xlsm")
+EXTENSOES_CSV = (".csv", ".txt")
+EXTENSOES_PARQUET = (".parquet",)
+EXTENSOES_ARROW = (".arrow", ".arrows", ".feather", ".ipc")  # arquivo ou stream IPC
+EXTENSOES_PLANILHA = EXTENSOES_EXCEL + EXTENSOES_CSV + EXTENSOES_PARQUET + EXTENSOES_ARROW
+
+# Início de um arquivo Arrow IPC (formato arquivo/Feather v2); sem ele é stream
+_MAGICO_ARROW = b"ARROW1"
+
+# Relatórios do ERP (CTBR400, FINR470...) trazem linhas de título antes do
+# cabeçalho; ele é procurado nas primeiras linhas da aba
+LINHAS_BUSCA_CABECALHO = 30
+TAMANHO_LOTE_EXCEL = 50_000
+
+
+def extensao_planilha(nome_arquivo: str) -> str:
+    """Extensão (minúscula) do arquivo; ValueError se não for uma planilha suportada."""
+    extensao = Path(nome_arquivo or "").suffix.lower()
+    if extensao not in EXTENSOES_PLANILHA:
+        raise ValueError(
+            f"Arquivo '{nome_arquivo}' não suportado. Envie {', '.join(EXTENSOES_PLANILHA)}"
+        )
+    return extensao
+
+
+def _decodificar_csv(conteudo: bytes) -> str:
+    # Exportações do ERP costumam vir em latin-1; UTF-8 (com ou sem BOM) primeiro
+    try:
+        return conteudo.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return conteudo.decode("latin-1")
+
+
+def _codificacao_csv(conteudo: bytes) -> str:
+    # Mesma escolha de _decodificar_csv, validando o UTF-8 em blocos
+    decodificador = codecs.getincrementaldecoder("utf-8")()
+    try:
+        for inicio in range(0, len(conteudo), 1 << 20):
+            decodificador.decode(conteudo[inicio:inicio + (1 << 20)])
+        decodificador.decode(b"", final=True)
+    except UnicodeDecodeError:
+        return "latin-1"
+    return "utf-8-sig"
+
+
+def _separador_csv(texto: str) -> str:
+    try:
+        return csv.Sniffer().sniff(texto[:65536], delimiters=";,\t|").delimiter
+    except csv.Error:
+        return ";"
+
+
+def _ler_csv(conteudo: bytes) -> pd.DataFrame:
+    texto = _decodificar_csv(conteudo)
+    return pd.read_csv(io.StringIO(texto), sep=_separador_csv(texto))
+
+
+def _leitor_arrow(conteudo: bytes):
+    import pyarrow as pa
+
+    buffer = pa.py_buffer(conteudo)
+    if conteudo[:len(_MAGICO_ARROW)] == _MAGICO_ARROW:
+        return pa.ipc.open_file(buffer)
+    return pa.ipc.open_stream(buffer)
+
+
+def _ler_arrow(conteudo: bytes) -> pd.DataFrame:
+    tabela = _leitor_arrow(conteudo).read_all()
+    # Colunas numéricas sem nulos viram arrays que apontam para o buffer (sem cópia)
+    return tabela.to_pandas(split_blocks=True, self_destruct=True)
+
+
+# ==========================
+# EXCEL EM STREAMING
+# ==========================
+
+def _converter_celula(valor: Any) -> Any:
+    # Mesma conversão do pandas.read_excel: vazia -> "", número inteiro -> int
+    if valor is None:
+        return ""
+    if isinstance(valor, float) and valor.is_integer():
+        return int(valor)
+    if type(valor) is date:
+        return datetime(valor.year, valor.month, valor.day)
+    return valor
+
+
+def _linhas_calamine(fonte: Any, aba: int) -> Iterator[Sequence[Any]]:
+    from python_calamine import CalamineWorkbook
+
+    if isinstance(fonte, (str, Path)):
+        pasta = CalamineWorkbook.from_path(str(fonte))
+    else:
+        pasta = CalamineWorkbook.from_filelike(fonte)
+    try:
+        planilha = pasta.get_sheet_by_index(aba)
+        if planilha.start is None:
+            return
+        # A área lida começa na primeira célula preenchida; linhas/colunas
+        # vazias antes dela são repostas para manter as posições do Excel
+        linha_inicial, coluna_inicial = planilha.start
+        prefixo = [None] * coluna_inicial
+        for _ in range(linha_inicial):
+            yield []
+        for linha in planilha.iter_rows():
+            yield prefixo + linha if prefixo else linha
+    finally:
+        pasta.close()
+
+
+def _linhas_openpyxl(fonte: Any, aba: int) -> Iterator[Sequence[Any]]:
+    from openpyxl import load_workbook
+
+    pasta = load_workbook(fonte, read_only=True, data_only=True)
+    try:
+        planilha = pasta.worksheets[aba]
+        # A dimensão gravada no arquivo nem sempre está certa (igual ao pandas)
+        planilha.reset_dimensions()
+        yield from planilha.iter_rows(values_only=True)
+    finally:
+        pasta.close()
+
+
+def _linhas_excel(fonte: Any, aba: int) -> Iterator[List[Any]]:
+    """Linhas da aba já convertidas, sem as células vazias do fim de cada linha."""
+    try:
+        import python_calamine  # noqa: F401
+        linhas = _linhas_calamine(fonte, aba)
+    except ImportError:
+        linhas = _linhas_openpyxl(fonte, aba)
+
+    for linha in linhas:
+        convertida = [_converter_celula(valor) for valor in linha]
+        while convertida and convertida[-1] == "":
+            convertida.pop()
+        yield convertida
+
+
+def detectar_cabecalho(linhas: Sequence[Sequence[Any]]) -> int:
+    """
+    Posição da linha de cabeçalho entre as primeiras linhas da aba.
+
+    É a primeira linha com pelo menos metade (e no mínimo 2) das células de
+    texto da linha mais "textual": títulos do relatório têm uma ou duas
+    células preenchidas, linhas de dados têm números e datas. Sem candidata,
+    a primeira linha.
+    """
+    textos = [sum(1 for valor in linha if isinstance(valor, str) and valor.strip()) for linha in linhas]
+    maximo = max(textos, default=0)
+    minimo = max(2, (maximo + 1) // 2) if maximo >= 2 else 1
+    return next((posicao for posicao, total in enumerate(textos) if total >= minimo), 0)
+
+
+def _lote_excel(cabecalho: List[Any], linhas: List[List[Any]], inicio: int, dtype: Any) -> pd.DataFrame:
+    largura = len(cabecalho)
+    dados = [cabecalho] + [linha + [""] * (largura - len(linha)) for linha in linhas]
+    # Mesmo parser do pandas.read_excel: tipos inferidos por coluna,
+    # "Unnamed: N" e nomes repetidos iguais aos da leitura completa
+    lote = TextParser(dados, header=0, dtype=dtype, skip_blank_lines=False).read()
+    lote.index = pd.RangeIndex(inicio, inicio + len(lote))
+    return lote
+
+
+def iterar_excel(
+    fonte: Any,
+    aba: int = 0,
+    cabecalho: Optional[int] = None,
+    tamanho_lote: int = TAMANHO_LOTE_EXCEL,
+    dtype: Any = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Lê a aba do Excel linha a linha, em lotes de até ``tamanho_lote`` linhas.
+
+    Usa o python-calamine quando instalado (leitor em Rust) e, sem ele, o
+    openpyxl em modo somente leitura; em ambos a memória fica limitada ao
+    lote, não ao arquivo. ``cabecalho`` é a posição (0 = primeira linha) da
+    linha de cabeçalho; None detecta (``detectar_cabecalho``).
+
+    Os lotes têm as colunas do cabeçalho, tipos inferidos como no
+    ``pandas.read_excel`` e índice contínuo entre os lotes. Linhas vazias no
+    meio da aba são mantidas; as do fim, descartadas.
+
+    Args:
+        fonte: Caminho, bytes ou arquivo aberto (binário)
+        aba: Posição da aba
+        cabecalho: Linha do cabeçalho, ou None para detectar
+        tamanho_lote: Linhas por lote
+        dtype: Repassado ao parser (ex.: ``str``)
+    """
+    if isinstance(fonte, (bytes, bytearray)):
+        fonte = io.BytesIO(fonte)
+
+    linhas = _linhas_excel(fonte, aba)
+    iniciais = list(islice(linhas, LINHAS_BUSCA_CABECALHO if cabecalho is None else cabecalho + 1))
+    posicao = detectar_cabecalho(iniciais) if cabecalho is None else cabecalho
+    if posicao >= len(iniciais):
+        return
+
+    colunas = iniciais[posicao]
+    lote: List[List[Any]] = []
+    vazias: List[List[Any]] = []
+    inicio = 0
+    for linha in chain(iniciais[posicao + 1:], linhas):
+        if not linha:
+            vazias.append(linha)
+            continue
+        # Linhas vazias só entram quando há dados depois delas
+        lote.extend(vazias)
+        vazias = []
+        lote.append(linha)
+        if len(linha) > len(colunas):
+            colunas = colunas + [""] * (len(linha) - len(colunas))
+        if len(lote) >= tamanho_lote:
+            yield _lote_excel(colunas, lote, inicio, dtype)
+            inicio += len(lote)
+            lote = []
+
+    if lote or inicio == 0:
+        yield _lote_excel(colunas, lote, inicio, dtype)
+
+
+def ler_excel(fonte: Any, aba: int = 0, cabecalho: Optional[int] = None, dtype: Any = None) -> pd.DataFrame:
+    """Aba do Excel inteira em um DataFrame (lotes de ``iterar_excel`` concatenados)."""
+    lotes = list(iterar_excel(fonte, aba=aba, cabecalho=cabecalho, dtype=dtype))
+    if not lotes:
+        return pd.DataFrame()
+    if len(lotes) == 1:
+        return lotes[0]
+    return pd.concat(lotes)
+
+
+def _lotes_arrow(conteudo: bytes, tamanho_lote: int) -> Iterator[pd.DataFrame]:
+    import pyarrow as pa
+
+    leitor = _leitor_arrow(conteudo)
+    if isinstance(leitor, pa.ipc.RecordBatchFileReader):
+        lotes = (leitor.get_batch(i) for i in range(leitor.num_record_batches))
+    else:
+        lotes = iter(leitor)
+    for lote in lotes:
+        for inicio in range(0, lote.num_rows, tamanho_lote):
+            yield lote.slice(inicio, tamanho_lote).to_pandas(split_blocks=True)
+
+
+def _lotes_parquet(conteudo: bytes, tamanho_lote: int) -> Iterator[pd.DataFrame]:
+    import pyarrow.parquet as pq
+
+    arquivo = pq.ParquetFile(io.BytesIO(conteudo))
+    for lote in arquivo.iter_batches(batch_size=tamanho_lote):
+        yield lote.to_pandas(split_blocks=True)
+
+
+def iterar_planilha(
+    conteudo: bytes, nome_arquivo: str, tamanho_lote: int = TAMANHO_LOTE_EXCEL
+) -> Iterator[pd.DataFrame]:
+    """
+    Lê a base (mesmos formatos de ``ler_planilha``) em lotes de até
+    ``tamanho_lote`` linhas, com índice contínuo entre os lotes.
+
+    Só o lote corrente fica em memória além do arquivo: o chamador filtra ou
+    agrega cada lote e descarta o resto. Os tipos são inferidos por lote
+    (Excel e CSV), como na leitura em lotes do pandas.
+    """
+    extensao = extensao_planilha(nome_arquivo)
+    if extensao in EXTENSOES_EXCEL:
+        yield from iterar_excel(conteudo, tamanho_lote=tamanho_lote)
+        return
+
+    if extensao in EXTENSOES_CSV:
+        # Lido dos bytes, sem o texto inteiro decodificado em memória;
+        # read_csv em lotes já numera as linhas de forma contínua
+        codificacao = _codificacao_csv(conteudo)
+        amostra = conteudo[:65536].decode(codificacao, errors="ignore")
+        yield from pd.read_csv(
+            io.BytesIO(conteudo),
+            sep=_separador_csv(amostra),
+            encoding=codificacao,
+            chunksize=tamanho_lote,
+        )
+        return
+
+    lotes = _lotes_parquet(conteudo, tamanho_lote) if extensao in EXTENSOES_PARQUET else _lotes_arrow(conteudo, tamanho_lote)
+    inicio = 0
+    for lote in lotes:
+        lote.index = pd.RangeIndex(inicio, inicio + len(lote))
+        inicio += len(lote)
+        yield lote
+
+
+def ler_planilha(conteudo: bytes, nome_arquivo: str) -> pd.DataFrame:
+    """
+    Lê a base (primeira aba do Excel, CSV, Parquet ou Arrow IPC) em um DataFrame.
+
+    Excel é lido em streaming (``ler_excel``), com o cabeçalho detectado; no CSV o separador (; , tab |) e a codificação são detectados. Parquet e
+    Arrow (pyarrow) já vêm tipados e não passam por parsing de texto.
+    """
+    extensao = extensao_planilha(nome_arquivo)
+    if extensao in EXTENSOES_CSV:
+        return _ler_csv(conteudo)
+    if extensao in EXTENSOES_PARQUET:
+        return pd.read_parquet(io.BytesIO(conteudo), engine="pyarrow")
+    if extensao in EXTENSOES_ARROW:
+        return _ler_arrow(conteudo)
+    return ler_excel(conteudo)
@@ -0,0 +1,203 @@
+"""
+Busca de subconjunto de valores que soma um alvo (subset-sum) em centavos.
+
+Usado para escolher os lançamentos que explicam uma diferença de conciliação.
+A estratégia depende do tamanho do problema:
+- Programação dinâmica sobre as somas alcançáveis, quando alvo x itens cabe no orçamento
+- Meet-in-the-middle, para listas de tamanho médio com alvo alto
+- Busca em profundidade com poda, limitada pelo orçamento, nos demais casos
+
+Todas as estratégias respeitam um orçamento de operações e um limite de tempo;
+esgotado o orçamento, retorna None e o chamador usa seu resultado de fallback.
+O resultado é determinístico: para a mesma entrada, o mesmo subconjunto.
+"""
+
+import time
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+# Orçamento padrão (podem ser sobrescritos pelo chamador)
+MAX_NOS_PADRAO = 20_000_000
+TEMPO_LIMITE_MS_PADRAO = 250
+DP_MAX_ALVO_PADRAO = 1_000_000  # R$ 10.000,00
+MITM_MAX_ITENS_PADRAO = 40
+
+
+class _OrcamentoEsgotado(Exception):
+    pass
+
+
+class _Orcamento:
+    """Controla operações consumidas e o prazo de uma busca."""
+
+    def __init__(self, max_nos: int, tempo_limite_ms: int) -> None:
+        self.restante = max_nos
+        self.prazo = time.monotonic() + tempo_limite_ms / 1000.0
+
+    def consumir(self, nos: int) -> None:
+        self.restante -= nos
+        if self.restante < 0 or time.monotonic() > self.prazo:
+            raise _OrcamentoEsgotado()
+
+    def cabe(self, nos: int) -> bool:
+        return nos <= self.restante
+
+
+def encontrar_subconjunto(
+    valores_centavos: Sequence[int],
+    alvo: int,
+    tolerancia: int = 1,
+    max_nos: int = MAX_NOS_PADRAO,
+    tempo_limite_ms: int = TEMPO_LIMITE_MS_PADRAO,
+    dp_max_alvo: int = DP_MAX_ALVO_PADRAO,
+    mitm_max_itens: int = MITM_MAX_ITENS_PADRAO,
+) -> Optional[List[int]]:
+    """
+    Procura posições de ``valores_centavos`` cuja soma fica a até ``tolerancia``
+    centavos de ``alvo``.
+
+    Apenas valores positivos participam. Retorna as posições em ordem crescente,
+    lista vazia se ``alvo`` já está dentro da tolerância de zero, ou None quando
+    não há solução ou o orçamento (``max_nos``/``tempo_limite_ms``) se esgota.
+    """
+    if alvo <= tolerancia:
+        return []
+
+    limite = alvo + tolerancia
+    posicoes = [i for i, v in enumerate(valores_centavos) if 0 < v <= limite]
+    if not posicoes:
+        return None
+    valores = [int(valores_centavos[i]) for i in posicoes]
+    if sum(valores) < alvo - tolerancia:
+        return None
+
+    orcamento = _Orcamento(max_nos, tempo_limite_ms)
+    try:
+        celulas_dp = len(valores) * (limite + 1)
+        if limite <= dp_max_alvo and orcamento.cabe(celulas_dp):
+            escolhidos = _programacao_dinamica(valores, alvo, tolerancia, orcamento)
+        elif len(valores) <= mitm_max_itens:
+            escolhidos = _meet_in_the_middle(valores, alvo, tolerancia, orcamento)
+        else:
+            escolhidos = _busca_profundidade(valores, alvo, tolerancia, orcamento)
+    except (_OrcamentoEsgotado, RecursionError):
+        return None
+
+    if escolhidos is None:
+        return None
+    return sorted(posicoes[i] for i in escolhidos)
+
+
+def _alvos_aceitos(alvo: int, tolerancia: int) -> List[int]:
+    """Somas aceitas, da mais próxima do alvo para a mais distante."""
+    alvos = [alvo]
+    for desvio in range(1, tolerancia + 1):
+        alvos.extend([alvo - desvio, alvo + desvio])
+    return alvos
+
+
+def _programacao_dinamica(
+    valores: List[int], alvo: int, tolerancia: int, orcamento: _Orcamento
+) -> Optional[List[int]]:
+    limite = alvo + tolerancia
+    alcancavel = np.zeros(limite + 1, dtype=bool)
+    alcancavel[0] = True
+    # Item que alcançou cada soma pela primeira vez (para reconstrução)
+    origem = np.full(limite + 1, -1, dtype=np.int32)
+
+    for i, v in enumerate(valores):
+        orcamento.consumir(limite + 1)
+        novos = np.zeros(limite + 1, dtype=bool)
+        novos[v:] = alcancavel[: limite + 1 - v]
+        novos &= ~alcancavel
+        origem[novos] = i
+        alcancavel |= novos
+
+    for soma in _alvos_aceitos(alvo, tolerancia):
+        if 0 <= soma <= limite and alcancavel[soma]:
+            escolhidos = []
+            while soma > 0:
+                i = int(origem[soma])
+                escolhidos.append(i)
+                soma -= valores[i]
+            return sorted(escolhidos)
+    return None
+
+
+def _somas_subconjuntos(valores: List[int]) -> np.ndarray:
+    """Somas de todos os subconjuntos; o bit j do índice indica o item j."""
+    somas = np.zeros(1, dtype=np.int64)
+    for v in valores:
+        somas = np.concatenate([somas, somas + v])
+    return somas
+
+
+def _meet_in_the_middle(
+    valores: List[int], alvo: int, tolerancia: int, orcamento: _Orcamento
+) -> Optional[List[int]]:
+    meio = len(valores) // 2
+    esquerda, direita = valores[:meio], valores[meio:]
+    orcamento.consumir((1 << len(esquerda)) + (1 << len(direita)))
+
+    somas_esq = _somas_subconjuntos(esquerda)
+    somas_dir = _somas_subconjuntos(direita)
+    ordem_dir = np.argsort(somas_dir, kind="stable")
+    somas_dir_ordenadas = somas_dir[ordem_dir]
+
+    for soma_alvo in _alvos_aceitos(alvo, tolerancia):
+        faltante = soma_alvo - somas_esq
+        pos = np.searchsorted(somas_dir_ordenadas, faltante, side="left")
+        pos_validas = np.minimum(pos, len(somas_dir_ordenadas) - 1)
+        encontrados = np.flatnonzero(
+            (pos < len(somas_dir_ordenadas))
+            & (somas_dir_ordenadas[pos_validas] == faltante)
+        )
+        if encontrados.size:
+            mascara_esq = int(encontrados[0])
+            mascara_dir = int(ordem_dir[pos_validas[mascara_esq]])
+            escolhidos = [j for j in range(len(esquerda)) if mascara_esq >> j & 1]
+            escolhidos.extend(
+                meio + j for j in range(len(direita)) if mascara_dir >> j & 1
+            )
+            return escolhidos
+    return None
+
+
+def _busca_profundidade(
+    valores: List[int], alvo: int, tolerancia: int, orcamento: _Orcamento
+) -> Optional[List[int]]:
+    # Maiores valores primeiro: soluções curtas aparecem antes e a poda é mais eficaz
+    ordem = sorted(range(len(valores)), key=lambda i: (-valores[i], i))
+    ordenados = [valores[i] for i in ordem]
+    restantes = [0] * (len(ordenados) + 1)
+    for i in range(len(ordenados) - 1, -1, -1):
+        restantes[i] = restantes[i + 1] + ordenados[i]
+
+    minimo, maximo = alvo - tolerancia, alvo + tolerancia
+    escolhidos: List[int] = []
+    nos = 0
+
+    def _buscar(inicio: int, soma: int) -> bool:
+        nonlocal nos
+        if minimo <= soma <= maximo:
+            return True
+        for i in range(inicio, len(ordenados)):
+            if soma + restantes[i] < minimo:
+                return False
+            nos += 1
+            if nos >= 1024:
+                orcamento.consumir(nos)
+                nos = 0
+            v = ordenados[i]
+            if soma + v > maximo:
+                continue
+            escolhidos.append(i)
+            if _buscar(i + 1, soma + v):
+                return True
+            escolhidos.pop()
+        return False
+
+    if not _buscar(0, 0):
+        return None
+    return sorted(ordem[i] for i in escolhidos)
@@ -0,0 +1,69 @@
+"""
+Multiconjunto de valores monetarios indexado por centavos.
+
+Usado nos matchings "consome ao casar" (razao x financeiro e extrato x razao):
+cada valor e guardado sob (chave, valor em centavos), de modo que localizar e
+consumir um valor compativel custa O(1), em vez de varrer uma lista de floats.
+A tolerancia de R$ 0,01 e tratada de forma exata sondando os centavos vizinhos.
+"""
+
+from collections import deque
+from typing import Any, Deque, Dict, Hashable, Tuple
+
+# Tolerancia padrao de conciliacao (R$ 0,01 = 1 centavo)
+TOLERANCIA_CENTAVOS = 1
+
+_AUSENTE = object()
+
+
+def para_centavos(valor: float) -> int:
+    """Converte um valor em reais para centavos inteiros (arredondado)."""
+    return int(round(float(valor) * 100))
+
+
+class MulticonjuntoCentavos:
+    """
+    Multiconjunto de valores agrupados por chave e valor em centavos.
+
+    Cada ocorrencia pode carregar um item (ex.: indice da linha de origem), que
+    e devolvido ao ser consumida. Ocorrencias do mesmo valor sao consumidas na
+    ordem de insercao; o valor exato tem prioridade sobre os vizinhos dentro da
+    tolerancia.
+    """
+
+    def __init__(self, tolerancia_centavos: int = TOLERANCIA_CENTAVOS) -> None:
+        self.tolerancia_centavos = tolerancia_centavos
+        self._ocorrencias: Dict[Tuple[Hashable, int], Deque[Any]] = {}
+        self._total = 0
+
+    def __len__(self) -> int:
+        return self._total
+
+    def adicionar(self, chave: Hashable, valor: float, item: Any = None) -> None:
+        """Registra uma ocorrencia de ``valor`` sob ``chave``."""
+        self._ocorrencias.setdefault((chave, para_centavos(valor)), deque()).append(item)
+        self._total += 1
+
+    def retirar(self, chave: Hashable, valor: float, padrao: Any = None) -> Any:
+        """
+        Consome uma ocorrencia compativel com ``valor`` e devolve seu item.
+
+        Retorna ``padrao`` quando nao ha ocorrencia dentro da tolerancia.
+        """
+        centavos = para_centavos(valor)
+        for desvio in self._desvios():
+            ocorrencias = self._ocorrencias.get((chave, centavos + desvio))
+            if ocorrencias:
+                self._total -= 1
+                return ocorrencias.popleft()
+        return padrao
+
+    def consumir(self, chave: Hashable, valor: float) -> bool:
+        """Consome uma ocorrencia compativel com ``valor``; indica se havia alguma."""
+        return self.retirar(chave, valor, padrao=_AUSENTE) is not _AUSENTE
+
+    def _desvios(self):
+        yield 0
+        for passo in range(1, self.tolerancia_centavos + 1):
+            yield -passo
+            yield passo